@@ -3,17 +3,22 @@ from typing import Callable
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError
-from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.invalidation import user_cache
+from app.core.revocation import revocation_registry
 from app.core.security import decode_token
+from app.core.tracing import traced
+from app.db.queries import user_by_id
 from app.db.session import get_db
+from app.db.sharding import bind_session_to_org, shard_bind, sharding_enabled
 from app.models.user import User
 from app.schemas.auth import TokenPayload
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
 
+@traced("auth.get_current_user")
 async def get_current_user(
     db: AsyncSession = Depends(get_db), token: str = Depends(oauth2_scheme)
 ) -> User:
@@ -26,11 +31,21 @@ async def get_current_user(
         payload: TokenPayload = decode_token(token)
     except (JWTError, ValueError):
         raise credentials_exception
+    if revocation_registry.is_family_revoked(payload.sid):
+        raise credentials_exception
 
-    result = await db.execute(select(User).where(User.id == payload.sub))
-    user = result.scalars().first()
+    user = user_cache.get(payload.sub)
     if user is None:
-        raise credentials_exception
+        result = await db.execute(user_by_id(payload.sub), bind_arguments=shard_bind(payload.home))
+        user = result.scalars().first()
+        if user is None and sharding_enabled():
+            result = await db.execute(user_by_id(payload.sub))
+            user = result.scalars().first()
+        if user is None:
+            raise credentials_exception
+        db.expunge(user)
+        user_cache.set(payload.sub, user)
+    bind_session_to_org(db, user.organization_id)
     if not user.is_active:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Inactive user")
     return user
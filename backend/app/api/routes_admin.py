@@ -1,18 +1,34 @@
-from typing import List, Optional
+from datetime import date, timedelta
+from typing import List, Optional, Union
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import PlainTextResponse
+from sqlalchemy import func, insert, select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.deps import get_current_user, get_db, require_roles
+from app.core.ai_providers import provider_router
 from app.core.config import get_settings
+from app.core.invalidation import publish
+from app.core.profiling import profile_store
 from app.core.security import hash_password
+from app.core.throttle import login_throttle
+from app.core.tracing import trace_exporter
+from app.db.errors import is_unique_violation
+from app.db.sharding import directory_bind, shard_bind, sharding_enabled, users_by_email
+from app.db.session import shard_engines
+from app.db.upsert import insert as upsert_insert
+from app.db.warmup import last_warm_up, pool_stats, statement_cache_stats
+from app.models.ai_usage import AIUsageDaily
 from app.models.allowed_email_domain import AllowedEmailDomain
 from app.models.organization import Organization
 from app.models.user import User
 from app.schemas.auth import RegisterRequest
 from app.schemas.organization import OrganizationCreate, OrganizationRead
+from app.schemas.usage import AIUsageReport, AIUsageRow
 from app.schemas.user import UserRead
+from app.utils.email_sender import outbox_depth, send_email
 
 router = APIRouter(prefix="/admin", tags=["admin"])
 settings = get_settings()
@@ -36,42 +52,70 @@ def _user_to_read(user: User) -> UserRead:
 
 @router.post("/organizations", response_model=OrganizationRead, dependencies=[Depends(require_roles("platformAdmin"))])
 async def create_organization(payload: OrganizationCreate, db: AsyncSession = Depends(get_db)) -> OrganizationRead:
-    org = Organization(name=payload.name, slug=payload.slug, primary_domain=payload.primary_domain)
-    db.add(org)
-    await db.commit()
-    await db.refresh(org)
-
-    if payload.primary_domain:
-        existing_domain = await db.execute(
-            select(AllowedEmailDomain).where(AllowedEmailDomain.domain == payload.primary_domain)
+    try:
+        result = await db.execute(
+            insert(Organization)
+            .values(name=payload.name, slug=payload.slug, primary_domain=payload.primary_domain)
+            .returning(Organization)
         )
-        if not existing_domain.scalars().first():
-            domain_entry = AllowedEmailDomain(domain=payload.primary_domain, organization_id=org.id)
-            db.add(domain_entry)
-            await db.commit()
+        org = result.scalar_one()
+        if payload.primary_domain:
+            await db.execute(
+                upsert_insert(AllowedEmailDomain)
+                .values(domain=payload.primary_domain, organization_id=org.id)
+                .on_conflict_do_nothing(index_elements=[AllowedEmailDomain.domain]),
+                bind_arguments=shard_bind(org.id),
+            )
+            await publish(db, "allowed_domain", payload.primary_domain)
+        await db.commit()
+    except IntegrityError as exc:
+        await db.rollback()
+        if is_unique_violation(exc):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Organization already exists")
+        raise
 
     return OrganizationRead.from_orm(org)
 
 
+async def _insert_user(db: AsyncSession, payload: RegisterRequest, role: str, org_id: Optional[str]) -> User:
+    if sharding_enabled() and await users_by_email(db, payload.email):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="User already exists")
+    try:
+        result = await db.execute(
+            insert(User)
+            .values(
+                email=payload.email,
+                name=payload.name,
+                password_hash=hash_password(payload.password),
+                role=role,
+                organization_id=org_id,
+                current_organization_id=org_id,
+            )
+            .returning(User),
+            bind_arguments=shard_bind(org_id),
+        )
+        user = result.scalar_one()
+        send_email(
+            db,
+            [user.email],
+            f"Welcome to {settings.APP_NAME}",
+            f"Hi {user.name},\n\nAn account has been created for you on {settings.APP_NAME}.",
+        )
+        await db.commit()
+    except IntegrityError as exc:
+        await db.rollback()
+        if is_unique_violation(exc):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="User already exists")
+        raise
+    return user
+
+
 @router.post("/org-admins", response_model=UserRead, dependencies=[Depends(require_roles("platformAdmin"))])
 async def create_org_admin(payload: RegisterRequest, db: AsyncSession = Depends(get_db)) -> UserRead:
-    result = await db.execute(select(User).where(User.email == payload.email))
-    if result.scalars().first():
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="User already exists")
     if not payload.organization_id:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Organization required")
 
-    user = User(
-        email=payload.email,
-        name=payload.name,
-        password_hash=hash_password(payload.password),
-        role="orgAdmin",
-        organization_id=payload.organization_id,
-        current_organization_id=payload.organization_id,
-    )
-    db.add(user)
-    await db.commit()
-    await db.refresh(user)
+    user = await _insert_user(db, payload, "orgAdmin", payload.organization_id)
     return _user_to_read(user)
 
 
@@ -89,22 +133,8 @@ def _resolve_org_id(payload_org: Optional[str], current_user: User) -> Optional[
 async def create_professor(
     payload: RegisterRequest, current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)
 ) -> UserRead:
-    result = await db.execute(select(User).where(User.email == payload.email))
-    if result.scalars().first():
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="User already exists")
-
     org_id = _resolve_org_id(payload.organization_id, current_user)
-    user = User(
-        email=payload.email,
-        name=payload.name,
-        password_hash=hash_password(payload.password),
-        role="professor",
-        organization_id=org_id,
-        current_organization_id=org_id,
-    )
-    db.add(user)
-    await db.commit()
-    await db.refresh(user)
+    user = await _insert_user(db, payload, "professor", org_id)
     return _user_to_read(user)
 
 
@@ -114,22 +144,8 @@ async def create_professor(
 async def create_student(
     payload: RegisterRequest, current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)
 ) -> UserRead:
-    result = await db.execute(select(User).where(User.email == payload.email))
-    if result.scalars().first():
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="User already exists")
-
     org_id = _resolve_org_id(payload.organization_id, current_user)
-    user = User(
-        email=payload.email,
-        name=payload.name,
-        password_hash=hash_password(payload.password),
-        role="student",
-        organization_id=org_id,
-        current_organization_id=org_id,
-    )
-    db.add(user)
-    await db.commit()
-    await db.refresh(user)
+    user = await _insert_user(db, payload, "student", org_id)
     return _user_to_read(user)
 
 
@@ -159,3 +175,105 @@ async def admin_list_users(current_user: User = Depends(get_current_user), db: A
     result = await db.execute(stmt)
     users = result.scalars().all()
     return [_user_to_read(user) for user in users]
+
+
+@router.get("/email-outbox", response_model=dict, dependencies=[Depends(require_roles("platformAdmin"))])
+async def email_outbox_status(db: AsyncSession = Depends(get_db)) -> dict:
+    return await outbox_depth(db)
+
+
+@router.get("/db-stats", response_model=dict, dependencies=[Depends(require_roles("platformAdmin"))])
+async def database_stats() -> dict:
+    return {
+        "pools": pool_stats(shard_engines),
+        **statement_cache_stats.snapshot(),
+        "warm_up": last_warm_up,
+    }
+
+
+@router.get("/ai-providers", response_model=dict, dependencies=[Depends(require_roles("platformAdmin"))])
+async def ai_provider_stats() -> dict:
+    return provider_router.snapshot()
+
+
+@router.get("/auth-throttle", response_model=dict, dependencies=[Depends(require_roles("platformAdmin"))])
+async def auth_throttle_stats() -> dict:
+    return login_throttle.snapshot()
+
+
+@router.get("/tracing", response_model=dict, dependencies=[Depends(require_roles("platformAdmin"))])
+async def tracing_stats() -> dict:
+    return trace_exporter.snapshot()
+
+
+@router.get("/profiles", response_model=List[dict], dependencies=[Depends(require_roles("platformAdmin"))])
+async def list_profiles() -> List[dict]:
+    return profile_store.list()
+
+
+@router.get("/profiles/{profile_id}", response_model=None, dependencies=[Depends(require_roles("platformAdmin"))])
+async def read_profile(
+    profile_id: str, format: str = Query("json", pattern="^(json|folded|tree)$")
+) -> Union[dict, PlainTextResponse]:
+    profile = profile_store.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found")
+    if format == "folded":
+        return PlainTextResponse(profile.get("folded_stacks") or "")
+    if format == "tree":
+        return PlainTextResponse(profile.get("call_tree") or "")
+    return profile
+
+
+@router.get("/ai-usage", response_model=AIUsageReport)
+async def ai_usage_report(
+    start: Optional[date] = Query(None),
+    end: Optional[date] = Query(None),
+    organization_id: Optional[str] = Query(None),
+    by_user: bool = Query(False),
+    current_user: User = Depends(require_roles("orgAdmin", "platformAdmin")),
+    db: AsyncSession = Depends(get_db),
+) -> AIUsageReport:
+    end = end or date.today()
+    start = start or end - timedelta(days=30)
+    if current_user.role == "orgAdmin":
+        organization_id = str(current_user.organization_id) if current_user.organization_id else None
+        if organization_id is None:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No organization assigned")
+
+    group_columns = [AIUsageDaily.day, AIUsageDaily.endpoint, AIUsageDaily.provider, AIUsageDaily.model]
+    if by_user:
+        group_columns.append(AIUsageDaily.user_id)
+    stmt = (
+        select(
+            *group_columns,
+            func.sum(AIUsageDaily.calls).label("calls"),
+            func.sum(AIUsageDaily.cache_hits).label("cache_hits"),
+            func.sum(AIUsageDaily.input_chars).label("input_chars"),
+            func.sum(AIUsageDaily.output_chars).label("output_chars"),
+            func.sum(AIUsageDaily.latency_ms_total).label("latency_ms_total"),
+        )
+        .where(AIUsageDaily.day >= start, AIUsageDaily.day <= end)
+        .group_by(*group_columns)
+        .order_by(*group_columns)
+    )
+    if organization_id:
+        stmt = stmt.where(AIUsageDaily.organization_id == organization_id)
+
+    result = await db.execute(stmt, bind_arguments=directory_bind())
+    rows = [
+        AIUsageRow(
+            day=row.day,
+            endpoint=row.endpoint,
+            provider=row.provider,
+            model=row.model,
+            user_id=str(row.user_id) if by_user else None,
+            calls=row.calls,
+            cache_hits=row.cache_hits,
+            input_chars=row.input_chars,
+            output_chars=row.output_chars,
+            avg_latency_ms=row.latency_ms_total / row.calls if row.calls else 0.0,
+        )
+        for row in result
+    ]
+    return AIUsageReport(organization_id=organization_id, start=start, end=end, rows=rows)
@@ -1,6 +1,20 @@
-from fastapi import APIRouter, Depends
+import asyncio
+import time
+from typing import Callable, List, Optional, Tuple, Type, TypeVar
 
-from app.api.deps import get_current_user
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import get_current_user, get_db
+from app.core import deadline
+from app.core.ai_providers import ProviderError, configured_providers, provider_router
+from app.core.config import get_settings
+from app.core.content_library import TopicNotFound, content_hash, find_content, resolve_topic_id, store_content
+from app.core.tracing import start_span
+from app.core.usage import UsageEvent, usage_recorder
+from app.db.queries import model_settings_by_user
 from app.models.user import User
 from app.schemas.ai import (
     Lesson,
@@ -11,17 +25,21 @@ from app.schemas.ai import (
     Rubric,
     RubricCriterion,
     RubricInput,
+    TextAnalysis,
     TextToolInput,
     TextToolResult,
     Worksheet,
     WorksheetInput,
 )
+from app.utils.text_analysis import ANALYSIS_MODES, analyze_texts, summarize
 
 router = APIRouter(prefix="/ai", tags=["ai"])
+settings = get_settings()
 
+OutputT = TypeVar("OutputT", bound=BaseModel)
 
-@router.post("/lesson", response_model=Lesson)
-async def generate_lesson(input: LessonInput, current_user: User = Depends(get_current_user)) -> Lesson:
+
+def _build_lesson(input: LessonInput) -> Lesson:
     title = f"Lesson on {input.topic} for grade {input.grade}"
     return Lesson(
         title=title,
@@ -36,8 +54,7 @@ async def generate_lesson(input: LessonInput, current_user: User = Depends(get_c
     )
 
 
-@router.post("/quiz", response_model=Quiz)
-async def generate_quiz(input: QuizInput, current_user: User = Depends(get_current_user)) -> Quiz:
+def _build_quiz(input: QuizInput) -> Quiz:
     questions = [
         QuizQuestion(
             question=f"What is a key idea in {input.topic} {i+1}?",
@@ -49,10 +66,7 @@ async def generate_quiz(input: QuizInput, current_user: User = Depends(get_curre
     return Quiz(topic=input.topic, questions=questions)
 
 
-@router.post("/worksheet", response_model=Worksheet)
-async def generate_worksheet(
-    input: WorksheetInput, current_user: User = Depends(get_current_user)
-) -> Worksheet:
+def _build_worksheet(input: WorksheetInput) -> Worksheet:
     activities = [
         f"Define key terms related to {input.topic}",
         f"Match concepts for {input.topic}",
@@ -61,8 +75,7 @@ async def generate_worksheet(
     return Worksheet(topic=input.topic, activities=activities)
 
 
-@router.post("/rubric", response_model=Rubric)
-async def generate_rubric(input: RubricInput, current_user: User = Depends(get_current_user)) -> Rubric:
+def _build_rubric(input: RubricInput) -> Rubric:
     criteria = [
         RubricCriterion(criterion="Understanding", description="Shows strong understanding", points=4),
         RubricCriterion(criterion="Application", description="Applies concepts to tasks", points=4),
@@ -71,7 +84,135 @@ async def generate_rubric(input: RubricInput, current_user: User = Depends(get_c
     return Rubric(assignment_type=input.assignment_type, criteria=criteria)
 
 
+def _build_text_tool(input: TextToolInput) -> TextToolResult:
+    return TextToolResult(output=f"[{input.mode}] {input.text}")
+
+
+async def _model_settings(db: AsyncSession, user: User) -> Tuple[str, str, List[str]]:
+    """The user's primary provider and model, and every provider they hold a key for."""
+
+    result = await db.execute(
+        model_settings_by_user(user.id)
+    )
+    row = result.first()
+    if row is None:
+        return "default", "demo-model", []
+    return row.provider, row.model, configured_providers(row)
+
+
+async def _generate(
+    endpoint: str,
+    input: BaseModel,
+    user: User,
+    db: AsyncSession,
+    build: Callable[..., OutputT],
+    output_type: Optional[Type[OutputT]] = None,
+) -> OutputT:
+    """Generate ``endpoint`` output, serving it from the content library when ``output_type`` is set."""
+
+    provider, model, configured = await _model_settings(db, user)
+    started = time.perf_counter()
+    output: Optional[OutputT] = None
+    digest = None
+    topic_id = None
+    if output_type is not None:
+        try:
+            topic_id = await resolve_topic_id(db, user, input)
+        except TopicNotFound:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Topic not found")
+        digest = content_hash(endpoint, model, user, input)
+        output = await find_content(db, user, digest, output_type)
+    cache_hit = output is not None
+    if output is None:
+        candidates = provider_router.candidates(provider, configured)
+        try:
+            winner, output = await asyncio.wait_for(
+                provider_router.generate(candidates, build, input, model),
+                deadline.timeout(settings.AI_GENERATION_TIMEOUT_SECONDS),
+            )
+        except asyncio.TimeoutError:
+            raise HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail="AI generation timed out")
+        except ProviderError:
+            raise HTTPException(status_code=status.HTTP_502_BAD_GATEWAY, detail="AI providers are unavailable")
+        if digest is not None:
+            # Store under the requested model: it is what ``digest`` was computed from.
+            await store_content(db, user, endpoint, model, digest, input, output, topic_id)
+        if winner != provider:
+            provider, model = winner, "default"
+    usage_recorder.record(
+        UsageEvent(
+            user_id=user.id,
+            organization_id=user.organization_id,
+            endpoint=endpoint,
+            provider=provider,
+            model=model,
+            input_chars=len(input.model_dump_json()),
+            output_chars=len(output.model_dump_json()),
+            latency_ms=int((time.perf_counter() - started) * 1000),
+            cache_hit=cache_hit,
+        )
+    )
+    return output
+
+
+@router.post("/lesson", response_model=Lesson)
+async def generate_lesson(
+    input: LessonInput, current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)
+) -> Lesson:
+    return await _generate("lesson", input, current_user, db, _build_lesson, Lesson)
+
+
+@router.post("/quiz", response_model=Quiz)
+async def generate_quiz(
+    input: QuizInput, current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)
+) -> Quiz:
+    return await _generate("quiz", input, current_user, db, _build_quiz, Quiz)
+
+
+@router.post("/worksheet", response_model=Worksheet)
+async def generate_worksheet(
+    input: WorksheetInput, current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)
+) -> Worksheet:
+    return await _generate("worksheet", input, current_user, db, _build_worksheet, Worksheet)
+
+
+@router.post("/rubric", response_model=Rubric)
+async def generate_rubric(
+    input: RubricInput, current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)
+) -> Rubric:
+    return await _generate("rubric", input, current_user, db, _build_rubric, Rubric)
+
+
 @router.post("/text-tool", response_model=TextToolResult)
-async def text_tool(input: TextToolInput, current_user: User = Depends(get_current_user)) -> TextToolResult:
-    output = f"[{input.mode}] {input.text}"
-    return TextToolResult(output=output)
+async def text_tool(
+    input: TextToolInput, current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)
+) -> TextToolResult:
+    if input.mode not in ANALYSIS_MODES:
+        return await _generate("text-tool", input, current_user, db, _build_text_tool)
+
+    texts = input.texts if input.texts is not None else [input.text]
+    if len(texts) > settings.TEXT_ANALYSIS_MAX_DOCUMENTS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.TEXT_ANALYSIS_MAX_DOCUMENTS} texts per request",
+        )
+    started = time.perf_counter()
+    with start_span("ai.text_analysis", mode=input.mode, documents=len(texts)):
+        results = await run_in_threadpool(analyze_texts, texts, input.mode, input.target_grade)
+    output = TextToolResult(
+        output="\n".join(summarize(result) for result in results),
+        analyses=[TextAnalysis.model_validate(result) for result in results],
+    )
+    usage_recorder.record(
+        UsageEvent(
+            user_id=current_user.id,
+            organization_id=current_user.organization_id,
+            endpoint="text-tool",
+            provider="local",
+            model=f"text-analysis/{input.mode}",
+            input_chars=sum(len(text) for text in texts),
+            output_chars=len(output.output),
+            latency_ms=int((time.perf_counter() - started) * 1000),
+        )
+    )
+    return output
@@ -1,22 +1,35 @@
-from typing import Any
+import logging
+import math
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.deps import get_current_user, get_db
 from app.core.config import get_settings
+from app.core.invalidation import allowed_domain_cache, publish
+from app.core.revocation import revocation_registry
 from app.core.security import (
     create_access_token,
     create_refresh_token,
     decode_token,
     hash_password,
-    verify_password,
+    verify_and_update,
 )
+from app.core.throttle import login_throttle
+from app.db.errors import is_unique_violation
+from app.db.queries import user_by_id
+from app.db.sharding import sharding_enabled, users_by_email
 from app.models.allowed_email_domain import AllowedEmailDomain
+from app.models.refresh_token import RefreshToken
 from app.models.user import User
 from app.schemas.auth import (
     LoginRequest,
+    LogoutRequest,
     RefreshRequest,
     RegisterRequest,
     Token,
@@ -25,6 +38,7 @@ from app.schemas.user import UserRead
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 settings = get_settings()
+logger = logging.getLogger(__name__)
 
 
 def _build_user_read(user: User) -> UserRead:
@@ -43,23 +57,94 @@ def _build_user_read(user: User) -> UserRead:
     )
 
 
+def _token_payload(user: User, family_id: uuid.UUID) -> dict:
+    return {
+        "sub": str(user.id),
+        "email": user.email,
+        "role": user.role,
+        "org": str(user.current_organization_id) if user.current_organization_id else None,
+        # The organization that owns the user row; it decides the user's shard.
+        "home": str(user.organization_id) if user.organization_id else None,
+        "sid": str(family_id),
+    }
+
+
+def _issue_tokens(
+    db: AsyncSession, user: User, family_id: Optional[uuid.UUID] = None, jti: Optional[uuid.UUID] = None
+) -> Token:
+    family_id = family_id or uuid.uuid4()
+    jti = jti or uuid.uuid4()
+    db.add(
+        RefreshToken(
+            id=jti,
+            family_id=family_id,
+            user_id=user.id,
+            expires_at=datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+        )
+    )
+    payload = _token_payload(user, family_id)
+    return Token(
+        access_token=create_access_token(payload),
+        refresh_token=create_refresh_token({**payload, "jti": str(jti)}),
+        user=_build_user_read(user),
+    )
+
+
+async def _revoke_family(db: AsyncSession, family_id: uuid.UUID) -> None:
+    result = await db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.family_id == family_id, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=datetime.utcnow())
+        .returning(RefreshToken.expires_at)
+    )
+    expires = [row[0] for row in result]
+    await db.commit()
+    fallback = datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+    revocation_registry.revoke_family(str(family_id), max(expires, default=fallback))
+
+
+def _parse_uuid(value: Optional[str]) -> Optional[uuid.UUID]:
+    try:
+        return uuid.UUID(value) if value else None
+    except ValueError:
+        return None
+
+
+def _client_ip(http_request: Request) -> Optional[str]:
+    return http_request.client.host if http_request.client else None
+
+
+async def _enforce_throttle(http_request: Request, email: Optional[str] = None) -> None:
+    """Refuse the attempt with 429 while its IP or email is blocked, before any password hashing."""
+
+    throttled = await login_throttle.check(_client_ip(http_request), email)
+    if throttled is not None:
+        _, retry_after = throttled
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many attempts, please try again later",
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
+
+
 @router.post("/register", response_model=UserRead)
-async def register(request: RegisterRequest, db: AsyncSession = Depends(get_db)) -> Any:
+async def register(request: RegisterRequest, http_request: Request, db: AsyncSession = Depends(get_db)) -> Any:
+    await _enforce_throttle(http_request)
+    await login_throttle.record_registration(_client_ip(http_request))
     domain = request.email.split("@")[-1]
     if settings.ENABLE_DOMAIN_RESTRICTION:
-        result = await db.execute(
-            select(AllowedEmailDomain).where(
-                AllowedEmailDomain.domain == domain, AllowedEmailDomain.active.is_(True)
+        allowed = allowed_domain_cache.get(domain)
+        if allowed is None:
+            result = await db.execute(
+                select(AllowedEmailDomain.id).where(
+                    AllowedEmailDomain.domain == domain, AllowedEmailDomain.active.is_(True)
+                )
             )
-        )
-        allowed = result.scalars().first()
+            allowed = result.first() is not None
+            allowed_domain_cache.set(domain, allowed)
         if not allowed:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email domain not allowed")
 
-    existing = await db.execute(select(User).where(User.email == request.email))
-    if existing.scalars().first():
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="User already exists")
-
     if not request.password:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Password must not be empty")
     if len(request.password.encode("utf-8")) > 72:
@@ -67,60 +152,109 @@ async def register(request: RegisterRequest, db: AsyncSession = Depends(get_db))
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Password must be at most 72 bytes",
         )
+    if sharding_enabled() and await users_by_email(db, request.email):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="User already exists")
 
-    new_user = User(
-        email=request.email,
-        name=request.name,
-        password_hash=hash_password(request.password),
-        role="student",
-        organization_id=None,
-        current_organization_id=None,
-    )
-    db.add(new_user)
-    await db.commit()
-    await db.refresh(new_user)
+    try:
+        result = await db.execute(
+            insert(User)
+            .values(
+                email=request.email,
+                name=request.name,
+                password_hash=hash_password(request.password),
+                role="student",
+                organization_id=None,
+                current_organization_id=None,
+            )
+            .returning(User)
+        )
+        new_user = result.scalar_one()
+        await db.commit()
+    except IntegrityError as exc:
+        await db.rollback()
+        if is_unique_violation(exc):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="User already exists")
+        raise
     return _build_user_read(new_user)
 
 
 @router.post("/login", response_model=Token)
-async def login(request: LoginRequest, db: AsyncSession = Depends(get_db)) -> Any:
-    result = await db.execute(select(User).where(User.email == request.email))
-    user = result.scalars().first()
-    if user is None or not verify_password(request.password, user.password_hash):
+async def login(request: LoginRequest, http_request: Request, db: AsyncSession = Depends(get_db)) -> Any:
+    await _enforce_throttle(http_request, request.email)
+    users = await users_by_email(db, request.email)
+    if len(users) > 1:
+        # Never guess which account is meant; the duplicate has to be resolved by an administrator.
+        logger.error("Email %s belongs to %d users across shards", request.email, len(users))
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Incorrect email or password")
+    user = users[0] if users else None
+    verified, new_hash = verify_and_update(request.password, user.password_hash) if user else (False, None)
+    if not verified:
+        await login_throttle.record_failure(_client_ip(http_request), request.email)
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Incorrect email or password")
+    await login_throttle.record_success(request.email)
+    if new_hash is not None:
+        user.password_hash = new_hash
+        await publish(db, "user", user.id)
 
-    payload = {
-        "sub": str(user.id),
-        "email": user.email,
-        "role": user.role,
-        "org": str(user.current_organization_id) if user.current_organization_id else None,
-    }
-    access_token = create_access_token(payload)
-    refresh_token = create_refresh_token(payload)
-    return Token(
-        access_token=access_token,
-        refresh_token=refresh_token,
-        user=_build_user_read(user),
-    )
+    token = _issue_tokens(db, user)
+    await db.commit()
+    return token
 
 
 @router.post("/refresh", response_model=Token)
 async def refresh_token(body: RefreshRequest, db: AsyncSession = Depends(get_db)) -> Any:
-    token_payload = decode_token(body.refresh_token, is_refresh=True)
-    result = await db.execute(select(User).where(User.id == token_payload.sub))
+    invalid = HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token")
+    try:
+        token_payload = decode_token(body.refresh_token, is_refresh=True)
+    except ValueError:
+        raise invalid
+    jti = _parse_uuid(token_payload.jti)
+    family_id = _parse_uuid(token_payload.sid)
+    if jti is None or family_id is None:
+        raise invalid
+
+    if revocation_registry.is_family_revoked(token_payload.sid):
+        raise invalid
+    if revocation_registry.is_token_revoked(token_payload.jti):
+        # A rotated token was presented again: treat the whole session as compromised.
+        await _revoke_family(db, family_id)
+        raise invalid
+
+    new_jti = uuid.uuid4()
+    rotated = await db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.id == jti, RefreshToken.revoked_at.is_(None))
+        .values(revoked_at=datetime.utcnow(), replaced_by_id=new_jti)
+        .returning(RefreshToken.family_id, RefreshToken.user_id, RefreshToken.expires_at)
+    )
+    row = rotated.first()
+    if row is None:
+        await db.rollback()
+        await _revoke_family(db, family_id)
+        raise invalid
+
+    result = await db.execute(user_by_id(row.user_id))
     user = result.scalars().first()
-    if user is None:
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token")
+    if user is None or not user.is_active:
+        await db.rollback()
+        raise invalid
 
-    payload = {
-        "sub": str(user.id),
-        "email": user.email,
-        "role": user.role,
-        "org": str(user.current_organization_id) if user.current_organization_id else None,
-    }
-    access_token = create_access_token(payload)
-    refresh_token = create_refresh_token(payload)
-    return Token(access_token=access_token, refresh_token=refresh_token, user=_build_user_read(user))
+    token = _issue_tokens(db, user, family_id=row.family_id, jti=new_jti)
+    await db.commit()
+    revocation_registry.revoke_token(str(jti), row.expires_at)
+    return token
+
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(body: LogoutRequest, db: AsyncSession = Depends(get_db)) -> Response:
+    try:
+        token_payload = decode_token(body.refresh_token, is_refresh=True)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token")
+    family_id = _parse_uuid(token_payload.sid)
+    if family_id is not None:
+        await _revoke_family(db, family_id)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 
 @router.get("/me", response_model=UserRead)
@@ -0,0 +1,87 @@
+import uuid
+from typing import Dict, Literal, Optional, Tuple
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql.elements import ColumnElement
+
+from app.api.deps import get_db, require_roles
+from app.db.sharding import shard_bind
+from app.models.allowed_email_domain import AllowedEmailDomain
+from app.models.topic import Topic
+from app.models.user import User
+from app.utils.export import encode_csv, encode_jsonl, gzip_stream, stream_partitions
+
+router = APIRouter(prefix="/admin/export", tags=["admin"])
+
+EXPORT_COLUMNS: Dict[str, Tuple[ColumnElement, ...]] = {
+    "users": (
+        User.id,
+        User.email,
+        User.name,
+        User.role,
+        User.organization_id,
+        User.current_organization_id,
+        User.is_active,
+        User.created_at,
+        User.updated_at,
+    ),
+    "topics": (
+        Topic.id,
+        Topic.title,
+        Topic.description,
+        Topic.organization_id,
+        Topic.created_by_user_id,
+        Topic.created_at,
+        Topic.updated_at,
+    ),
+    "domains": (
+        AllowedEmailDomain.id,
+        AllowedEmailDomain.domain,
+        AllowedEmailDomain.organization_id,
+        AllowedEmailDomain.active,
+        AllowedEmailDomain.created_at,
+        AllowedEmailDomain.updated_at,
+    ),
+}
+ORG_COLUMNS = {
+    "users": User.organization_id,
+    "topics": Topic.organization_id,
+    "domains": AllowedEmailDomain.organization_id,
+}
+MEDIA_TYPES = {"csv": "text/csv", "jsonl": "application/x-ndjson"}
+
+
+@router.get("/{dataset}")
+async def export_dataset(
+    dataset: Literal["users", "topics", "domains"],
+    format: Literal["csv", "jsonl"] = Query("csv"),
+    gzip: bool = Query(True),
+    organization_id: Optional[uuid.UUID] = Query(None),
+    current_user: User = Depends(require_roles("orgAdmin", "platformAdmin")),
+    db: AsyncSession = Depends(get_db),
+) -> StreamingResponse:
+    if current_user.role == "orgAdmin":
+        organization_id = current_user.organization_id
+    if not organization_id:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Organization required")
+    # The export streams on its own session; do not keep the auth session's connection checked out.
+    await db.close()
+
+    columns = EXPORT_COLUMNS[dataset]
+    stmt = select(*columns).where(ORG_COLUMNS[dataset] == organization_id).order_by(columns[0])
+    names = [column.key for column in columns]
+    encoder = encode_csv if format == "csv" else encode_jsonl
+    body = encoder(names, stream_partitions(stmt, shard_bind(organization_id)))
+
+    filename = f"{dataset}.{format}"
+    media_type = MEDIA_TYPES[format]
+    if gzip:
+        body = gzip_stream(body)
+        filename += ".gz"
+        media_type = "application/gzip"
+    return StreamingResponse(
+        body, media_type=media_type, headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
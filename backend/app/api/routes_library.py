@@ -0,0 +1,95 @@
+import uuid
+from datetime import datetime
+from typing import Optional, Tuple
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import get_current_user, get_db
+from app.core.content_library import visible_to
+from app.models.generated_content import GeneratedContent
+from app.models.user import User
+from app.schemas.library import LibraryItem, LibraryItemSummary, LibraryPage
+
+router = APIRouter(prefix="/library", tags=["library"])
+
+SUMMARY_COLUMNS = (
+    GeneratedContent.id,
+    GeneratedContent.kind,
+    GeneratedContent.model,
+    GeneratedContent.title,
+    GeneratedContent.organization_id,
+    GeneratedContent.topic_id,
+    GeneratedContent.created_by_user_id,
+    GeneratedContent.created_at,
+)
+
+
+def _summary_fields(row) -> dict:
+    return {
+        "id": str(row.id),
+        "kind": row.kind,
+        "model": row.model,
+        "title": row.title,
+        "organization_id": str(row.organization_id) if row.organization_id else None,
+        "topic_id": str(row.topic_id) if row.topic_id else None,
+        "created_by_user_id": str(row.created_by_user_id),
+        "created_at": row.created_at,
+    }
+
+
+def _encode_cursor(created_at: datetime, item_id: uuid.UUID) -> str:
+    return f"{created_at.isoformat()}_{item_id}"
+
+
+def _decode_cursor(cursor: str) -> Tuple[datetime, uuid.UUID]:
+    try:
+        created_at, item_id = cursor.rsplit("_", 1)
+        return datetime.fromisoformat(created_at), uuid.UUID(item_id)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+@router.get("/", response_model=LibraryPage)
+async def list_library(
+    kind: Optional[str] = Query(None),
+    topic_id: Optional[uuid.UUID] = Query(None),
+    cursor: Optional[str] = Query(None),
+    limit: int = Query(20, ge=1, le=100),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+) -> LibraryPage:
+    stmt = select(*SUMMARY_COLUMNS).where(visible_to(current_user))
+    if kind:
+        stmt = stmt.where(GeneratedContent.kind == kind)
+    if topic_id:
+        stmt = stmt.where(GeneratedContent.topic_id == topic_id)
+    if cursor:
+        stmt = stmt.where(tuple_(GeneratedContent.created_at, GeneratedContent.id) < _decode_cursor(cursor))
+    stmt = stmt.order_by(GeneratedContent.created_at.desc(), GeneratedContent.id.desc()).limit(limit + 1)
+
+    rows = (await db.execute(stmt)).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = _encode_cursor(rows[-1].created_at, rows[-1].id)
+    return LibraryPage(items=[LibraryItemSummary(**_summary_fields(row)) for row in rows], next_cursor=next_cursor)
+
+
+@router.get("/{item_id}", response_model=LibraryItem)
+async def read_library_item(
+    item_id: str, current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)
+) -> LibraryItem:
+    not_found = HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Library item not found")
+    try:
+        content_id = uuid.UUID(item_id)
+    except ValueError:
+        raise not_found
+    result = await db.execute(
+        select(GeneratedContent).where(GeneratedContent.id == content_id, visible_to(current_user))
+    )
+    item = result.scalars().first()
+    if item is None:
+        raise not_found
+    return LibraryItem(**_summary_fields(item), input=item.input, content=item.content)
@@ -1,13 +1,17 @@
-from typing import List, Optional
+from typing import List, Optional, Union
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.deps import get_current_user, get_db, require_roles
+from app.core.invalidation import organization_cache, publish
+from app.db.errors import is_unique_violation
 from app.models.organization import Organization
 from app.models.user import User
 from app.schemas.organization import OrganizationCreate, OrganizationRead
+from app.utils.http_cache import cache_headers, etag_matches, make_etag, not_modified
 
 router = APIRouter(prefix="/organizations", tags=["organizations"])
 
@@ -20,12 +24,43 @@ async def list_organizations(db: AsyncSession = Depends(get_db)) -> List[Organiz
 
 
 @router.get("/me", response_model=Optional[OrganizationRead])
-async def read_my_organization(current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)) -> Optional[OrganizationRead]:
+async def read_my_organization(
+    request: Request,
+    response: Response,
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+) -> Union[Optional[OrganizationRead], Response]:
     if not current_user.organization_id:
         return None
+
+    org_key = str(current_user.organization_id)
+    cached = organization_cache.get(org_key)
+    if cached is not None:
+        org_read, etag = cached
+        if etag_matches(request, etag):
+            return not_modified(etag, org_read.updated_at)
+        response.headers.update(cache_headers(etag, org_read.updated_at))
+        return org_read
+
+    version = await db.execute(
+        select(Organization.updated_at).where(Organization.id == current_user.organization_id)
+    )
+    last_modified = version.scalar_one_or_none()
+    if last_modified is None:
+        return None
+    etag = make_etag("organization", current_user.organization_id, last_modified.isoformat())
+    if etag_matches(request, etag):
+        return not_modified(etag, last_modified)
+
     result = await db.execute(select(Organization).where(Organization.id == current_user.organization_id))
     org = result.scalars().first()
-    return OrganizationRead.from_orm(org) if org else None
+    if org is None:
+        return None
+    org_read = OrganizationRead.from_orm(org)
+    etag = make_etag("organization", current_user.organization_id, org.updated_at.isoformat())
+    organization_cache.set(org_key, (org_read, etag))
+    response.headers.update(cache_headers(etag, org.updated_at))
+    return org_read
 
 
 @router.put("/me", response_model=OrganizationRead)
@@ -42,23 +77,41 @@ async def update_my_org(
     if not target_org_id:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Organization not found")
 
-    result = await db.execute(select(Organization).where(Organization.id == target_org_id))
-    org = result.scalars().first()
+    try:
+        result = await db.execute(
+            update(Organization)
+            .where(Organization.id == target_org_id)
+            .values(name=payload.name, slug=payload.slug, primary_domain=payload.primary_domain)
+            .returning(Organization)
+            .execution_options(populate_existing=True)
+        )
+        org = result.scalars().first()
+        if org is not None:
+            await publish(db, "organization", org.id)
+        await db.commit()
+    except IntegrityError as exc:
+        await db.rollback()
+        if is_unique_violation(exc):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Organization slug already in use")
+        raise
     if org is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Organization not found")
-
-    org.name = payload.name
-    org.slug = payload.slug
-    org.primary_domain = payload.primary_domain
-    await db.commit()
-    await db.refresh(org)
     return OrganizationRead.from_orm(org)
 
 
 @router.post("/", response_model=OrganizationRead, dependencies=[Depends(require_roles("platformAdmin"))])
 async def create_organization(payload: OrganizationCreate, db: AsyncSession = Depends(get_db)) -> OrganizationRead:
-    org = Organization(name=payload.name, slug=payload.slug, primary_domain=payload.primary_domain)
-    db.add(org)
-    await db.commit()
-    await db.refresh(org)
+    try:
+        result = await db.execute(
+            insert(Organization)
+            .values(name=payload.name, slug=payload.slug, primary_domain=payload.primary_domain)
+            .returning(Organization)
+        )
+        org = result.scalar_one()
+        await db.commit()
+    except IntegrityError as exc:
+        await db.rollback()
+        if is_unique_violation(exc):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Organization already exists")
+        raise
     return OrganizationRead.from_orm(org)
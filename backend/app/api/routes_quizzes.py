@@ -0,0 +1,182 @@
+import math
+import uuid
+from datetime import datetime
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+from fastapi import APIRouter, Depends, HTTPException, status
+from pydantic import ValidationError
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import get_db, require_roles
+from app.core.config import get_settings
+from app.core.content_library import visible_to
+from app.core.tracing import start_span
+from app.db.sharding import shard_bind
+from app.db.upsert import insert
+from app.models.generated_content import GeneratedContent
+from app.models.quiz_submission import QuizSubmission
+from app.models.user import User
+from app.schemas.ai import Quiz
+from app.schemas.quiz import OptionStats, QuestionStats, QuizGradeReport, QuizSubmissionBatch, StudentResult
+from app.utils.quiz_grading import AnswerKey, GradeReport, grade
+
+router = APIRouter(prefix="/quizzes", tags=["quizzes"])
+settings = get_settings()
+
+GRADER_ROLES = ("professor", "orgAdmin", "platformAdmin")
+
+
+async def _load_quiz(db: AsyncSession, user: User, content_id: str) -> Tuple[GeneratedContent, Quiz, AnswerKey]:
+    try:
+        item_id = uuid.UUID(content_id)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Quiz not found")
+    result = await db.execute(
+        select(GeneratedContent).where(
+            GeneratedContent.id == item_id, GeneratedContent.kind == "quiz", visible_to(user)
+        ),
+        bind_arguments=shard_bind(user.organization_id),
+    )
+    item = result.scalars().first()
+    if item is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Quiz not found")
+    try:
+        quiz = Quiz.model_validate(item.content)
+        key = AnswerKey.from_questions(quiz.questions)
+    except ValidationError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Stored quiz content is malformed")
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+    return item, quiz, key
+
+
+def _rounded(value: float) -> Optional[float]:
+    return None if math.isnan(value) else round(float(value), 4)
+
+
+def _report(
+    item: GeneratedContent, quiz: Quiz, key: AnswerKey, student_ids: Sequence[str], graded: GradeReport
+) -> QuizGradeReport:
+    students = len(student_ids)
+    results = [
+        StudentResult(student_id=student_id, correct=correct, answered=answered, score=round(score, 4))
+        for student_id, correct, answered, score in zip(
+            student_ids, graded.correct.tolist(), graded.answered.tolist(), graded.scores.tolist()
+        )
+    ]
+    question_stats = []
+    for index, question in enumerate(quiz.questions):
+        picks = graded.option_picks[index].tolist()
+        mean_scores = graded.option_mean_scores[index].tolist()
+        question_stats.append(
+            QuestionStats(
+                question=question.question,
+                difficulty=round(float(graded.difficulty[index]), 4),
+                discrimination=_rounded(graded.discrimination[index]),
+                omitted=int(graded.omitted[index]),
+                options=[
+                    OptionStats(
+                        option=option,
+                        is_answer=option_index == int(key.correct[index]),
+                        picks=picks[option_index],
+                        share=round(picks[option_index] / students, 4),
+                        mean_score=_rounded(mean_scores[option_index]),
+                    )
+                    for option_index, option in enumerate(question.options)
+                ],
+            )
+        )
+    return QuizGradeReport(
+        content_id=str(item.id),
+        students=students,
+        questions=key.questions,
+        mean_score=round(float(graded.scores.mean()), 4),
+        median_score=round(float(np.median(graded.scores)), 4),
+        reliability=None if graded.reliability is None else round(graded.reliability, 4),
+        results=results,
+        question_stats=question_stats,
+    )
+
+
+@router.post("/{content_id}/submissions", response_model=QuizGradeReport)
+async def submit_answers(
+    content_id: str,
+    payload: QuizSubmissionBatch,
+    current_user: User = Depends(require_roles(*GRADER_ROLES)),
+    db: AsyncSession = Depends(get_db),
+) -> QuizGradeReport:
+    submissions = payload.submissions
+    if len(submissions) > settings.QUIZ_MAX_SUBMISSIONS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {settings.QUIZ_MAX_SUBMISSIONS} submissions per request",
+        )
+    student_ids = [submission.student_id for submission in submissions]
+    if len(set(student_ids)) != len(student_ids):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Duplicate student_id in batch")
+
+    item, quiz, key = await _load_quiz(db, current_user, content_id)
+    with start_span("quiz.grade", students=len(submissions), questions=key.questions):
+        try:
+            matrix = key.encode([submission.answers for submission in submissions])
+        except ValueError as exc:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+        graded = grade(key, matrix)
+
+    now = datetime.utcnow()
+    rows = [
+        {
+            "id": uuid.uuid4(),
+            "content_id": item.id,
+            "organization_id": item.organization_id,
+            "submitted_by_user_id": current_user.id,
+            "student_id": student_id,
+            "choices": choices,
+            "correct": correct,
+            "score": score,
+            "submitted_at": now,
+        }
+        for student_id, choices, correct, score in zip(
+            student_ids, matrix.tolist(), graded.correct.tolist(), graded.scores.tolist()
+        )
+    ]
+    stmt = insert(QuizSubmission)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[QuizSubmission.content_id, QuizSubmission.student_id],
+        set_={
+            "submitted_by_user_id": stmt.excluded.submitted_by_user_id,
+            "choices": stmt.excluded.choices,
+            "correct": stmt.excluded.correct,
+            "score": stmt.excluded.score,
+            "submitted_at": stmt.excluded.submitted_at,
+        },
+    )
+    for start in range(0, len(rows), settings.QUIZ_INSERT_BATCH_SIZE):
+        await db.execute(
+            stmt, rows[start : start + settings.QUIZ_INSERT_BATCH_SIZE], bind_arguments=shard_bind(item.organization_id)
+        )
+    await db.commit()
+    return _report(item, quiz, key, student_ids, graded)
+
+
+@router.get("/{content_id}/results", response_model=QuizGradeReport)
+async def read_results(
+    content_id: str,
+    current_user: User = Depends(require_roles(*GRADER_ROLES)),
+    db: AsyncSession = Depends(get_db),
+) -> QuizGradeReport:
+    item, quiz, key = await _load_quiz(db, current_user, content_id)
+    result = await db.execute(
+        select(QuizSubmission.student_id, QuizSubmission.choices)
+        .where(QuizSubmission.content_id == item.id)
+        .order_by(QuizSubmission.student_id),
+        bind_arguments=shard_bind(item.organization_id),
+    )
+    rows = result.all()
+    if not rows:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No submissions for this quiz")
+    with start_span("quiz.grade", students=len(rows), questions=key.questions):
+        graded = grade(key, key.encode([row.choices for row in rows]))
+    return _report(item, quiz, key, [row.student_id for row in rows], graded)
@@ -1,8 +1,11 @@
+from datetime import datetime
+
 from fastapi import APIRouter, Depends
-from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.deps import get_current_user, get_db
+from app.db.queries import settings_by_user
+from app.db.upsert import insert
 from app.models.user import User
 from app.models.user_settings import UserSettings
 from app.schemas.settings import UserSettingsRead, UserSettingsUpdate
@@ -27,13 +30,17 @@ def _build_response(settings: UserSettings) -> UserSettingsRead:
 
 @router.get("/me", response_model=UserSettingsRead)
 async def read_my_settings(current_user: User = Depends(get_current_user), db: AsyncSession = Depends(get_db)) -> UserSettingsRead:
-    result = await db.execute(select(UserSettings).where(UserSettings.user_id == current_user.id))
+    result = await db.execute(settings_by_user(current_user.id))
     settings = result.scalars().first()
     if settings is None:
-        settings = UserSettings(user_id=current_user.id)
-        db.add(settings)
+        stmt = insert(UserSettings).values(user_id=current_user.id)
+        result = await db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[UserSettings.user_id], set_={"user_id": stmt.excluded.user_id}
+            ).returning(UserSettings)
+        )
+        settings = result.scalar_one()
         await db.commit()
-        await db.refresh(settings)
     return _build_response(settings)
 
 
@@ -43,15 +50,16 @@ async def update_my_settings(
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ) -> UserSettingsRead:
-    result = await db.execute(select(UserSettings).where(UserSettings.user_id == current_user.id))
-    settings = result.scalars().first()
-    if settings is None:
-        settings = UserSettings(user_id=current_user.id)
-        db.add(settings)
-
-    for field, value in payload.dict(exclude_unset=True).items():
-        setattr(settings, field, value)
-
+    changes = payload.dict(exclude_unset=True)
+    stmt = insert(UserSettings).values(user_id=current_user.id, **changes)
+    result = await db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[UserSettings.user_id],
+            set_={**{field: stmt.excluded[field] for field in changes}, "updated_at": datetime.utcnow()},
+        )
+        .returning(UserSettings)
+        .execution_options(populate_existing=True)
+    )
+    settings = result.scalar_one()
     await db.commit()
-    await db.refresh(settings)
     return _build_response(settings)
@@ -1,27 +1,110 @@
-from typing import Optional
+import uuid
+from typing import Optional, Union
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy import func, insert, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.deps import get_current_user, get_db, require_roles
+from app.core.config import get_settings
+from app.core.invalidation import ALL_TOPICS_KEY, publish, topic_cache
+from app.core.topic_index import OrgTopicIndex, topic_index
+from app.db.queries import topic_version_by_org, topics_by_org
+from app.db.sharding import shard_bind
 from app.models.topic import Topic
 from app.models.user import User
-from app.schemas.topic import TopicCreate, TopicRead, TopicListResponse
+from app.schemas.topic import (
+    SimilarTopic,
+    SimilarTopicsResponse,
+    TopicCreate,
+    TopicListResponse,
+    TopicRead,
+)
+from app.utils.http_cache import cache_headers, etag_matches, make_etag, not_modified
 
 router = APIRouter(prefix="/topics", tags=["topics"])
+settings = get_settings()
+
+
+def _org_key(organization_id: Optional[str]) -> str:
+    if not organization_id:
+        return ALL_TOPICS_KEY
+    try:
+        return str(uuid.UUID(organization_id))
+    except ValueError:
+        return organization_id
+
+
+def _parse_org_id(organization_id: Optional[str]) -> Optional[uuid.UUID]:
+    if not organization_id:
+        return None
+    try:
+        return uuid.UUID(organization_id)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid organization_id")
+
+
+def _similar(index: OrgTopicIndex, title: str, description: Optional[str], limit: int, min_score: float = 0.0):
+    matches = []
+    for topic_id, score in index.query(title, description, limit, min_score):
+        match_title, match_description, _ = index.docs[topic_id]
+        matches.append(
+            SimilarTopic(id=str(topic_id), title=match_title, description=match_description, score=round(score, 4))
+        )
+    return matches
 
 
 @router.get("/", response_model=TopicListResponse)
 async def list_topics(
-    organization_id: Optional[str] = Query(None), db: AsyncSession = Depends(get_db)
-) -> TopicListResponse:
+    request: Request,
+    response: Response,
+    organization_id: Optional[str] = Query(None),
+    db: AsyncSession = Depends(get_db),
+) -> Union[TopicListResponse, Response]:
+    cache_key = _org_key(organization_id)
+    cached = topic_cache.get(cache_key)
+    if cached is not None:
+        topic_list, etag, last_modified = cached
+        if etag_matches(request, etag):
+            return not_modified(etag, last_modified)
+        response.headers.update(cache_headers(etag, last_modified))
+        return topic_list
+
+    version_stmt = select(func.max(Topic.updated_at), func.count(Topic.id))
     stmt = select(Topic)
+    bind_arguments = {}
     if organization_id:
-        stmt = stmt.where(Topic.organization_id == organization_id)
-    result = await db.execute(stmt)
+        version_stmt = topic_version_by_org(organization_id)
+        stmt = topics_by_org(organization_id)
+        bind_arguments = shard_bind(organization_id)
+
+    # Unrouted queries fan out to every shard and return one aggregate row per shard.
+    versions = (await db.execute(version_stmt, bind_arguments=bind_arguments)).all()
+    last_modified = max((row[0] for row in versions if row[0] is not None), default=None)
+    count = sum(row[1] for row in versions)
+    etag = make_etag("topics", organization_id or "*", last_modified.isoformat() if last_modified else "", count)
+    if etag_matches(request, etag):
+        return not_modified(etag, last_modified)
+
+    result = await db.execute(stmt, bind_arguments=bind_arguments)
     topics = result.scalars().all()
-    return TopicListResponse(topics=[TopicRead.from_orm(topic) for topic in topics])
+    topic_list = TopicListResponse(topics=[TopicRead.from_orm(topic) for topic in topics])
+    topic_cache.set(cache_key, (topic_list, etag, last_modified))
+    response.headers.update(cache_headers(etag, last_modified))
+    return topic_list
+
+
+@router.get("/similar", response_model=SimilarTopicsResponse)
+async def similar_topics(
+    title: str = Query(..., min_length=1),
+    description: Optional[str] = Query(None),
+    organization_id: Optional[uuid.UUID] = Query(None),
+    limit: int = Query(5, ge=1, le=50),
+    current_user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+) -> SimilarTopicsResponse:
+    index = await topic_index.for_org(db, organization_id or current_user.organization_id)
+    return SimilarTopicsResponse(topics=_similar(index, title, description, limit))
 
 
 @router.post("/", response_model=TopicRead)
@@ -30,16 +113,33 @@ async def create_topic(
     current_user: User = Depends(require_roles("professor", "orgAdmin", "platformAdmin")),
     db: AsyncSession = Depends(get_db),
 ) -> TopicRead:
-    org_id = payload.organization_id or current_user.organization_id
-    topic = Topic(
-        title=payload.title,
-        description=payload.description,
-        organization_id=org_id,
-        created_by_user_id=current_user.id,
+    org_id = _parse_org_id(payload.organization_id) or current_user.organization_id
+    if not payload.allow_duplicate:
+        index = await topic_index.for_org(db, org_id)
+        duplicates = _similar(index, payload.title, payload.description, 5, settings.TOPIC_DUPLICATE_THRESHOLD)
+        if duplicates:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail={
+                    "message": "Similar topics already exist; set allow_duplicate to create it anyway",
+                    "similar": [duplicate.model_dump() for duplicate in duplicates],
+                },
+            )
+    result = await db.execute(
+        insert(Topic)
+        .values(
+            title=payload.title,
+            description=payload.description,
+            organization_id=org_id,
+            created_by_user_id=current_user.id,
+        )
+        .returning(Topic),
+        bind_arguments=shard_bind(org_id),
     )
-    db.add(topic)
+    topic = result.scalar_one()
+    await publish(db, "topic", topic.organization_id)
     await db.commit()
-    await db.refresh(topic)
+    topic_index.add(topic.organization_id, topic.id, topic.title, topic.description)
     return TopicRead.from_orm(topic)
 
 
@@ -56,5 +156,7 @@ async def delete_topic(
     if current_user.role == "orgAdmin" and current_user.organization_id != topic.organization_id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Cannot delete topic outside your org")
     await db.delete(topic)
+    await publish(db, "topic", topic.organization_id)
     await db.commit()
+    topic_index.remove(topic.organization_id, topic.id)
     return None
@@ -0,0 +1,261 @@
+"""AI providers with latency tracking, hedged requests and failover.
+
+A generation goes to the user's primary provider first. If it has not
+answered within the primary's recent ``AI_HEDGE_PERCENTILE`` latency, the
+same request goes to the next configured provider and the first answer wins.
+A provider that fails is replaced by the next one right away. Hedges are
+capped at ``AI_HEDGE_BUDGET_RATIO`` of requests, so a slow provider cannot
+double the traffic to the others.
+
+Providers are stubs that run the local builders, with optional injected
+latency and failures from ``AI_STUB_PROVIDERS``. A real client only has to
+implement ``AIProvider.generate``.
+"""
+
+import asyncio
+import bisect
+import logging
+import random
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.config import get_settings
+from app.core.tracing import current_span, start_span, traced
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+PROVIDER_NAMES = ("default", "openai", "google", "anthropic", "local")
+# Providers usable once the user stores a key for them.
+PROVIDER_KEY_FIELDS = {
+    "openai": "openai_api_key",
+    "google": "google_api_key",
+    "anthropic": "anthropic_api_key",
+    "local": "local_api_key",
+}
+
+
+class ProviderError(Exception):
+    pass
+
+
+class LatencyHistogram:
+    """Log-spaced latency buckets from 5 ms to about 2 minutes.
+
+    Counts are halved every ``window`` observations so percentiles follow the
+    provider's recent behaviour.
+    """
+
+    BOUNDS_MS: List[float] = [5.0 * 1.25**index for index in range(46)]
+
+    def __init__(self, window: int = 1000) -> None:
+        self.window = window
+        self.counts = [0.0] * (len(self.BOUNDS_MS) + 1)
+        self.total = 0.0
+        self._since_decay = 0
+
+    def observe(self, milliseconds: float) -> None:
+        self.counts[bisect.bisect_left(self.BOUNDS_MS, milliseconds)] += 1
+        self.total += 1
+        self._since_decay += 1
+        if self._since_decay >= self.window:
+            self.counts = [count / 2 for count in self.counts]
+            self.total /= 2
+            self._since_decay = 0
+
+    def percentile(self, percent: float) -> Optional[float]:
+        """Upper bound in milliseconds of the bucket holding ``percent``; ``None`` before any sample."""
+
+        if not self.total:
+            return None
+        target = self.total * percent / 100
+        seen = 0.0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= target and count:
+                return self.BOUNDS_MS[min(index, len(self.BOUNDS_MS) - 1)]
+        return self.BOUNDS_MS[-1]
+
+
+class ProviderStats:
+    def __init__(self) -> None:
+        self.latency = LatencyHistogram()
+        self.requests = 0
+        self.errors = 0
+        self.wins = 0
+        self.cancelled = 0
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "wins": self.wins,
+            "cancelled": self.cancelled,
+            "samples": round(self.latency.total, 1),
+            "p50_ms": self.latency.percentile(50),
+            "p95_ms": self.latency.percentile(95),
+            "p99_ms": self.latency.percentile(99),
+        }
+
+
+class AIProvider(ABC):
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+    @abstractmethod
+    async def generate(self, build: Callable[[Any], Any], input: Any, model: str) -> Any:
+        """Output for ``input``; raises ``ProviderError`` (or any exception) when the provider fails."""
+
+
+class StubProvider(AIProvider):
+    """Runs the local builder after ``latency_ms`` plus an exponential tail with mean ``jitter_ms``."""
+
+    def __init__(self, name: str, latency_ms: float = 0.0, jitter_ms: float = 0.0, failure_rate: float = 0.0) -> None:
+        super().__init__(name)
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.failure_rate = failure_rate
+
+    async def generate(self, build: Callable[[Any], Any], input: Any, model: str) -> Any:
+        delay_ms = self.latency_ms + (random.expovariate(1 / self.jitter_ms) if self.jitter_ms > 0 else 0.0)
+        if delay_ms > 0:
+            await asyncio.sleep(delay_ms / 1000)
+        if self.failure_rate and random.random() < self.failure_rate:
+            raise ProviderError(f"{self.name} failed")
+        return await run_in_threadpool(build, input)
+
+
+class ProviderRouter:
+    def __init__(self, providers: Dict[str, AIProvider]) -> None:
+        self.providers = providers
+        self.stats: Dict[str, ProviderStats] = {name: ProviderStats() for name in providers}
+        self.hedges = 0
+        self.secondary_wins = 0
+        self.failovers = 0
+        self._hedge_tokens = 1.0
+
+    def candidates(self, primary: str, configured: Sequence[str]) -> List[str]:
+        """``primary`` first, then the other configured providers fastest first."""
+
+        names = [primary] if primary in self.providers else ["default"]
+        others = [name for name in configured if name in self.providers and name not in names]
+        others.sort(key=lambda name: self.stats[name].latency.percentile(50) or float("inf"))
+        return names + others
+
+    def hedge_delay(self, provider: str) -> Optional[float]:
+        """Seconds to wait on ``provider`` before hedging; ``None`` when hedging is off."""
+
+        if not settings.AI_HEDGING_ENABLED:
+            return None
+        histogram = self.stats[provider].latency
+        if histogram.total < settings.AI_HEDGE_MIN_SAMPLES:
+            delay_ms = settings.AI_HEDGE_DEFAULT_DELAY_MS
+        else:
+            delay_ms = max(histogram.percentile(settings.AI_HEDGE_PERCENTILE), settings.AI_HEDGE_MIN_DELAY_MS)
+        return delay_ms / 1000
+
+    def _take_hedge_token(self) -> bool:
+        if self._hedge_tokens < 1:
+            return False
+        self._hedge_tokens -= 1
+        return True
+
+    async def _attempt(self, name: str, build: Callable[[Any], Any], input: Any, model: str) -> Any:
+        stats = self.stats[name]
+        stats.requests += 1
+        started = time.perf_counter()
+        try:
+            with start_span("ai.provider", provider=name, model=model):
+                output = await self.providers[name].generate(build, input, model)
+        except asyncio.CancelledError:
+            # A censored sample: the attempt would have taken at least this long. Leaving out the
+            # slow attempts that lose a hedge race would pull the hedge percentile ever lower.
+            stats.cancelled += 1
+            stats.latency.observe((time.perf_counter() - started) * 1000)
+            raise
+        except Exception:
+            stats.errors += 1
+            raise
+        stats.latency.observe((time.perf_counter() - started) * 1000)
+        return output
+
+    @traced("ai.generate")
+    async def generate(
+        self, candidates: Sequence[str], build: Callable[[Any], Any], input: Any, model: str
+    ) -> Tuple[str, Any]:
+        """First successful ``(provider, output)`` from ``candidates``; raises ``ProviderError`` if all fail."""
+
+        self._hedge_tokens = min(self._hedge_tokens + settings.AI_HEDGE_BUDGET_RATIO, 10.0)
+        waiting = list(candidates)
+        running: Dict[asyncio.Task, str] = {}
+
+        def launch() -> None:
+            name = waiting.pop(0)
+            running[asyncio.ensure_future(self._attempt(name, build, input, model))] = name
+
+        launch()
+        last_error: Optional[BaseException] = None
+        try:
+            while running:
+                # Only the first attempt is hedged; later ones are failovers.
+                delay = self.hedge_delay(candidates[0]) if waiting and len(running) == 1 and not last_error else None
+                done, _ = await asyncio.wait(running, timeout=delay, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    if self._take_hedge_token():
+                        self.hedges += 1
+                        launch()
+                    else:
+                        await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                    continue
+                for task in done:
+                    name = running.pop(task)
+                    if task.exception() is None:
+                        self.stats[name].wins += 1
+                        if name != candidates[0]:
+                            self.secondary_wins += 1
+                        span = current_span()
+                        if span is not None:
+                            span.set_attribute("ai.provider", name)
+                            span.set_attribute("ai.attempts", len(candidates) - len(waiting))
+                        return name, task.result()
+                    last_error = task.exception()
+                    logger.warning("AI provider '%s' failed: %r", name, last_error)
+                    if waiting:
+                        self.failovers += 1
+                        launch()
+        finally:
+            for task in running:
+                task.cancel()
+        raise ProviderError("All AI providers failed") from last_error
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "hedging_enabled": settings.AI_HEDGING_ENABLED,
+            "hedges": self.hedges,
+            "secondary_wins": self.secondary_wins,
+            "failovers": self.failovers,
+            "providers": {
+                name: {**stats.snapshot(), "hedge_delay_ms": _milliseconds(self.hedge_delay(name))}
+                for name, stats in self.stats.items()
+            },
+        }
+
+
+def _milliseconds(seconds: Optional[float]) -> Optional[float]:
+    return None if seconds is None else round(seconds * 1000, 1)
+
+
+def configured_providers(row: Any) -> List[str]:
+    """Providers ``row`` (a user's settings) holds a key for."""
+
+    if row is None:
+        return []
+    return [name for name, field in PROVIDER_KEY_FIELDS.items() if getattr(row, field, None)]
+
+
+provider_router = ProviderRouter(
+    {name: StubProvider(name, **settings.AI_STUB_PROVIDERS.get(name, {})) for name in PROVIDER_NAMES}
+)
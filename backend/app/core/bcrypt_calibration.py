@@ -0,0 +1,63 @@
+"""Pick a bcrypt cost for this machine.
+
+Usage::
+
+    python -m app.core.bcrypt_calibration [--target-ms 250] [--samples 5]
+
+Times hashing at increasing costs and prints the highest cost whose median
+hash time stays within the target. Set it as ``BCRYPT_ROUNDS``; existing
+passwords are rehashed with the new cost the next time their owners log in.
+"""
+
+import argparse
+import statistics
+import time
+from typing import List, Tuple
+
+from passlib.hash import bcrypt
+
+MIN_ROUNDS = 10
+MAX_ROUNDS = 16
+_SAMPLE_PASSWORD = "calibration-password"
+
+
+def measure(rounds: int, samples: int) -> float:
+    """Median milliseconds to hash one password at ``rounds``."""
+
+    hasher = bcrypt.using(rounds=rounds)
+    timings: List[float] = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        hasher.hash(_SAMPLE_PASSWORD)
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def calibrate(target_ms: float, samples: int) -> Tuple[int, List[Tuple[int, float]]]:
+    results: List[Tuple[int, float]] = []
+    chosen = MIN_ROUNDS
+    for rounds in range(MIN_ROUNDS, MAX_ROUNDS + 1):
+        elapsed = measure(rounds, samples)
+        results.append((rounds, elapsed))
+        if elapsed > target_ms:
+            break
+        chosen = rounds
+    return chosen, results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--target-ms", type=float, default=250.0, help="Latency budget for one hash")
+    parser.add_argument("--samples", type=int, default=5, help="Hashes timed per cost")
+    args = parser.parse_args()
+
+    chosen, results = calibrate(args.target_ms, max(1, args.samples))
+    for rounds, elapsed in results:
+        print(f"rounds={rounds}\t{elapsed:.1f} ms")
+    if results[0][1] > args.target_ms:
+        print(f"Even {MIN_ROUNDS} rounds exceed {args.target_ms:.0f} ms; not recommending a lower cost.")
+    print(f"BCRYPT_ROUNDS={chosen}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+import hashlib
+import json
+import re
+import uuid
+from typing import Any, Optional, Type, TypeVar
+
+from pydantic import BaseModel
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.sharding import shard_bind
+from app.db.upsert import insert
+from app.models.generated_content import GeneratedContent
+from app.models.topic import Topic
+from app.models.user import User
+
+OutputT = TypeVar("OutputT", bound=BaseModel)
+
+# Fields that link an artifact to the library but do not change what gets generated.
+_LINK_FIELDS = {"topic_id"}
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, str):
+        return _WHITESPACE.sub(" ", value).strip().casefold()
+    if isinstance(value, list):
+        return [_normalize(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _normalize(item) for key, item in value.items()}
+    return value
+
+
+def content_hash(kind: str, model: str, user: User, input: BaseModel) -> str:
+    """Library key for ``input``, shared across the user's organization; users without one get their own keys."""
+
+    normalized = _normalize(input.model_dump(exclude=_LINK_FIELDS))
+    owner = str(user.organization_id) if user.organization_id else f"user:{user.id}"
+    key = json.dumps(
+        {"kind": kind, "model": model, "org": owner, "input": normalized},
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+def _title(output: BaseModel) -> str:
+    for attr in ("title", "topic", "assignment_type"):
+        value = getattr(output, attr, None)
+        if value:
+            return str(value)[:255]
+    return "Untitled"
+
+
+class TopicNotFound(Exception):
+    pass
+
+
+async def resolve_topic_id(db: AsyncSession, user: User, input: BaseModel) -> Optional[uuid.UUID]:
+    """The ``topic_id`` of ``input`` once it is known to be a topic of the user's organization.
+
+    Raises ``TopicNotFound`` for a malformed id, an unknown topic or another organization's topic.
+    """
+
+    value = getattr(input, "topic_id", None)
+    if not value:
+        return None
+    try:
+        topic_id = uuid.UUID(value)
+    except ValueError:
+        raise TopicNotFound(value)
+    owner = Topic.organization_id == user.organization_id if user.organization_id else Topic.organization_id.is_(None)
+    result = await db.execute(
+        select(Topic.id).where(Topic.id == topic_id, owner), bind_arguments=shard_bind(user.organization_id)
+    )
+    if result.scalar_one_or_none() is None:
+        raise TopicNotFound(value)
+    return topic_id
+
+
+async def find_content(
+    db: AsyncSession, user: User, digest: str, output_type: Type[OutputT]
+) -> Optional[OutputT]:
+    result = await db.execute(
+        select(GeneratedContent.content).where(GeneratedContent.content_hash == digest, visible_to(user)),
+        bind_arguments=shard_bind(user.organization_id),
+    )
+    content = result.scalar_one_or_none()
+    return output_type.model_validate(content) if content is not None else None
+
+
+async def store_content(
+    db: AsyncSession,
+    user: User,
+    kind: str,
+    model: str,
+    digest: str,
+    input: BaseModel,
+    output: BaseModel,
+    topic_id: Optional[uuid.UUID] = None,
+) -> None:
+    await db.execute(
+        insert(GeneratedContent)
+        .values(
+            organization_id=user.organization_id,
+            topic_id=topic_id,
+            created_by_user_id=user.id,
+            kind=kind,
+            model=model,
+            content_hash=digest,
+            title=_title(output),
+            input=input.model_dump(mode="json"),
+            content=output.model_dump(mode="json"),
+        )
+        .on_conflict_do_nothing(index_elements=[GeneratedContent.content_hash]),
+        bind_arguments=shard_bind(user.organization_id),
+    )
+    await db.commit()
+
+
+def visible_to(user: User):
+    """Filter for the library items ``user`` may read: their organization's, or their own when they have none."""
+
+    if user.organization_id:
+        return GeneratedContent.organization_id == user.organization_id
+    return (GeneratedContent.organization_id.is_(None)) & (GeneratedContent.created_by_user_id == user.id)
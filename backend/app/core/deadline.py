@@ -0,0 +1,72 @@
+import asyncio
+import time
+from contextvars import Context, ContextVar, Token
+from typing import Any, Coroutine, Mapping, Optional
+
+from app.core.config import get_settings
+
+settings = get_settings()
+
+TIMEOUT_HEADER = "x-request-timeout"
+
+_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+
+class DeadlineExceeded(Exception):
+    pass
+
+
+def request_budget(path: str, headers: Mapping[str, str]) -> Optional[float]:
+    """Seconds the request may run: the route's configured budget, shortened by the client header.
+
+    ``None`` means no deadline.
+    """
+
+    budget = settings.REQUEST_TIMEOUT_SECONDS
+    matched = ""
+    for prefix, seconds in settings.REQUEST_TIMEOUT_OVERRIDES.items():
+        if path.startswith(prefix) and len(prefix) > len(matched):
+            matched, budget = prefix, seconds
+    limit = budget if budget > 0 else None
+
+    try:
+        requested = float(headers.get(TIMEOUT_HEADER, ""))
+    except ValueError:
+        requested = 0
+    if requested > 0 and (limit is None or requested < limit):
+        limit = requested
+    return limit
+
+
+def start(seconds: Optional[float]) -> Token:
+    return _deadline.set(time.monotonic() + seconds if seconds is not None else None)
+
+
+def reset(token: Token) -> None:
+    _deadline.reset(token)
+
+
+def remaining() -> Optional[float]:
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def timeout(limit: Optional[float] = None) -> Optional[float]:
+    """Seconds left for an operation capped at ``limit``; raises once the deadline has passed."""
+
+    left = remaining()
+    if left is not None and left <= 0:
+        raise DeadlineExceeded()
+    if left is None:
+        return limit
+    return left if limit is None else min(left, limit)
+
+
+def detach(coro: Coroutine[Any, Any, Any]) -> "asyncio.Task[Any]":
+    """Start ``coro`` as a task that outlives the current request.
+
+    Tasks copy the caller's context, so work started during a request would
+    otherwise run under that request's deadline and ``statement_timeout``.
+    """
+
+    return asyncio.get_running_loop().create_task(coro, context=Context())
@@ -0,0 +1,195 @@
+"""Stored responses for ``Idempotency-Key`` retries.
+
+The first request with a key inserts a ``pending`` row, which works as a
+lock held until ``locked_until``. Its response is then stored for
+``IDEMPOTENCY_TTL_SECONDS``. A retry with the same key and the same request
+gets the stored response. A retry while the first request is still running
+waits for it. If the first request's worker died, the retry takes over once
+the lock expires.
+"""
+
+import asyncio
+import hashlib
+import logging
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, delete, or_, select, update
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.core.config import get_settings
+from app.db.session import AsyncSessionLocal
+from app.db.upsert import insert as upsert_insert
+from app.models.idempotency_key import IdempotencyKey
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+ACQUIRED = "acquired"
+COMPLETED = "completed"
+IN_PROGRESS = "in_progress"
+MISMATCH = "mismatch"
+
+_POLL_SECONDS = (0.05, 0.1, 0.25, 0.5)
+
+
+def request_fingerprint(method: str, path: str, query_string: bytes, body: bytes) -> str:
+    digest = hashlib.sha256()
+    for part in (method.upper().encode("ascii"), path.encode("utf-8"), query_string, body):
+        digest.update(len(part).to_bytes(8, "big"))
+        digest.update(part)
+    return digest.hexdigest()
+
+
+class IdempotencyStore:
+    def __init__(
+        self,
+        session_factory: async_sessionmaker,
+        ttl_seconds: int = settings.IDEMPOTENCY_TTL_SECONDS,
+    ) -> None:
+        self.session_factory = session_factory
+        self.ttl_seconds = ttl_seconds
+        # Wakes requests on this worker that wait for a key this worker is running.
+        self._events: Dict[Tuple[uuid.UUID, str], asyncio.Event] = {}
+
+    async def begin(
+        self, user_id: uuid.UUID, key: str, fingerprint: str, lock_seconds: float
+    ) -> Tuple[str, Optional[IdempotencyKey]]:
+        """Claim ``key`` for this request, or report why it cannot run.
+
+        Returns ``ACQUIRED``, ``COMPLETED`` with the stored row, ``IN_PROGRESS``
+        or ``MISMATCH`` (the key was used for a different request).
+        """
+
+        now = datetime.utcnow()
+        claim = {
+            "fingerprint": fingerprint,
+            "status": "pending",
+            "locked_until": now + timedelta(seconds=lock_seconds),
+            "response_status": None,
+            "response_headers": None,
+            "response_body": None,
+            "created_at": now,
+            "expires_at": now + timedelta(seconds=self.ttl_seconds),
+        }
+        async with self.session_factory() as session:
+            inserted = await session.execute(
+                upsert_insert(IdempotencyKey)
+                .values(user_id=user_id, key=key, **claim)
+                .on_conflict_do_nothing(index_elements=[IdempotencyKey.user_id, IdempotencyKey.key])
+                .returning(IdempotencyKey.key)
+            )
+            acquired = inserted.first() is not None
+            if not acquired:
+                # Take over rows that expired or whose owner stopped before finishing.
+                taken = await session.execute(
+                    update(IdempotencyKey)
+                    .where(
+                        IdempotencyKey.user_id == user_id,
+                        IdempotencyKey.key == key,
+                        or_(
+                            IdempotencyKey.expires_at < now,
+                            and_(IdempotencyKey.status == "pending", IdempotencyKey.locked_until < now),
+                        ),
+                    )
+                    .values(**claim)
+                    .returning(IdempotencyKey.key)
+                )
+                acquired = taken.first() is not None
+            await session.commit()
+            if acquired:
+                self._events[(user_id, key)] = asyncio.Event()
+                return ACQUIRED, None
+
+            record = await session.scalar(
+                select(IdempotencyKey).where(IdempotencyKey.user_id == user_id, IdempotencyKey.key == key)
+            )
+        if record is None:
+            # Deleted between the insert and the read; the next attempt will claim it.
+            return IN_PROGRESS, None
+        if record.fingerprint != fingerprint:
+            return MISMATCH, record
+        if record.status == "completed":
+            return COMPLETED, record
+        return IN_PROGRESS, record
+
+    async def wait(self, user_id: uuid.UUID, key: str, attempt: int) -> None:
+        """Sleep until the key's owner on this worker finishes, or for the next poll interval."""
+
+        poll = _POLL_SECONDS[min(attempt, len(_POLL_SECONDS) - 1)]
+        event = self._events.get((user_id, key))
+        if event is None:
+            await asyncio.sleep(poll)
+            return
+        try:
+            await asyncio.wait_for(event.wait(), poll)
+        except asyncio.TimeoutError:
+            pass
+
+    async def complete(
+        self, user_id: uuid.UUID, key: str, status_code: int, headers: List[List[str]], body: bytes
+    ) -> None:
+        now = datetime.utcnow()
+        try:
+            async with self.session_factory() as session:
+                await session.execute(
+                    update(IdempotencyKey)
+                    .where(IdempotencyKey.user_id == user_id, IdempotencyKey.key == key)
+                    .values(
+                        status="completed",
+                        response_status=status_code,
+                        response_headers=headers,
+                        response_body=body,
+                        locked_until=now,
+                        expires_at=now + timedelta(seconds=self.ttl_seconds),
+                    )
+                )
+                await session.commit()
+        finally:
+            self._wake(user_id, key)
+
+    async def release(self, user_id: uuid.UUID, key: str) -> None:
+        """Drop a pending claim so the next retry runs the request again."""
+
+        try:
+            async with self.session_factory() as session:
+                await session.execute(
+                    delete(IdempotencyKey).where(
+                        IdempotencyKey.user_id == user_id,
+                        IdempotencyKey.key == key,
+                        IdempotencyKey.status == "pending",
+                    )
+                )
+                await session.commit()
+        finally:
+            self._wake(user_id, key)
+
+    def _wake(self, user_id: uuid.UUID, key: str) -> None:
+        event = self._events.pop((user_id, key), None)
+        if event is not None:
+            event.set()
+
+    async def purge(self) -> int:
+        async with self.session_factory() as session:
+            result = await session.execute(
+                delete(IdempotencyKey).where(IdempotencyKey.expires_at < datetime.utcnow())
+            )
+            await session.commit()
+        return result.rowcount or 0
+
+
+idempotency_store = IdempotencyStore(AsyncSessionLocal)
+
+
+async def run_purge_loop(store: IdempotencyStore, interval_seconds: float) -> None:
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            purged = await store.purge()
+            if purged:
+                logger.info("Purged %d expired idempotency keys", purged)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Failed to purge expired idempotency keys")
@@ -0,0 +1,148 @@
+import asyncio
+import json
+import logging
+import os
+import uuid
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import deadline
+from app.core.cache import TTLCache
+from app.core.config import get_settings
+from app.db.session import engine
+from app.db.sharding import directory_bind, sharding_enabled
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+user_cache = TTLCache(settings.CACHE_TTL_SECONDS)
+organization_cache = TTLCache(settings.CACHE_TTL_SECONDS)
+allowed_domain_cache = TTLCache(settings.CACHE_TTL_SECONDS)
+topic_cache = TTLCache(settings.CACHE_TTL_SECONDS)
+
+_CACHES: Dict[str, TTLCache] = {
+    "user": user_cache,
+    "organization": organization_cache,
+    "allowed_domain": allowed_domain_cache,
+    "topic": topic_cache,
+}
+# Topic lists are cached per organization plus one unfiltered list.
+ALL_TOPICS_KEY = "*"
+
+# Identifies this worker's own events so subscribers do not rebuild state this worker already updated.
+# The pid keeps workers forked from a preloaded app apart.
+_PROCESS_GROUP = uuid.uuid4().hex
+_subscribers: Dict[str, List[Callable[[Optional[str]], None]]] = {}
+_pending_notifications: Set[asyncio.Task] = set()
+
+
+def worker_id() -> str:
+    return f"{_PROCESS_GROUP}:{os.getpid()}"
+
+
+def subscribe(entity: str, callback: Callable[[Optional[str]], None]) -> None:
+    """Call ``callback(key)`` when another worker changes ``entity``.
+
+    ``key`` is ``None`` when events may have been missed and everything should be reloaded.
+    """
+
+    _subscribers.setdefault(entity, []).append(callback)
+
+
+def _notify_subscribers(entity: str, key: Optional[str]) -> None:
+    for callback in _subscribers.get(entity, []):
+        try:
+            callback(key)
+        except Exception:
+            logger.exception("Invalidation subscriber for %s failed", entity)
+
+
+def notify_supported() -> bool:
+    return engine.dialect.name == "postgresql"
+
+
+def evict(entity: str, key: Any) -> None:
+    cache = _CACHES.get(entity)
+    if cache is None:
+        return
+    cache.pop(str(key))
+    if entity == "topic":
+        cache.pop(ALL_TOPICS_KEY)
+
+
+def clear_all() -> None:
+    for cache in _CACHES.values():
+        cache.clear()
+    for entity in _subscribers:
+        _notify_subscribers(entity, None)
+
+
+async def publish(db: AsyncSession, entity: str, key: Any) -> None:
+    """Evict ``entity``/``key`` here and in every other worker once ``db`` commits."""
+
+    # Evicting before the commit would let a concurrent request reload the old row into the cache.
+    event.listen(db.sync_session, "after_commit", lambda _session: evict(entity, key), once=True)
+    if not notify_supported():
+        return
+    payload = json.dumps({"entity": entity, "id": str(key), "origin": worker_id()})
+    if sharding_enabled():
+        # The write may commit on another shard than the directory the listeners use, so a NOTIFY in the
+        # directory transaction could arrive before the write is visible, or outlive its rollback.
+        event.listen(db.sync_session, "after_commit", lambda _session: _notify_later(payload), once=True)
+        return
+    await db.execute(
+        select(func.pg_notify(settings.INVALIDATION_CHANNEL, payload)), bind_arguments=directory_bind()
+    )
+
+
+def _notify_later(payload: str) -> None:
+    task = deadline.detach(_notify(payload))
+    _pending_notifications.add(task)
+    task.add_done_callback(_pending_notifications.discard)
+
+
+async def _notify(payload: str) -> None:
+    try:
+        async with engine.connect() as connection:
+            await connection.execute(select(func.pg_notify(settings.INVALIDATION_CHANNEL, payload)))
+            await connection.commit()
+    except Exception:
+        logger.exception("Failed to publish cache invalidation; other workers rely on the cache TTL")
+
+
+def _on_notification(connection: Any, pid: int, channel: str, payload: str) -> None:
+    try:
+        event = json.loads(payload)
+        evict(event["entity"], event["id"])
+        # Subscribers already updated this worker's own state; only the cache eviction is repeated.
+        if event.get("origin") != worker_id():
+            _notify_subscribers(event["entity"], event["id"])
+    except (ValueError, KeyError, TypeError, AttributeError):
+        logger.warning("Ignoring malformed invalidation event: %r", payload)
+
+
+async def run_listener(dsn: str, connect_args: dict, retry_seconds: float = 5.0) -> None:
+    """Hold one LISTEN connection per worker; cache TTLs cover any gap while it reconnects."""
+
+    import asyncpg
+
+    while True:
+        connection = None
+        try:
+            connection = await asyncpg.connect(dsn, **connect_args)
+            closed = asyncio.Event()
+            connection.add_termination_listener(lambda _conn: closed.set())
+            await connection.add_listener(settings.INVALIDATION_CHANNEL, _on_notification)
+            # Events may have been missed while disconnected.
+            clear_all()
+            await closed.wait()
+            logger.warning("Cache invalidation listener disconnected")
+        except asyncio.CancelledError:
+            if connection is not None and not connection.is_closed():
+                await connection.close()
+            raise
+        except Exception:
+            logger.exception("Cache invalidation listener failed")
+        await asyncio.sleep(retry_seconds)
@@ -0,0 +1,77 @@
+import time
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+
+from app.core.config import get_settings
+
+settings = get_settings()
+
+# Fraction of the configured limits at which each priority starts being shed,
+# so AI generation goes first and cheap reads and auth last.
+PRIORITY_HEADROOM: Dict[str, float] = {"low": 0.5, "normal": 0.8, "high": 1.0}
+_LOW_PRIORITY_PREFIXES = ("/ai/", "/admin/export/")
+_EXEMPT_PATHS = {"/health", "/ready"}
+
+
+def request_priority(method: str, path: str) -> Optional[str]:
+    """Shedding priority of a request, or ``None`` when it is never shed."""
+
+    if path in _EXEMPT_PATHS:
+        return None
+    if path.startswith(_LOW_PRIORITY_PREFIXES):
+        return "low"
+    if path.startswith("/auth/") or method in ("GET", "HEAD", "OPTIONS"):
+        return "high"
+    return "normal"
+
+
+class LoadMonitor:
+    """Per-worker view of in-flight requests and recent connection pool waits."""
+
+    def __init__(
+        self,
+        max_in_flight: int = settings.LOAD_SHED_MAX_IN_FLIGHT,
+        max_pool_wait_ms: float = settings.LOAD_SHED_POOL_WAIT_MS,
+        window_seconds: float = settings.LOAD_SHED_WINDOW_SECONDS,
+    ) -> None:
+        self.max_in_flight = max_in_flight
+        self.max_pool_wait_ms = max_pool_wait_ms
+        self.window_seconds = window_seconds
+        self.in_flight = 0
+        self.shed_total: Dict[str, int] = {priority: 0 for priority in PRIORITY_HEADROOM}
+        self._pool_waits: Deque[Tuple[float, float]] = deque(maxlen=1024)
+
+    def record_pool_wait(self, seconds: float) -> None:
+        self._pool_waits.append((time.monotonic(), seconds * 1000))
+
+    def pool_wait_ms(self) -> float:
+        """Mean pool checkout time over the window; 0 when nothing was checked out."""
+
+        cutoff = time.monotonic() - self.window_seconds
+        while self._pool_waits and self._pool_waits[0][0] < cutoff:
+            self._pool_waits.popleft()
+        if not self._pool_waits:
+            return 0.0
+        return sum(wait for _, wait in self._pool_waits) / len(self._pool_waits)
+
+    def overloaded(self, priority: str) -> bool:
+        headroom = PRIORITY_HEADROOM[priority]
+        if self.in_flight >= self.max_in_flight * headroom:
+            return True
+        return self.pool_wait_ms() >= self.max_pool_wait_ms * headroom
+
+    def should_shed(self, priority: str) -> bool:
+        if not settings.LOAD_SHED_ENABLED or not self.overloaded(priority):
+            return False
+        self.shed_total[priority] += 1
+        return True
+
+    def snapshot(self) -> dict:
+        return {
+            "in_flight": self.in_flight,
+            "pool_wait_ms": round(self.pool_wait_ms(), 1),
+            "shed_total": dict(self.shed_total),
+        }
+
+
+load_monitor = LoadMonitor()
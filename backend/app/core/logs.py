@@ -0,0 +1,151 @@
+"""Queue-based logging.
+
+Loggers only put records on a bounded queue. A ``QueueListener`` thread
+formats them, as JSON by default, and writes them to stdout, so neither
+formatting nor I/O runs on the event loop. When the queue is full, records
+are dropped and counted rather than blocking a request. Each record carries
+the current request ID.
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import sys
+import traceback
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+from app.core.config import get_settings
+
+settings = get_settings()
+
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+# Attributes every LogRecord has; anything else was passed through ``extra=`` and is emitted as a field.
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "request_id"}
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry: dict = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        request_id = getattr(record, "request_id", None)
+        if request_id:
+            entry["request_id"] = request_id
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        if record.stack_info:
+            entry["stack"] = record.stack_info
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self) -> None:
+        super().__init__("%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        if not hasattr(record, "request_id"):
+            record.request_id = "-"
+        return super().format(record)
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """Enqueues records without formatting them and drops them when the queue is full."""
+
+    def __init__(self, log_queue: "queue.Queue[logging.LogRecord]") -> None:
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Resolve what depends on the caller's state now; the listener thread does the formatting.
+        record = logging.makeLogRecord(vars(record))
+        record.request_id = request_id_var.get()
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = "".join(traceback.format_exception(*record.exc_info)).rstrip()
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_handler: Optional[NonBlockingQueueHandler] = None
+_listener: Optional[QueueListener] = None
+_configured = False
+
+
+def _output_handler() -> logging.Handler:
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(JsonFormatter() if settings.LOG_FORMAT == "json" else TextFormatter())
+    return handler
+
+
+def _start() -> None:
+    """Install a fresh queue, handler and listener thread on the root logger."""
+
+    global _handler, _listener
+    root = logging.getLogger()
+    if _handler is not None:
+        root.removeHandler(_handler)
+    _handler = NonBlockingQueueHandler(queue.Queue(maxsize=settings.LOG_QUEUE_SIZE))
+    root.addHandler(_handler)
+    _listener = QueueListener(_handler.queue, _output_handler(), respect_handler_level=False)
+    _listener.start()
+
+
+def stop_logging() -> None:
+    """Flush queued records and stop the listener thread."""
+
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def route_server_loggers() -> None:
+    """Send uvicorn's and gunicorn's loggers through the queue; the request middleware writes access logs.
+
+    Gunicorn workers install their own handlers when they are built, after a
+    preloaded app has configured logging, so the worker calls this again.
+    """
+
+    for name in ("uvicorn", "uvicorn.error", "gunicorn.error"):
+        logging.getLogger(name).handlers = []
+        logging.getLogger(name).propagate = True
+    logging.getLogger("uvicorn.access").disabled = True
+
+
+def configure_logging() -> None:
+    global _configured
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.setLevel(settings.LOG_LEVEL)
+    route_server_loggers()
+    # SQL echo goes through the queue rather than the engine's own synchronous stream handler.
+    logging.getLogger("sqlalchemy.engine").setLevel(logging.INFO if settings.DATABASE_ECHO else logging.WARNING)
+
+    stop_logging()
+    _start()
+    if not _configured:
+        # A listener thread does not survive fork; workers forked from a preloaded master start their own.
+        os.register_at_fork(after_in_child=_start)
+        atexit.register(stop_logging)
+        _configured = True
+
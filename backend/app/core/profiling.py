@@ -0,0 +1,248 @@
+"""Single-request profiling.
+
+A request carrying ``X-Profile: trace`` (cProfile call tree) or
+``X-Profile: sample`` (stack samples in collapsed flame-graph format) runs
+under the chosen profiler when the caller is a platform admin or signs the
+request with ``PROFILING_SECRET``. SQL statements are timed through engine
+events that return immediately unless the current request is being profiled.
+
+The profilers see the whole event-loop thread, so other requests running at
+the same time show up in the output; profile when the worker is quiet.
+"""
+
+import cProfile
+import hashlib
+import hmac
+import io
+import json
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import get_settings
+from app.core.revocation import revocation_registry
+from app.core.security import decode_token
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+PROFILE_MODES = ("trace", "sample")
+SIGNATURE_MAX_AGE_SECONDS = 300
+_MAX_STATEMENTS = 20
+
+_current: ContextVar[Optional["RequestProfile"]] = ContextVar("request_profile", default=None)
+# Only one deterministic profiler can be attached to the event-loop thread at a time.
+_profiler_lock = threading.Lock()
+
+
+def request_signature(timestamp: str, method: str, path: str) -> str:
+    message = f"{timestamp}:{method.upper()}:{path}".encode("utf-8")
+    return hmac.new((settings.PROFILING_SECRET or "").encode("utf-8"), message, hashlib.sha256).hexdigest()
+
+
+def is_authorized(method: str, path: str, headers: Any) -> bool:
+    """True for a valid ``X-Profile-Signature: <unix ts>.<hmac>`` or a platform admin bearer token."""
+
+    signature = headers.get("x-profile-signature")
+    if signature and settings.PROFILING_SECRET:
+        timestamp, _, digest = signature.partition(".")
+        try:
+            fresh = abs(time.time() - int(timestamp)) <= SIGNATURE_MAX_AGE_SECONDS
+        except ValueError:
+            fresh = False
+        if fresh and hmac.compare_digest(digest, request_signature(timestamp, method, path)):
+            return True
+
+    scheme, _, token = headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return False
+    try:
+        payload = decode_token(token)
+    except ValueError:
+        return False
+    return payload.role == "platformAdmin" and not revocation_registry.is_family_revoked(payload.sid)
+
+
+@dataclass
+class RequestProfile:
+    method: str
+    path: str
+    mode: str
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    created_at: datetime = field(default_factory=datetime.utcnow)
+    status_code: Optional[int] = None
+    wall_ms: float = 0.0
+    cpu_ms: float = 0.0
+    db_ms: float = 0.0
+    db_statements: int = 0
+    statements: List[Dict[str, Any]] = field(default_factory=list)
+    call_tree: Optional[str] = None
+    folded_stacks: Optional[str] = None
+
+    def record_statement(self, statement: str, seconds: float) -> None:
+        elapsed_ms = seconds * 1000
+        self.db_ms += elapsed_ms
+        self.db_statements += 1
+        self.statements.append({"sql": statement[:500], "ms": round(elapsed_ms, 3)})
+        if len(self.statements) > _MAX_STATEMENTS * 2:
+            self._trim_statements()
+
+    def _trim_statements(self) -> None:
+        self.statements = sorted(self.statements, key=lambda item: item["ms"], reverse=True)[:_MAX_STATEMENTS]
+
+    def server_timing(self) -> str:
+        return f"total;dur={self.wall_ms:.1f}, db;dur={self.db_ms:.1f}, cpu;dur={self.cpu_ms:.1f}"
+
+    def summary(self) -> Dict[str, Any]:
+        data = asdict(self)
+        for key in ("statements", "call_tree", "folded_stacks"):
+            data.pop(key)
+        return data
+
+
+class _StackSampler(threading.Thread):
+    """Samples every thread's Python stack at a fixed interval into collapsed-stack counts.
+
+    Stacks are rooted at the thread name so work handed to the thread pool is
+    not lost; the event loop shows up under ``MainThread`` (or the server's loop thread).
+    """
+
+    def __init__(self, interval: float) -> None:
+        super().__init__(daemon=True, name="request-profiler")
+        self.interval = interval
+        self.counts: Counter = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        while not self._stop_event.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == self.ident:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                self.counts[";".join(reversed(stack))] += 1
+
+    def stop(self) -> str:
+        self._stop_event.set()
+        self.join()
+        return "\n".join(f"{stack} {count}" for stack, count in self.counts.most_common())
+
+
+class ProfileSession:
+    """Runs the profiler for one request; use as ``start()`` ... ``finish()``."""
+
+    def __init__(self, profile: RequestProfile) -> None:
+        self.profile = profile
+        self._token = None
+        self._profiler: Optional[cProfile.Profile] = None
+        self._sampler: Optional[_StackSampler] = None
+        self._started = 0.0
+        self._cpu_started = 0.0
+
+    def start(self) -> bool:
+        if self.profile.mode == "trace":
+            if not _profiler_lock.acquire(blocking=False):
+                return False
+            self._profiler = cProfile.Profile()
+        else:
+            self._sampler = _StackSampler(settings.PROFILE_SAMPLE_INTERVAL_MS / 1000)
+        if self._profiler is not None:
+            try:
+                self._profiler.enable()
+            except ValueError:
+                # Another profiling tool already owns the interpreter hooks.
+                _profiler_lock.release()
+                return False
+        self._token = _current.set(self.profile)
+        self._started = time.perf_counter()
+        self._cpu_started = time.thread_time()
+        if self._sampler is not None:
+            self._sampler.start()
+        return True
+
+    def checkpoint(self) -> None:
+        self.profile.wall_ms = (time.perf_counter() - self._started) * 1000
+        self.profile.cpu_ms = (time.thread_time() - self._cpu_started) * 1000
+
+    def finish(self) -> RequestProfile:
+        if self._profiler is not None:
+            self._profiler.disable()
+            _profiler_lock.release()
+        self.checkpoint()
+        _current.reset(self._token)
+        if self._profiler is not None:
+            output = io.StringIO()
+            stats = pstats.Stats(self._profiler, stream=output)
+            stats.sort_stats("cumulative").print_stats(settings.PROFILE_TOP_FUNCTIONS)
+            self.profile.call_tree = output.getvalue()
+        if self._sampler is not None:
+            self.profile.folded_stacks = self._sampler.stop()
+        self.profile._trim_statements()
+        return self.profile
+
+
+class ProfileStore:
+    """Keeps recent profiles in memory and, when ``PROFILE_DIR`` is set, on disk for every worker to read."""
+
+    def __init__(self, max_entries: int = settings.PROFILE_STORE_SIZE, directory: Optional[str] = settings.PROFILE_DIR):
+        self.directory = directory
+        self._profiles: Deque[RequestProfile] = deque(maxlen=max_entries)
+
+    def add(self, profile: RequestProfile) -> None:
+        self._profiles.append(profile)
+        if not self.directory:
+            return
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(os.path.join(self.directory, f"{profile.id}.json"), "w", encoding="utf-8") as handle:
+                json.dump(asdict(profile), handle, default=str)
+        except OSError:
+            logger.exception("Could not write profile %s", profile.id)
+
+    def list(self) -> List[Dict[str, Any]]:
+        return [profile.summary() for profile in reversed(self._profiles)]
+
+    def get(self, profile_id: str) -> Optional[Dict[str, Any]]:
+        for profile in self._profiles:
+            if profile.id == profile_id:
+                return asdict(profile)
+        if self.directory and profile_id.isalnum():
+            path = os.path.join(self.directory, f"{profile_id}.json")
+            if os.path.exists(path):
+                with open(path, encoding="utf-8") as handle:
+                    return json.load(handle)
+        return None
+
+
+profile_store = ProfileStore()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    if _current.get() is not None:
+        context._profile_started = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    profile = _current.get()
+    started = getattr(context, "_profile_started", None)
+    if profile is not None and started is not None:
+        profile.record_statement(statement, time.perf_counter() - started)
@@ -0,0 +1,73 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.models.refresh_token import RefreshToken
+
+logger = logging.getLogger(__name__)
+
+
+class RevocationRegistry:
+    """In-process view of revoked refresh tokens and sessions.
+
+    Lookups are plain dict membership checks; the database is only consulted by
+    the periodic ``sync`` so request handlers never wait on it.
+    """
+
+    def __init__(self) -> None:
+        self._tokens: Dict[str, datetime] = {}
+        self._families: Dict[str, datetime] = {}
+        self._synced_until: Optional[datetime] = None
+
+    def is_token_revoked(self, jti: Optional[str]) -> bool:
+        return bool(jti) and jti in self._tokens
+
+    def is_family_revoked(self, family_id: Optional[str]) -> bool:
+        return bool(family_id) and family_id in self._families
+
+    def revoke_token(self, jti: str, expires_at: datetime) -> None:
+        self._tokens[str(jti)] = expires_at
+
+    def revoke_family(self, family_id: str, expires_at: datetime) -> None:
+        current = self._families.get(str(family_id))
+        if current is None or current < expires_at:
+            self._families[str(family_id)] = expires_at
+
+    def _load(self, rows: Iterable[RefreshToken]) -> None:
+        for row in rows:
+            self.revoke_token(str(row.id), row.expires_at)
+            if row.replaced_by_id is None:
+                self.revoke_family(str(row.family_id), row.expires_at)
+
+    def _prune(self, now: datetime) -> None:
+        self._tokens = {jti: exp for jti, exp in self._tokens.items() if exp > now}
+        self._families = {fid: exp for fid, exp in self._families.items() if exp > now}
+
+    async def sync(self, session: AsyncSession, overlap_seconds: int = 5) -> None:
+        now = datetime.utcnow()
+        stmt = select(RefreshToken).where(RefreshToken.revoked_at.is_not(None), RefreshToken.expires_at > now)
+        if self._synced_until is not None:
+            stmt = stmt.where(RefreshToken.revoked_at >= self._synced_until - timedelta(seconds=overlap_seconds))
+        result = await session.execute(stmt)
+        self._load(result.scalars().all())
+        self._prune(now)
+        self._synced_until = now
+
+
+revocation_registry = RevocationRegistry()
+
+
+async def run_sync_loop(session_factory: async_sessionmaker, interval_seconds: float) -> None:
+    while True:
+        try:
+            async with session_factory() as session:
+                await revocation_registry.sync(session)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Failed to sync refresh token revocations")
+        await asyncio.sleep(interval_seconds)
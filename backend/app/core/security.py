@@ -1,24 +1,42 @@
 import datetime as dt
-from typing import Any, Dict
+from typing import Any, Dict, Optional, Tuple
 
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 
 from app.core.config import get_settings
+from app.core.tracing import traced
 from app.schemas.auth import TokenPayload
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 settings = get_settings()
-
-
+# Pinning min and max to the configured cost makes needs_update() flag hashes
+# made with any other cost, so login can rehash them.
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.BCRYPT_ROUNDS,
+)
+
+
+@traced("auth.hash_password")
 def hash_password(plain_password: str) -> str:
     return pwd_context.hash(plain_password)
 
 
+@traced("auth.verify_password")
 def verify_password(plain_password: str, password_hash: str) -> bool:
     return pwd_context.verify(plain_password, password_hash)
 
 
+@traced("auth.verify_password")
+def verify_and_update(plain_password: str, password_hash: str) -> Tuple[bool, Optional[str]]:
+    """Verify a password and return a replacement hash when its cost differs from ``BCRYPT_ROUNDS``."""
+
+    return pwd_context.verify_and_update(plain_password, password_hash)
+
+
 def _create_token(data: Dict[str, Any], expires_delta: dt.timedelta, secret: str) -> str:
     to_encode = data.copy()
     expire = dt.datetime.utcnow() + expires_delta
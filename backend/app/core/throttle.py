@@ -0,0 +1,242 @@
+"""Sliding-window throttling for ``/auth/login`` and ``/auth/register``.
+
+Failed logins and every registration count against the client IP;
+successful logins do not, so a class signing in together from one NAT
+address is not blocked. Failed logins also count against the email
+address. A key over its limit is blocked for
+``AUTH_BACKOFF_BASE_SECONDS``, and the block doubles with each repeat
+offence up to ``AUTH_BACKOFF_MAX_SECONDS``. Blocked attempts are refused
+before the user lookup and before bcrypt runs.
+
+Windows use the sliding-window counter approximation: the previous fixed
+window's count, weighted by how much of it still overlaps the sliding
+window, plus the current window's count. Keeping only two counters per key
+lets the same state live in process memory (default) or in the
+``auth_throttle`` table, where every worker shares it.
+"""
+
+import logging
+import math
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Tuple, TypeVar
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.core.config import get_settings
+from app.db.session import AsyncSessionLocal
+from app.db.upsert import insert as upsert_insert
+from app.models.auth_throttle import AuthThrottle
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+ResultT = TypeVar("ResultT")
+
+
+@dataclass
+class ThrottleState:
+    window_started_at: float = 0.0
+    current_count: int = 0
+    previous_count: int = 0
+    strikes: int = 0
+    last_strike_at: float = 0.0
+    blocked_until: float = 0.0
+    updated_at: float = 0.0
+
+    def retry_after(self, now: float) -> Optional[float]:
+        return self.blocked_until - now if self.blocked_until > now else None
+
+    def hit(self, limit: int, window: float, now: float) -> Optional[float]:
+        """Count one event; returns the block length when it takes the key over ``limit``."""
+
+        start = math.floor(now / window) * window
+        if start != self.window_started_at:
+            self.previous_count = self.current_count if start - self.window_started_at == window else 0
+            self.current_count = 0
+            self.window_started_at = start
+        self.current_count += 1
+        self.updated_at = now
+
+        overlap = 1 - (now - start) / window
+        if self.previous_count * overlap + self.current_count <= limit:
+            return None
+        if now - self.last_strike_at > settings.AUTH_BACKOFF_RESET_SECONDS:
+            self.strikes = 0
+        self.strikes += 1
+        self.last_strike_at = now
+        block = min(settings.AUTH_BACKOFF_BASE_SECONDS * 2 ** (self.strikes - 1), settings.AUTH_BACKOFF_MAX_SECONDS)
+        self.blocked_until = now + block
+        return block
+
+
+class MemoryThrottleBackend:
+    """Per-worker state; each worker enforces the limits on its own share of traffic."""
+
+    def __init__(self, max_entries: int = 100_000) -> None:
+        self.max_entries = max_entries
+        self._states: Dict[str, ThrottleState] = {}
+
+    async def update(self, key: str, change: Callable[[ThrottleState], ResultT]) -> ResultT:
+        state = self._states.get(key)
+        if state is None:
+            if len(self._states) >= self.max_entries:
+                self._prune()
+            state = self._states[key] = ThrottleState()
+        return change(state)
+
+    async def retry_after(self, key: str, now: float) -> Optional[float]:
+        state = self._states.get(key)
+        return state.retry_after(now) if state is not None else None
+
+    async def reset(self, key: str) -> None:
+        self._states.pop(key, None)
+
+    def _prune(self) -> None:
+        now = time.time()
+        horizon = now - 2 * max(settings.AUTH_IP_WINDOW_SECONDS, settings.AUTH_EMAIL_WINDOW_SECONDS)
+        idle = [key for key, state in self._states.items() if state.updated_at < horizon and state.blocked_until < now]
+        for key in idle:
+            del self._states[key]
+        while len(self._states) >= self.max_entries:
+            self._states.pop(next(iter(self._states)))
+
+
+class DatabaseThrottleBackend:
+    """State in the ``auth_throttle`` table, locked per key while it is updated."""
+
+    _PURGE_EVERY = 500
+
+    def __init__(self, session_factory: async_sessionmaker) -> None:
+        self.session_factory = session_factory
+        self._updates = 0
+
+    async def update(self, key: str, change: Callable[[ThrottleState], ResultT]) -> ResultT:
+        now = time.time()
+        async with self.session_factory() as session:
+            await session.execute(
+                upsert_insert(AuthThrottle)
+                .values(key=key, window_started_at=0.0, updated_at=now)
+                .on_conflict_do_nothing(index_elements=[AuthThrottle.key])
+            )
+            row = await session.scalar(select(AuthThrottle).where(AuthThrottle.key == key).with_for_update())
+            state = ThrottleState(
+                window_started_at=row.window_started_at,
+                current_count=row.current_count,
+                previous_count=row.previous_count,
+                strikes=row.strikes,
+                last_strike_at=row.last_strike_at,
+                blocked_until=row.blocked_until,
+                updated_at=row.updated_at,
+            )
+            result = change(state)
+            for name, value in vars(state).items():
+                setattr(row, name, value)
+            await session.commit()
+        self._updates += 1
+        if self._updates % self._PURGE_EVERY == 0:
+            await self._purge(now)
+        return result
+
+    async def retry_after(self, key: str, now: float) -> Optional[float]:
+        async with self.session_factory() as session:
+            blocked_until = await session.scalar(select(AuthThrottle.blocked_until).where(AuthThrottle.key == key))
+        return blocked_until - now if blocked_until is not None and blocked_until > now else None
+
+    async def reset(self, key: str) -> None:
+        async with self.session_factory() as session:
+            await session.execute(delete(AuthThrottle).where(AuthThrottle.key == key))
+            await session.commit()
+
+    async def _purge(self, now: float) -> None:
+        horizon = now - max(
+            2 * max(settings.AUTH_IP_WINDOW_SECONDS, settings.AUTH_EMAIL_WINDOW_SECONDS),
+            settings.AUTH_BACKOFF_RESET_SECONDS,
+        )
+        try:
+            async with self.session_factory() as session:
+                await session.execute(
+                    delete(AuthThrottle).where(AuthThrottle.updated_at < horizon, AuthThrottle.blocked_until < now)
+                )
+                await session.commit()
+        except Exception:
+            logger.exception("Failed to purge auth throttle state")
+
+
+class LoginThrottle:
+    def __init__(self, backend) -> None:
+        self.backend = backend
+        self.attempts = 0
+        self.failures = 0
+        self.throttled: Dict[str, int] = {"ip": 0, "email": 0}
+
+    async def check(self, ip: Optional[str], email: Optional[str] = None) -> Optional[Tuple[str, float]]:
+        """Returns ``(reason, retry_after_seconds)`` when ``ip`` or ``email`` is blocked and the attempt must be refused."""
+
+        if not settings.AUTH_THROTTLE_ENABLED:
+            return None
+        self.attempts += 1
+        now = time.time()
+        if ip:
+            retry_after = await self.backend.retry_after(_ip_key(ip), now)
+            if retry_after is not None:
+                self.throttled["ip"] += 1
+                return "ip", retry_after
+        if email:
+            retry_after = await self.backend.retry_after(_email_key(email), now)
+            if retry_after is not None:
+                self.throttled["email"] += 1
+                return "email", retry_after
+        return None
+
+    async def record_registration(self, ip: Optional[str]) -> None:
+        if settings.AUTH_THROTTLE_ENABLED and ip:
+            await self._hit_ip(ip, time.time())
+
+    async def record_failure(self, ip: Optional[str], email: str) -> None:
+        if not settings.AUTH_THROTTLE_ENABLED:
+            return
+        self.failures += 1
+        now = time.time()
+        if ip:
+            await self._hit_ip(ip, now)
+        await self.backend.update(
+            _email_key(email),
+            lambda state: state.hit(settings.AUTH_EMAIL_FAILURE_LIMIT, settings.AUTH_EMAIL_WINDOW_SECONDS, now),
+        )
+
+    async def _hit_ip(self, ip: str, now: float) -> None:
+        await self.backend.update(
+            _ip_key(ip), lambda state: state.hit(settings.AUTH_IP_LIMIT, settings.AUTH_IP_WINDOW_SECONDS, now)
+        )
+
+    async def record_success(self, email: str) -> None:
+        if settings.AUTH_THROTTLE_ENABLED:
+            await self.backend.reset(_email_key(email))
+
+    def snapshot(self) -> dict:
+        return {
+            "enabled": settings.AUTH_THROTTLE_ENABLED,
+            "backend": settings.AUTH_THROTTLE_BACKEND,
+            "attempts": self.attempts,
+            "failures": self.failures,
+            "throttled": dict(self.throttled),
+        }
+
+
+def _ip_key(ip: str) -> str:
+    return f"ip:{ip}"
+
+
+def _email_key(email: str) -> str:
+    return f"email:{email.strip().lower()}"
+
+
+def _build_backend():
+    if settings.AUTH_THROTTLE_BACKEND == "database":
+        return DatabaseThrottleBackend(AsyncSessionLocal)
+    return MemoryThrottleBackend()
+
+
+login_throttle = LoginThrottle(_build_backend())
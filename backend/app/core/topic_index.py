@@ -0,0 +1,253 @@
+import asyncio
+import logging
+import math
+import re
+import time
+import uuid
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.core.invalidation import subscribe
+from app.db.sharding import shard_bind
+from app.models.topic import Topic
+from app.utils.text_analysis import STOPWORDS
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+_WORD = re.compile(r"[^\W_]+")
+_TITLE_WEIGHT = 2.0
+# Character trigrams match typos and word variants; they count for less than whole words.
+_TRIGRAM_WEIGHT = 0.5
+# Index key for topics without an organization; never a valid UUID string.
+_NO_ORGANIZATION = ""
+
+
+def _fold_plural(word: str) -> str:
+    if len(word) <= 3 or word.endswith(("ss", "us", "is")):
+        return word
+    if word.endswith("ies") and len(word) > 4:
+        return word[:-3] + "y"
+    if word.endswith(("ches", "shes", "xes", "sses")):
+        return word[:-2]
+    if word.endswith("s"):
+        return word[:-1]
+    return word
+
+
+def topic_features(title: str, description: Optional[str]) -> Dict[str, float]:
+    """Sublinear term weights over words, word bigrams and character trigrams."""
+
+    counts: Counter = Counter()
+    for weight, text in ((_TITLE_WEIGHT, title), (1.0, description or "")):
+        words = [_fold_plural(word) for word in _WORD.findall(text.lower()) if word not in STOPWORDS]
+        for word in words:
+            counts[f"w:{word}"] += weight
+            padded = f" {word} "
+            for start in range(len(padded) - 2):
+                counts[f"c:{padded[start:start + 3]}"] += weight * _TRIGRAM_WEIGHT
+        for first, second in zip(words, words[1:]):
+            counts[f"b:{first} {second}"] += weight
+    return {term: 1 + math.log(count) if count > 1 else count for term, count in counts.items()}
+
+
+class OrgTopicIndex:
+    """Inverted TF-IDF index over one organization's topics answering top-k cosine queries.
+
+    Documents live in integer slots; each term's posting list is cached as a
+    pair of numpy arrays so a query is one vectorized scatter-add per term.
+    """
+
+    def __init__(self) -> None:
+        self.docs: Dict[uuid.UUID, Tuple[str, Optional[str], Dict[str, float]]] = {}
+        self._slots: Dict[uuid.UUID, int] = {}
+        self._ids: List[Optional[uuid.UUID]] = []
+        self._free: List[int] = []
+        self._postings: Dict[str, Dict[int, float]] = {}
+        self._arrays: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self._norms = np.ones(0)
+        self._norms_size = 0
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    def _idf(self, document_frequency: int) -> float:
+        return math.log((1 + len(self.docs)) / (1 + document_frequency)) + 1
+
+    def _posting_arrays(self, term: str) -> Tuple[np.ndarray, np.ndarray]:
+        arrays = self._arrays.get(term)
+        if arrays is None:
+            posting = self._postings[term]
+            arrays = self._arrays[term] = (
+                np.fromiter(posting.keys(), dtype=np.int64, count=len(posting)),
+                np.fromiter(posting.values(), dtype=np.float64, count=len(posting)),
+            )
+        return arrays
+
+    def _refresh_norms(self) -> None:
+        # Norms depend on idf, so recompute them all once the index has grown or shrunk by a quarter.
+        if self._norms_size and abs(len(self.docs) - self._norms_size) <= self._norms_size // 4:
+            return
+        squares = np.zeros(len(self._ids))
+        for term, posting in self._postings.items():
+            slots, weights = self._posting_arrays(term)
+            squares[slots] += (weights * self._idf(len(posting))) ** 2
+        self._norms = np.sqrt(squares)
+        self._norms[self._norms == 0] = 1.0
+        self._norms_size = len(self.docs)
+
+    def _doc_norm(self, features: Dict[str, float]) -> float:
+        return math.sqrt(
+            sum((weight * self._idf(len(self._postings.get(term, ())))) ** 2 for term, weight in features.items())
+        ) or 1.0
+
+    def add(self, topic_id: uuid.UUID, title: str, description: Optional[str]) -> None:
+        self.remove(topic_id)
+        features = topic_features(title, description)
+        if self._free:
+            slot = self._free.pop()
+            self._ids[slot] = topic_id
+        else:
+            slot = len(self._ids)
+            self._ids.append(topic_id)
+        self._slots[topic_id] = slot
+        self.docs[topic_id] = (title, description, features)
+        for term, weight in features.items():
+            self._postings.setdefault(term, {})[slot] = weight
+            self._arrays.pop(term, None)
+        if self._norms_size:
+            if slot >= len(self._norms):
+                self._norms = np.concatenate([self._norms, np.ones(max(slot + 1 - len(self._norms), 64))])
+            self._norms[slot] = self._doc_norm(features)
+
+    def remove(self, topic_id: uuid.UUID) -> None:
+        entry = self.docs.pop(topic_id, None)
+        if entry is None:
+            return
+        slot = self._slots.pop(topic_id)
+        self._ids[slot] = None
+        self._free.append(slot)
+        for term in entry[2]:
+            posting = self._postings.get(term)
+            if posting is not None:
+                posting.pop(slot, None)
+                self._arrays.pop(term, None)
+                if not posting:
+                    del self._postings[term]
+
+    def query(
+        self, title: str, description: Optional[str] = None, limit: int = 5, min_score: float = 0.0
+    ) -> List[Tuple[uuid.UUID, float]]:
+        if not self.docs:
+            return []
+        self._refresh_norms()
+        features = topic_features(title, description)
+        scores = np.zeros(len(self._ids))
+        query_norm = 0.0
+        for term, weight in features.items():
+            posting = self._postings.get(term)
+            idf = self._idf(len(posting) if posting else 0)
+            query_norm += (weight * idf) ** 2
+            if posting:
+                slots, weights = self._posting_arrays(term)
+                scores[slots] += weights * (weight * idf * idf)
+        scores /= self._norms[: len(scores)] * (math.sqrt(query_norm) or 1.0)
+
+        limit = min(limit, len(scores))
+        top = np.argpartition(-scores, limit - 1)[:limit]
+        top = top[np.argsort(-scores[top])]
+        return [
+            (self._ids[slot], min(float(scores[slot]), 1.0))
+            for slot in top
+            if self._ids[slot] is not None and scores[slot] > 0 and scores[slot] >= min_score
+        ]
+
+
+class TopicIndex:
+    """Per-organization indexes built lazily from the database and kept current by topic routes.
+
+    Changes made by other workers arrive as topic invalidation events and drop
+    the organization's index so it is rebuilt on next use; ``max_age_seconds``
+    bounds staleness when those events are missed.
+    """
+
+    def __init__(self, max_age_seconds: float = settings.TOPIC_INDEX_MAX_AGE_SECONDS) -> None:
+        self.max_age_seconds = max_age_seconds
+        self._indexes: Dict[str, Tuple[OrgTopicIndex, float]] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    @staticmethod
+    def _key(organization_id: Optional[uuid.UUID]) -> str:
+        return _NO_ORGANIZATION if organization_id is None else str(organization_id)
+
+    def _fresh(self, key: str) -> Optional[OrgTopicIndex]:
+        entry = self._indexes.get(key)
+        if entry is None or time.monotonic() - entry[1] > self.max_age_seconds:
+            return None
+        return entry[0]
+
+    async def for_org(self, db: AsyncSession, organization_id: Optional[uuid.UUID]) -> OrgTopicIndex:
+        key = self._key(organization_id)
+        index = self._fresh(key)
+        if index is not None:
+            return index
+        async with self._locks.setdefault(key, asyncio.Lock()):
+            index = self._fresh(key)
+            if index is None:
+                index = await self._build(db, organization_id)
+                self._indexes[key] = (index, time.monotonic())
+        return index
+
+    async def _build(self, db: AsyncSession, organization_id: Optional[uuid.UUID]) -> OrgTopicIndex:
+        started = time.perf_counter()
+        criteria = Topic.organization_id.is_(None) if organization_id is None else Topic.organization_id == organization_id
+        result = await db.stream(
+            select(Topic.id, Topic.title, Topic.description).where(criteria),
+            bind_arguments=shard_bind(organization_id),
+        )
+        index = OrgTopicIndex()
+        async for topic_id, title, description in result:
+            index.add(topic_id, title, description)
+        logger.info(
+            "Built topic index for organization %s: %d topics in %.0f ms",
+            organization_id,
+            len(index),
+            (time.perf_counter() - started) * 1000,
+        )
+        return index
+
+    def add(
+        self, organization_id: Optional[uuid.UUID], topic_id: uuid.UUID, title: str, description: Optional[str]
+    ) -> None:
+        index = self._fresh(self._key(organization_id))
+        if index is not None:
+            index.add(topic_id, title, description)
+
+    def remove(self, organization_id: Optional[uuid.UUID], topic_id: uuid.UUID) -> None:
+        index = self._fresh(self._key(organization_id))
+        if index is not None:
+            index.remove(topic_id)
+
+    def drop(self, organization_id: Optional[str]) -> None:
+        """Handle a topic invalidation event; ``None`` drops every index.
+
+        Events for topics without an organization carry a key that is not a UUID.
+        """
+
+        if organization_id is None:
+            self._indexes.clear()
+            return
+        try:
+            key = self._key(uuid.UUID(organization_id))
+        except ValueError:
+            key = _NO_ORGANIZATION
+        self._indexes.pop(key, None)
+
+
+topic_index = TopicIndex()
+subscribe("topic", topic_index.drop)
@@ -0,0 +1,80 @@
+"""Minimal OTLP/HTTP JSON trace collector for local runs.
+
+Usage::
+
+    python -m app.core.trace_collector [--port 4318] [--output collected-traces.jsonl]
+
+Accepts ``POST /v1/traces`` with the JSON encoding (as sent with
+``TRACE_EXPORTER=otlp``), appends each request body to ``--output`` and
+prints every received trace as an indented span tree.
+"""
+
+import argparse
+import json
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+
+
+def span_tree(payload: dict) -> List[str]:
+    spans = [
+        span
+        for resource in payload.get("resourceSpans", [])
+        for scope in resource.get("scopeSpans", [])
+        for span in scope.get("spans", [])
+    ]
+    children: Dict[str, List[dict]] = defaultdict(list)
+    ids = {span["spanId"] for span in spans}
+    for span in spans:
+        parent = span.get("parentSpanId")
+        children[parent if parent in ids else ""].append(span)
+
+    lines: List[str] = []
+
+    def walk(parent: str, depth: int) -> None:
+        for span in sorted(children[parent], key=lambda item: int(item["startTimeUnixNano"])):
+            duration_ms = (int(span["endTimeUnixNano"]) - int(span["startTimeUnixNano"])) / 1e6
+            error = " ERROR" if span.get("status", {}).get("code") == 2 else ""
+            prefix = f"{span['traceId']} " if depth == 0 else ""
+            lines.append(f"{'  ' * depth}{prefix}{span['name']} {duration_ms:.2f}ms{error}")
+            walk(span["spanId"], depth + 1)
+
+    walk("", 0)
+    return lines
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=4318)
+    parser.add_argument("--output", default="collected-traces.jsonl")
+    args = parser.parse_args()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self) -> None:
+            if self.path != "/v1/traces":
+                self.send_error(404)
+                return
+            body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+            try:
+                payload = json.loads(body)
+            except ValueError:
+                self.send_error(400, "Expected OTLP JSON")
+                return
+            with open(args.output, "a", encoding="utf-8") as handle:
+                handle.write(json.dumps(payload, separators=(",", ":")) + "\n")
+            print("\n".join(span_tree(payload)), flush=True)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.end_headers()
+            self.wfile.write(b"{}")
+
+        def log_message(self, format: str, *args: object) -> None:
+            pass
+
+    print(f"Collecting traces on http://{args.host}:{args.port}/v1/traces into {args.output}")
+    ThreadingHTTPServer((args.host, args.port), Handler).serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,321 @@
+"""In-process request tracing.
+
+Each sampled request gets a root span, and the code it runs adds child spans
+(authentication, SQL statements, password hashing, AI generation) through
+``start_span`` or ``@traced``. A W3C ``traceparent`` request header continues
+the caller's trace, and its sampled flag is honoured. Other requests are
+sampled at ``TRACE_SAMPLE_RATE``. For an unsampled request, every
+``start_span`` is a context-variable lookup and nothing more.
+
+Finished traces are queued and written by a background thread. ``file`` mode
+appends them to ``TRACE_FILE``, and ``otlp`` mode POSTs them to
+``TRACE_OTLP_ENDPOINT``. Both use the OTLP/HTTP JSON encoding, one export
+request per line or per POST.
+"""
+
+import asyncio
+import functools
+import json
+import logging
+import os
+import queue
+import random
+import re
+import threading
+import time
+import urllib.request
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import get_settings
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+_SAMPLED_FLAG = 0x01
+_MAX_STATEMENT_LENGTH = 500
+
+
+def parse_traceparent(header: Optional[str]) -> Optional[Tuple[str, str, bool]]:
+    """``(trace_id, parent_span_id, sampled)`` from a ``traceparent`` header, or ``None`` when malformed."""
+
+    match = _TRACEPARENT.match((header or "").strip().lower())
+    if match is None or match.group(1) == "0" * 32 or match.group(2) == "0" * 16:
+        return None
+    return match.group(1), match.group(2), bool(int(match.group(3), 16) & _SAMPLED_FLAG)
+
+
+def _new_id(size: int) -> str:
+    return os.urandom(size).hex()
+
+
+@dataclass
+class Trace:
+    trace_id: str
+    spans: List["Span"] = field(default_factory=list)
+    dropped_spans: int = 0
+
+
+@dataclass
+class Span:
+    trace: Trace
+    name: str
+    parent_id: Optional[str]
+    attributes: Dict[str, Any] = field(default_factory=dict)
+    span_id: str = field(default_factory=lambda: _new_id(8))
+    kind: int = 1
+    start_ns: int = field(default_factory=time.time_ns)
+    end_ns: Optional[int] = None
+    error: Optional[str] = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def record_error(self, exc: BaseException) -> None:
+        self.error = f"{type(exc).__name__}: {exc}"[:500]
+
+    def finish(self) -> None:
+        if self.end_ns is not None:
+            return
+        self.end_ns = time.time_ns()
+        if len(self.trace.spans) < settings.TRACE_MAX_SPANS:
+            self.trace.spans.append(self)
+        else:
+            self.trace.dropped_spans += 1
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def tracing_enabled() -> bool:
+    return settings.TRACE_EXPORTER is not None
+
+
+def start_trace(name: str, traceparent: Optional[str], attributes: Dict[str, Any]) -> Optional[Span]:
+    """Root span for a request, or ``None`` when the request is not sampled."""
+
+    parent = parse_traceparent(traceparent)
+    if parent is not None:
+        trace_id, parent_id, sampled = parent
+    else:
+        trace_id, parent_id, sampled = None, None, random.random() < settings.TRACE_SAMPLE_RATE
+    if not sampled:
+        return None
+    trace_id = trace_id or _new_id(16)
+    return Span(trace=Trace(trace_id), name=name, parent_id=parent_id, attributes=attributes, kind=2)
+
+
+@contextmanager
+def activate(span: Span) -> Iterator[Span]:
+    token = _current_span.set(span)
+    try:
+        yield span
+    except BaseException as exc:
+        span.record_error(exc)
+        raise
+    finally:
+        _current_span.reset(token)
+
+
+@contextmanager
+def start_span(name: str, **attributes: Any) -> Iterator[Optional[Span]]:
+    """Child of the current span; yields ``None`` and records nothing outside a sampled trace."""
+
+    parent = _current_span.get()
+    if parent is None:
+        yield None
+        return
+    span = Span(trace=parent.trace, name=name, parent_id=parent.span_id, attributes=attributes)
+    try:
+        with activate(span):
+            yield span
+    finally:
+        span.finish()
+
+
+def traced(name: str) -> Callable:
+    """Decorator running a sync or async function inside ``start_span(name)``."""
+
+    def decorator(function: Callable) -> Callable:
+        if asyncio.iscoroutinefunction(function):
+
+            @functools.wraps(function)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                with start_span(name):
+                    return await function(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(function)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with start_span(name):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def _attribute_value(value: Any) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def to_otlp(traces: List[Trace]) -> dict:
+    """OTLP/HTTP JSON ``ExportTraceServiceRequest`` for ``traces``."""
+
+    spans = []
+    for trace in traces:
+        for span in trace.spans:
+            encoded = {
+                "traceId": trace.trace_id,
+                "spanId": span.span_id,
+                "name": span.name,
+                "kind": span.kind,
+                "startTimeUnixNano": str(span.start_ns),
+                "endTimeUnixNano": str(span.end_ns),
+                "attributes": [
+                    {"key": key, "value": _attribute_value(value)} for key, value in span.attributes.items()
+                ],
+                "status": {"code": 2, "message": span.error} if span.error else {"code": 1},
+            }
+            if span.parent_id:
+                encoded["parentSpanId"] = span.parent_id
+            spans.append(encoded)
+    return {
+        "resourceSpans": [
+            {
+                "resource": {
+                    "attributes": [
+                        {"key": "service.name", "value": {"stringValue": settings.TRACE_SERVICE_NAME}},
+                        {"key": "process.pid", "value": {"intValue": str(os.getpid())}},
+                    ]
+                },
+                "scopeSpans": [{"scope": {"name": "app.core.tracing"}, "spans": spans}],
+            }
+        ]
+    }
+
+
+class TraceExporter:
+    """Batches finished traces on a queue and writes them from a background thread.
+
+    The thread starts on first use in each process, so workers forked from a
+    preloaded master get their own. Traces are dropped when the queue is full.
+    """
+
+    def __init__(self) -> None:
+        self.exported = 0
+        self.dropped = 0
+        self.failed = 0
+        self._queue: "queue.Queue[Trace]" = queue.Queue(maxsize=settings.TRACE_EXPORT_QUEUE_SIZE)
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def submit(self, trace: Trace) -> None:
+        if self._pid != os.getpid():
+            self._start()
+        try:
+            self._queue.put_nowait(trace)
+        except queue.Full:
+            self.dropped += 1
+
+    def _start(self) -> None:
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._queue = queue.Queue(maxsize=settings.TRACE_EXPORT_QUEUE_SIZE)
+            threading.Thread(target=self._run, args=(self._queue,), name="trace-exporter", daemon=True).start()
+            self._pid = os.getpid()
+
+    def _run(self, pending: "queue.Queue[Trace]") -> None:
+        while True:
+            batch = [pending.get()]
+            # Give a burst a moment to accumulate into one export request.
+            deadline = time.monotonic() + settings.TRACE_EXPORT_INTERVAL_SECONDS
+            while len(batch) < settings.TRACE_EXPORT_BATCH_SIZE:
+                try:
+                    batch.append(pending.get(timeout=max(deadline - time.monotonic(), 0)))
+                except queue.Empty:
+                    break
+            try:
+                self._write(to_otlp(batch))
+                self.exported += len(batch)
+            except Exception:
+                self.failed += len(batch)
+                logger.exception("Failed to export %d traces", len(batch))
+
+    def _write(self, payload: dict) -> None:
+        body = json.dumps(payload, separators=(",", ":"))
+        if settings.TRACE_EXPORTER == "otlp":
+            request = urllib.request.Request(
+                settings.TRACE_OTLP_ENDPOINT,
+                data=body.encode("utf-8"),
+                headers={"Content-Type": "application/json"},
+                method="POST",
+            )
+            with urllib.request.urlopen(request, timeout=5) as response:
+                response.read()
+        else:
+            with open(settings.TRACE_FILE, "a", encoding="utf-8") as handle:
+                handle.write(body + "\n")
+
+    def snapshot(self) -> dict:
+        return {
+            "exporter": settings.TRACE_EXPORTER,
+            "sample_rate": settings.TRACE_SAMPLE_RATE,
+            "exported": self.exported,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "queued": self._queue.qsize(),
+        }
+
+
+trace_exporter = TraceExporter()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_statement_span(conn, cursor, statement, parameters, context, executemany) -> None:
+    parent = _current_span.get()
+    if parent is not None and context is not None:
+        context._trace_span = Span(
+            trace=parent.trace,
+            name="db.query",
+            parent_id=parent.span_id,
+            attributes={
+                "db.system": conn.dialect.name,
+                "db.statement": statement[:_MAX_STATEMENT_LENGTH],
+                "db.executemany": executemany,
+            },
+            kind=3,
+        )
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _finish_statement_span(conn, cursor, statement, parameters, context, executemany) -> None:
+    span = getattr(context, "_trace_span", None)
+    if span is not None:
+        span.finish()
+
+
+@event.listens_for(Engine, "handle_error")
+def _fail_statement_span(exception_context) -> None:
+    span = getattr(exception_context.execution_context, "_trace_span", None)
+    if span is not None:
+        span.record_error(exception_context.original_exception)
+        span.finish()
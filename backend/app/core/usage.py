@@ -0,0 +1,144 @@
+import asyncio
+import logging
+import uuid
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.core import deadline
+from app.core.config import get_settings
+from app.db.session import AsyncSessionLocal
+from app.db.sharding import directory_bind
+from app.db.upsert import insert as upsert_insert
+from app.models.ai_usage import AIUsageDaily, AIUsageEvent
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+_ROLLUP_NAMESPACE = uuid.UUID("6f1c2d4e-8a3b-4c5d-9e7f-0a1b2c3d4e5f")
+_MAX_PENDING = 50_000
+
+
+@dataclass
+class UsageEvent:
+    user_id: uuid.UUID
+    organization_id: Optional[uuid.UUID]
+    endpoint: str
+    provider: str
+    model: str
+    input_chars: int
+    output_chars: int
+    latency_ms: int
+    cache_hit: bool = False
+    created_at: datetime = field(default_factory=datetime.utcnow)
+
+
+def _rollup_key(event: UsageEvent) -> Tuple:
+    return (
+        event.created_at.date(),
+        event.organization_id,
+        event.user_id,
+        event.endpoint,
+        event.provider,
+        event.model,
+    )
+
+
+def _rollup_rows(events: List[UsageEvent]) -> List[dict]:
+    rows: Dict[Tuple, dict] = {}
+    for event in events:
+        key = _rollup_key(event)
+        row = rows.get(key)
+        if row is None:
+            day, org_id, user_id, endpoint, provider, model = key
+            row = rows[key] = {
+                "id": uuid.uuid5(_ROLLUP_NAMESPACE, "|".join(str(part) for part in key)),
+                "day": day,
+                "organization_id": org_id,
+                "user_id": user_id,
+                "endpoint": endpoint,
+                "provider": provider,
+                "model": model,
+                "calls": 0,
+                "cache_hits": 0,
+                "input_chars": 0,
+                "output_chars": 0,
+                "latency_ms_total": 0,
+            }
+        row["calls"] += 1
+        row["cache_hits"] += int(event.cache_hit)
+        row["input_chars"] += event.input_chars
+        row["output_chars"] += event.output_chars
+        row["latency_ms_total"] += event.latency_ms
+    return list(rows.values())
+
+
+class UsageRecorder:
+    """Buffers AI usage events in memory and writes them in bulk.
+
+    A flush happens when ``max_batch`` events are pending, every
+    ``flush_seconds`` from :meth:`run`, and once more on shutdown.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker,
+        max_batch: int = settings.USAGE_FLUSH_BATCH_SIZE,
+        flush_seconds: float = settings.USAGE_FLUSH_SECONDS,
+    ) -> None:
+        self.session_factory = session_factory
+        self.max_batch = max_batch
+        self.flush_seconds = flush_seconds
+        self._buffer: List[UsageEvent] = []
+        self._lock = asyncio.Lock()
+        self._pending_flush: Optional[asyncio.Task] = None
+
+    def record(self, event: UsageEvent) -> None:
+        if len(self._buffer) >= _MAX_PENDING:
+            logger.warning("Dropping AI usage event; %d events already pending", len(self._buffer))
+            return
+        self._buffer.append(event)
+        if len(self._buffer) >= self.max_batch and (self._pending_flush is None or self._pending_flush.done()):
+            self._pending_flush = deadline.detach(self.flush())
+
+    async def flush(self) -> int:
+        async with self._lock:
+            events, self._buffer = self._buffer, []
+            if not events:
+                return 0
+            try:
+                await self._write(events)
+            except Exception:
+                logger.exception("Failed to write %d AI usage events; keeping them for the next flush", len(events))
+                self._buffer[:0] = events
+                return 0
+            return len(events)
+
+    async def _write(self, events: List[UsageEvent]) -> None:
+        rollup = upsert_insert(AIUsageDaily)
+        rollup = rollup.on_conflict_do_update(
+            index_elements=[AIUsageDaily.id],
+            set_={
+                column: getattr(AIUsageDaily, column) + rollup.excluded[column]
+                for column in ("calls", "cache_hits", "input_chars", "output_chars", "latency_ms_total")
+            },
+        )
+        async with self.session_factory() as session:
+            bind = directory_bind()
+            await session.execute(insert(AIUsageEvent), [asdict(event) for event in events], bind_arguments=bind)
+            await session.execute(rollup, _rollup_rows(events), bind_arguments=bind)
+            await session.commit()
+
+    async def run(self) -> None:
+        try:
+            while True:
+                await asyncio.sleep(self.flush_seconds)
+                await self.flush()
+        finally:
+            await self.flush()
+
+
+usage_recorder = UsageRecorder(AsyncSessionLocal)
@@ -9,8 +9,16 @@ def import_models() -> None:
     """Import all model modules to register them with SQLAlchemy metadata."""
 
     from app.models import (  # noqa: F401
+        ai_usage,
         allowed_email_domain,
+        auth_throttle,
+        email_outbox,
+        generated_content,
+        idempotency_key,
         organization,
+        organization_shard,
+        quiz_submission,
+        refresh_token,
         topic,
         user,
         user_settings,
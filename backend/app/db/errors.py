@@ -0,0 +1,20 @@
+from sqlalchemy.exc import DBAPIError, IntegrityError
+
+UNIQUE_VIOLATION = "23505"
+QUERY_CANCELED = "57014"
+
+
+def is_unique_violation(exc: IntegrityError) -> bool:
+    orig = getattr(exc, "orig", None)
+    code = getattr(orig, "sqlstate", None) or getattr(orig, "pgcode", None)
+    if code:
+        return code == UNIQUE_VIOLATION
+    return "unique" in str(orig).lower()
+
+
+def is_statement_timeout(exc: DBAPIError) -> bool:
+    orig = getattr(exc, "orig", None)
+    code = getattr(orig, "sqlstate", None) or getattr(orig, "pgcode", None)
+    if code:
+        return code == QUERY_CANCELED
+    return "statement timeout" in str(orig).lower()
@@ -0,0 +1,58 @@
+"""Statements on the hot request path.
+
+Routes build these statements here so that startup warm-up prepares exactly
+the SQL they run: prepared-statement caches are keyed by the SQL text.
+"""
+
+import uuid
+from typing import Any, Callable, List, Tuple
+
+from sqlalchemy import Select, func, select
+
+from app.models.topic import Topic
+from app.models.user import User
+from app.models.user_settings import UserSettings
+
+
+def user_by_id(user_id: Any) -> Select:
+    return select(User).where(User.id == user_id)
+
+
+def user_by_email(email: str) -> Select:
+    return select(User).where(User.email == email)
+
+
+def topics_by_org(organization_id: Any) -> Select:
+    return select(Topic).where(Topic.organization_id == organization_id)
+
+
+def topic_version_by_org(organization_id: Any) -> Select:
+    return select(func.max(Topic.updated_at), func.count(Topic.id)).where(Topic.organization_id == organization_id)
+
+
+def settings_by_user(user_id: Any) -> Select:
+    return select(UserSettings).where(UserSettings.user_id == user_id)
+
+
+def model_settings_by_user(user_id: Any) -> Select:
+    return select(
+        UserSettings.provider,
+        UserSettings.model,
+        UserSettings.openai_api_key,
+        UserSettings.google_api_key,
+        UserSettings.anthropic_api_key,
+        UserSettings.local_api_key,
+    ).where(UserSettings.user_id == user_id)
+
+
+_NO_ID = uuid.UUID(int=0)
+
+# Builders with arguments that match no rows, used to prepare each statement at startup.
+HOT_QUERIES: List[Tuple[Callable[..., Select], Tuple[Any, ...]]] = [
+    (user_by_id, (_NO_ID,)),
+    (user_by_email, ("",)),
+    (topics_by_org, (_NO_ID,)),
+    (topic_version_by_org, (_NO_ID,)),
+    (settings_by_user, (_NO_ID,)),
+    (model_settings_by_user, (_NO_ID,)),
+]
@@ -0,0 +1,71 @@
+import asyncio
+import logging
+import time
+from typing import Dict, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.config import get_settings
+from app.core.load import LoadMonitor, load_monitor
+from app.db.session import shard_engines
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+class ReadinessProbe:
+    """Pings every shard at most once per ``cache_seconds`` and reports whether to take traffic."""
+
+    def __init__(
+        self,
+        engines: Dict[str, AsyncEngine],
+        monitor: LoadMonitor = load_monitor,
+        cache_seconds: float = settings.READINESS_CACHE_SECONDS,
+        timeout_seconds: float = settings.READINESS_TIMEOUT_SECONDS,
+    ) -> None:
+        self.engines = engines
+        self.monitor = monitor
+        self.cache_seconds = cache_seconds
+        self.timeout_seconds = timeout_seconds
+        self._databases: Optional[Dict[str, bool]] = None
+        self._checked_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def _ping(self, shard_id: str, engine: AsyncEngine) -> bool:
+        async def ping() -> None:
+            async with engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+
+        try:
+            await asyncio.wait_for(ping(), self.timeout_seconds)
+            return True
+        except Exception as exc:
+            logger.warning("Readiness ping to shard '%s' failed: %r", shard_id, exc)
+            return False
+
+    async def databases(self) -> Dict[str, bool]:
+        if self._databases is not None and time.monotonic() - self._checked_at < self.cache_seconds:
+            return self._databases
+        async with self._lock:
+            if self._databases is None or time.monotonic() - self._checked_at >= self.cache_seconds:
+                results = await asyncio.gather(
+                    *(self._ping(shard_id, engine) for shard_id, engine in self.engines.items())
+                )
+                self._databases = dict(zip(self.engines, results))
+                self._checked_at = time.monotonic()
+        return self._databases
+
+    async def check(self) -> dict:
+        databases = await self.databases()
+        # Report not-ready once normal traffic would be shed, before reads start failing.
+        overloaded = self.monitor.overloaded("normal")
+        return {
+            "ready": all(databases.values()) and not overloaded,
+            "databases": databases,
+            "overloaded": overloaded,
+            **self.monitor.snapshot(),
+        }
+
+
+readiness_probe = ReadinessProbe(shard_engines)
@@ -1,10 +1,19 @@
 import ssl
+import time
 from typing import AsyncGenerator
 
+from sqlalchemy import event
+from sqlalchemy.engine import Connection
 from sqlalchemy.engine.url import URL, make_url
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.ext.horizontal_shard import ShardedSession
+from sqlalchemy.orm import Session, SessionTransaction
+from sqlalchemy.pool import AsyncAdaptedQueuePool, PoolProxiedConnection, StaticPool
 
+from app.core import deadline
 from app.core.config import get_settings
+from app.core.load import load_monitor
+from app.db.sharding import execute_chooser, identity_chooser, shard_chooser, sharding_enabled
 
 settings = get_settings()
 
@@ -30,18 +39,98 @@ def _build_connect_args(url: URL) -> dict:
     return {}
 
 
+def listener_connect_params() -> tuple:
+    """DSN and connect kwargs for a raw asyncpg connection outside the pool."""
+
+    url = _build_engine_url(settings.DATABASE_URL)
+    dsn = url.set(drivername="postgresql").render_as_string(hide_password=False)
+    return dsn, _build_connect_args(url)
+
+
+class MonitoredQueuePool(AsyncAdaptedQueuePool):
+    """Reports how long each checkout takes (queueing, connecting, pre-ping) to the load monitor."""
+
+    def connect(self) -> PoolProxiedConnection:
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            load_monitor.record_pool_wait(time.perf_counter() - started)
+
+
+def _is_memory_sqlite(url: URL) -> bool:
+    return url.database in (None, "", ":memory:") or url.query.get("mode") == "memory"
+
+
+def _enable_sqlite_foreign_keys(dbapi_connection, connection_record) -> None:
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+
+def _create_sqlite_engine(url: URL) -> AsyncEngine:
+    options: dict = {"connect_args": {"check_same_thread": False}}
+    if _is_memory_sqlite(url):
+        # Every connection to :memory: is a new empty database, so share a single one.
+        options["poolclass"] = StaticPool
+    else:
+        options.update(
+            poolclass=MonitoredQueuePool, pool_size=settings.DB_POOL_SIZE, max_overflow=settings.DB_MAX_OVERFLOW
+        )
+    sqlite_engine = create_async_engine(url, **options)
+    event.listen(sqlite_engine.sync_engine, "connect", _enable_sqlite_foreign_keys)
+    return sqlite_engine
+
+
+def _create_engine(database_url: str) -> AsyncEngine:
+    url = _build_engine_url(database_url)
+    if url.get_backend_name() == "sqlite":
+        return _create_sqlite_engine(url)
+    return create_async_engine(
+        url,
+        future=True,
+        connect_args={
+            **_build_connect_args(url),
+            "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+        },
+        poolclass=MonitoredQueuePool,
+        pool_pre_ping=True,
+        pool_recycle=300,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+    )
+
+
 engine_url = _build_engine_url(settings.DATABASE_URL)
-engine = create_async_engine(
-    engine_url,
-    echo=settings.DEBUG,
-    future=True,
-    connect_args=_build_connect_args(engine_url),
-    pool_pre_ping=True,
-    pool_recycle=300,
-    pool_size=5,
-    max_overflow=10,
-)
-AsyncSessionLocal = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+engine = _create_engine(settings.DATABASE_URL)
+shard_engines = {
+    settings.DEFAULT_SHARD_ID: engine,
+    **{shard_id: _create_engine(url) for shard_id, url in settings.SHARD_DATABASE_URLS.items()},
+}
+
+if sharding_enabled():
+    AsyncSessionLocal = async_sessionmaker(
+        expire_on_commit=False,
+        class_=AsyncSession,
+        sync_session_class=ShardedSession,
+        shards={shard_id: shard_engine.sync_engine for shard_id, shard_engine in shard_engines.items()},
+        shard_chooser=shard_chooser,
+        identity_chooser=identity_chooser,
+        execute_chooser=execute_chooser,
+    )
+else:
+    AsyncSessionLocal = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+
+
+@event.listens_for(Session, "after_begin")
+def _apply_statement_timeout(session: Session, transaction: SessionTransaction, connection: Connection) -> None:
+    """Bound every statement in the transaction by what is left of the request deadline."""
+
+    if connection.dialect.name != "postgresql":
+        return
+    left = deadline.timeout()
+    if left is not None:
+        connection.exec_driver_sql(f"SET LOCAL statement_timeout = {max(int(left * 1000), 1)}")
 
 
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
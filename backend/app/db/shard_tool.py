@@ -0,0 +1,216 @@
+"""Inspect and rebalance organization shards.
+
+Usage::
+
+    python -m app.db.shard_tool list
+    python -m app.db.shard_tool move <organization_id> <shard_id>
+
+Writes for the organization should be paused while it moves: rows are copied to
+the target shard, the shard map is switched, and only then are the source rows
+deleted. Workers pick up the new assignment within SHARD_MAP_REFRESH_SECONDS.
+"""
+
+import argparse
+import asyncio
+import uuid
+from datetime import datetime
+from typing import List, Tuple
+
+from sqlalchemy import Table, delete, func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncConnection
+from sqlalchemy.sql.elements import ColumnElement
+
+from app.db.base import Base, import_models
+from app.db.session import shard_engines
+from app.db.sharding import shard_map
+from app.models.allowed_email_domain import AllowedEmailDomain
+from app.models.generated_content import GeneratedContent
+from app.models.organization import Organization
+from app.models.organization_shard import OrganizationShard
+from app.models.quiz_submission import QuizSubmission
+from app.models.topic import Topic
+from app.models.user import User
+from app.models.user_settings import UserSettings
+
+COPY_BATCH_SIZE = 1000
+
+
+def _org_tables(org_id: uuid.UUID) -> List[Tuple[Table, ColumnElement]]:
+    """Organization-scoped tables in foreign-key order with their row filters."""
+
+    org_users = select(User.id).where(User.organization_id == org_id)
+    return [
+        (User.__table__, User.organization_id == org_id),
+        (UserSettings.__table__, UserSettings.user_id.in_(org_users)),
+        (AllowedEmailDomain.__table__, AllowedEmailDomain.organization_id == org_id),
+        (Topic.__table__, Topic.organization_id == org_id),
+        (GeneratedContent.__table__, GeneratedContent.organization_id == org_id),
+        (QuizSubmission.__table__, QuizSubmission.organization_id == org_id),
+    ]
+
+
+async def _check_creators(source: AsyncConnection, org_id: uuid.UUID) -> None:
+    """Refuse the move while organization rows point at users from outside it.
+
+    Those users live on another shard, so the copied rows would break foreign keys on the target.
+    """
+
+    org_users = select(User.id).where(User.organization_id == org_id)
+    references = [
+        (Topic.__table__, Topic.created_by_user_id, Topic.organization_id == org_id),
+        (GeneratedContent.__table__, GeneratedContent.created_by_user_id, GeneratedContent.organization_id == org_id),
+        (QuizSubmission.__table__, QuizSubmission.submitted_by_user_id, QuizSubmission.organization_id == org_id),
+    ]
+    problems = []
+    for table, column, criteria in references:
+        count = await source.scalar(select(func.count()).select_from(table).where(criteria, column.not_in(org_users)))
+        if count:
+            problems.append(f"{count} {table.name}")
+    if problems:
+        raise SystemExit(
+            f"Rows created by users outside organization {org_id}: {', '.join(problems)}. Reassign them before moving."
+        )
+
+
+async def _check_emails(source: AsyncConnection, target: AsyncConnection, org_id: uuid.UUID) -> None:
+    """Refuse the move when a user's email is already taken on the target shard.
+
+    Email uniqueness is enforced per shard, so copying would either fail or leave two accounts sharing a login.
+    """
+
+    conflicts: List[str] = []
+    result = await source.stream(select(User.email).where(User.organization_id == org_id))
+    async for partition in result.scalars().partitions(COPY_BATCH_SIZE):
+        taken = await target.execute(select(User.email).where(User.email.in_(partition)))
+        conflicts.extend(taken.scalars())
+    if conflicts:
+        raise SystemExit(
+            f"Emails already registered on the target shard: {', '.join(sorted(conflicts))}. Resolve them before moving."
+        )
+
+
+async def _copy_rows(source: AsyncConnection, target: AsyncConnection, table: Table, criteria: ColumnElement) -> int:
+    copied = 0
+    result = await source.stream(select(table).where(criteria))
+    async for partition in result.mappings().partitions(COPY_BATCH_SIZE):
+        await target.execute(insert(table), [dict(row) for row in partition])
+        copied += len(partition)
+    return copied
+
+
+async def _ensure_organization(directory: AsyncConnection, target: AsyncConnection, org_id: uuid.UUID) -> None:
+    """Replicate the organization row so foreign keys on the target shard hold."""
+
+    exists = await target.execute(select(Organization.id).where(Organization.id == org_id))
+    if exists.first() is not None:
+        return
+    row = (await directory.execute(select(Organization.__table__).where(Organization.id == org_id))).mappings().first()
+    if row is None:
+        raise SystemExit(f"Organization {org_id} not found")
+    await target.execute(insert(Organization.__table__), [dict(row)])
+
+
+async def _ensure_current_organizations(
+    directory: AsyncConnection, source: AsyncConnection, target: AsyncConnection, org_id: uuid.UUID
+) -> None:
+    """Replicate the other organizations users have switched to, which ``current_organization_id`` references."""
+
+    result = await source.execute(
+        select(User.current_organization_id)
+        .where(User.organization_id == org_id, User.current_organization_id.is_not(None))
+        .distinct()
+    )
+    for (current_org_id,) in result.all():
+        await _ensure_organization(directory, target, current_org_id)
+
+
+async def _record_assignment(directory: AsyncConnection, org_id: uuid.UUID, shard_id: str) -> None:
+    result = await directory.execute(
+        update(OrganizationShard)
+        .where(OrganizationShard.organization_id == org_id)
+        .values(shard_id=shard_id, updated_at=datetime.utcnow())
+    )
+    if result.rowcount == 0:
+        await directory.execute(
+            insert(OrganizationShard).values(
+                organization_id=org_id, shard_id=shard_id, updated_at=datetime.utcnow()
+            )
+        )
+
+
+async def _load_map() -> None:
+    async with shard_engines[shard_map.default_shard].connect() as directory:
+        result = await directory.execute(select(OrganizationShard.organization_id, OrganizationShard.shard_id))
+        for org_id, shard_id in result:
+            shard_map.assign(org_id, shard_id)
+
+
+async def move_organization(org_id: uuid.UUID, target_shard: str) -> None:
+    if target_shard not in shard_engines:
+        raise SystemExit(f"Unknown shard '{target_shard}'. Configured: {', '.join(shard_engines)}")
+    await _load_map()
+    source_shard = shard_map.shard_for_org(org_id)
+    if source_shard == target_shard:
+        print(f"Organization {org_id} already on shard '{target_shard}'")
+        return
+
+    directory_engine = shard_engines[shard_map.default_shard]
+    source_engine = shard_engines[source_shard]
+    target_engine = shard_engines[target_shard]
+    tables = _org_tables(org_id)
+
+    async with source_engine.connect() as source:
+        await _check_creators(source, org_id)
+    async with target_engine.begin() as target:
+        await target.run_sync(Base.metadata.create_all)
+    async with source_engine.connect() as source, target_engine.connect() as target:
+        await _check_emails(source, target, org_id)
+    async with directory_engine.connect() as directory, source_engine.connect() as source:
+        async with target_engine.begin() as target:
+            await _ensure_organization(directory, target, org_id)
+            await _ensure_current_organizations(directory, source, target, org_id)
+            for table, criteria in tables:
+                copied = await _copy_rows(source, target, table, criteria)
+                print(f"copied {copied} rows from {table.name}")
+
+    async with directory_engine.begin() as directory:
+        await _record_assignment(directory, org_id, target_shard)
+
+    async with source_engine.begin() as source:
+        for table, criteria in reversed(tables):
+            await source.execute(delete(table).where(criteria))
+    print(f"Moved organization {org_id} from '{source_shard}' to '{target_shard}'")
+
+
+async def list_assignments() -> None:
+    await _load_map()
+    async with shard_engines[shard_map.default_shard].connect() as directory:
+        result = await directory.execute(select(Organization.id, Organization.slug).order_by(Organization.slug))
+        for org_id, slug in result:
+            print(f"{slug}\t{org_id}\t{shard_map.shard_for_org(org_id)}")
+
+
+async def _main(args: argparse.Namespace) -> None:
+    import_models()
+    try:
+        if args.command == "move":
+            await move_organization(uuid.UUID(args.organization_id), args.shard_id)
+        else:
+            await list_assignments()
+    finally:
+        for engine in shard_engines.values():
+            await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser("list", help="Show the shard of every organization")
+    move = subparsers.add_parser("move", help="Move an organization to another shard")
+    move.add_argument("organization_id")
+    move.add_argument("shard_id")
+    asyncio.run(_main(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+import asyncio
+import logging
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Mapper, ORMExecuteState, object_session
+
+from app.core.config import get_settings
+from app.db.queries import user_by_email
+from app.models.organization_shard import OrganizationShard
+from app.models.user import User
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Tables whose rows belong to a single organization and therefore live on that
+# organization's shard. Everything else stays in the default (directory) database.
+ORG_SCOPED_TABLES = {
+    "users",
+    "topics",
+    "allowed_email_domains",
+    "user_settings",
+    "generated_content",
+    "quiz_submissions",
+}
+
+
+class ShardMap:
+    def __init__(self, default_shard: str, shard_ids: Iterable[str]) -> None:
+        self.default_shard = default_shard
+        self.shard_ids: List[str] = list(dict.fromkeys([default_shard, *shard_ids]))
+        self._assignments: Dict[str, str] = {}
+
+    def shard_for_org(self, organization_id: Optional[Any]) -> str:
+        if not organization_id:
+            return self.default_shard
+        return self._assignments.get(str(organization_id), self.default_shard)
+
+    def assign(self, organization_id: Any, shard_id: str) -> None:
+        if shard_id not in self.shard_ids:
+            raise ValueError(f"Unknown shard '{shard_id}'")
+        self._assignments[str(organization_id)] = shard_id
+
+    async def load(self, session: AsyncSession) -> None:
+        result = await session.execute(select(OrganizationShard.organization_id, OrganizationShard.shard_id))
+        self._assignments = {
+            str(org_id): shard_id for org_id, shard_id in result if shard_id in self.shard_ids
+        }
+
+
+shard_map = ShardMap(settings.DEFAULT_SHARD_ID, settings.SHARD_DATABASE_URLS)
+
+
+def sharding_enabled() -> bool:
+    return bool(settings.SHARD_DATABASE_URLS)
+
+
+def shard_bind(organization_id: Optional[Any]) -> dict:
+    """Bind arguments routing a statement to the shard owning ``organization_id``."""
+
+    if not sharding_enabled():
+        return {}
+    return {"shard_id": shard_map.shard_for_org(organization_id)}
+
+
+def directory_bind() -> dict:
+    """Bind arguments for statements that must run on the default (directory) shard."""
+
+    if not sharding_enabled():
+        return {}
+    return {"shard_id": shard_map.default_shard}
+
+
+def _is_org_scoped(mapper: Optional[Mapper]) -> bool:
+    return mapper is not None and mapper.local_table.name in ORG_SCOPED_TABLES
+
+
+def _instance_org_id(instance: Any) -> Optional[Any]:
+    org_id = getattr(instance, "organization_id", None)
+    if org_id is None:
+        user = instance.__dict__.get("user")
+        org_id = getattr(user, "organization_id", None)
+    return org_id
+
+
+def _session_shard(session: Any) -> Optional[str]:
+    return session.info.get("shard_id") if session is not None else None
+
+
+def shard_chooser(mapper: Optional[Mapper], instance: Any, **kw: Any) -> str:
+    if not _is_org_scoped(mapper):
+        return shard_map.default_shard
+    if instance is not None:
+        org_id = _instance_org_id(instance)
+        if org_id is not None:
+            return shard_map.shard_for_org(org_id)
+    return _session_shard(object_session(instance) if instance is not None else None) or shard_map.default_shard
+
+
+def identity_chooser(
+    mapper: Mapper,
+    primary_key: Any,
+    *,
+    lazy_loaded_from: Any,
+    execution_options: Any,
+    bind_arguments: dict,
+    **kw: Any,
+) -> List[str]:
+    if lazy_loaded_from is not None and lazy_loaded_from.identity_token is not None:
+        return [lazy_loaded_from.identity_token]
+    if not _is_org_scoped(mapper):
+        return [shard_map.default_shard]
+    return shard_map.shard_ids
+
+
+def execute_chooser(context: ORMExecuteState) -> List[str]:
+    if not _is_org_scoped(context.bind_mapper):
+        return [shard_map.default_shard]
+    shard_id = _session_shard(context.session)
+    if shard_id:
+        return [shard_id]
+    if context.is_insert:
+        # Unrouted inserts are for rows without an organization.
+        return [shard_map.default_shard]
+    return shard_map.shard_ids
+
+
+def bind_session_to_org(session: AsyncSession, organization_id: Optional[Any]) -> None:
+    """Route unhinted org-scoped statements in ``session`` to one organization's shard."""
+
+    if sharding_enabled() and organization_id:
+        session.info["shard_id"] = shard_map.shard_for_org(organization_id)
+
+
+async def users_by_email(session: AsyncSession, email: str) -> List[User]:
+    """Every user with ``email`` on any shard.
+
+    The unique constraint only covers one shard's table, so callers creating or
+    authenticating users by email must look everywhere, whatever the session is bound to.
+    """
+
+    if not sharding_enabled():
+        result = await session.execute(user_by_email(email))
+        return list(result.scalars().all())
+    users: List[User] = []
+    for shard_id in shard_map.shard_ids:
+        result = await session.execute(user_by_email(email), bind_arguments={"shard_id": shard_id})
+        users.extend(result.scalars().all())
+    return users
+
+
+async def run_refresh_loop(session_factory: async_sessionmaker, interval_seconds: float) -> None:
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            async with session_factory() as session:
+                await shard_map.load(session)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Failed to refresh organization shard map")
@@ -0,0 +1,36 @@
+import uuid
+from typing import Any, Optional, Union
+
+from sqlalchemy.engine import Dialect
+from sqlalchemy.types import TypeDecorator, Uuid
+
+
+class UUID(TypeDecorator):
+    """UUID column that is native on PostgreSQL and CHAR(32) elsewhere.
+
+    Accepts UUID strings as well as ``uuid.UUID`` values in parameters and
+    returns ``uuid.UUID``, or the hyphenated string with ``as_uuid=False``.
+    A malformed string raises ``ValueError`` when the statement executes, so
+    routes must parse ids from requests with ``uuid.UUID`` first and answer
+    404 or 422 themselves.
+    """
+
+    impl = Uuid
+    cache_ok = True
+
+    def __init__(self, as_uuid: bool = True) -> None:
+        super().__init__(as_uuid=True)
+        self.as_uuid = as_uuid
+
+    def process_bind_param(self, value: Any, dialect: Dialect) -> Optional[uuid.UUID]:
+        if value is None or isinstance(value, uuid.UUID):
+            return value
+        try:
+            return uuid.UUID(str(value))
+        except ValueError:
+            raise ValueError(f"Malformed UUID {str(value)[:64]!r}; validate ids before querying") from None
+
+    def process_result_value(self, value: Optional[uuid.UUID], dialect: Dialect) -> Union[uuid.UUID, str, None]:
+        if value is None or self.as_uuid:
+            return value
+        return str(value)
@@ -0,0 +1,13 @@
+from typing import Any
+
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app.db.session import engine
+
+
+def insert(entity: Any) -> Any:
+    """``INSERT`` supporting ``on_conflict_do_update``/``on_conflict_do_nothing`` on the configured database."""
+
+    if engine.dialect.name == "sqlite":
+        return sqlite.insert(entity)
+    return postgresql.insert(entity)
@@ -0,0 +1,152 @@
+"""Startup warm-up of pool connections and hot statements, plus statement-reuse counters.
+
+The first requests after a deploy would otherwise pay for TCP/TLS setup and
+authentication, SQLAlchemy statement compilation, and (on asyncpg) a
+server-side prepare per connection. ``warm_up`` does that work before the
+worker takes traffic: it opens ``DB_WARM_CONNECTIONS`` connections per shard
+at once, and runs every statement in ``HOT_QUERIES`` on each of them through
+an ORM session, so both the compiled cache and each connection's
+prepared-statement cache are filled.
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.pool import QueuePool
+
+from app.core.config import get_settings
+from app.db.queries import HOT_QUERIES
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+class StatementCacheStats:
+    """Counts for SQLAlchemy's compiled cache and for statement reuse on each connection.
+
+    asyncpg does not expose its prepared-statement cache, so the counter below
+    mirrors it: each connection remembers the last ``DB_STATEMENT_CACHE_SIZE``
+    statements it ran. A statement it has already run counts as reused, and is
+    one asyncpg can serve without a new server-side prepare. Statements warmed
+    at startup count as reused on their first request.
+    """
+
+    def __init__(self) -> None:
+        self.compiled_hits = 0
+        self.compiled_misses = 0
+        self.reused = 0
+        self.first_runs = 0
+
+    def record(self, context: Any, seen: Optional["OrderedDict[str, None]"], statement: str) -> None:
+        cache_hit = getattr(context, "cache_hit", None)
+        if cache_hit is not None:
+            if cache_hit == context.dialect.CACHE_HIT:
+                self.compiled_hits += 1
+            elif cache_hit == context.dialect.CACHE_MISS:
+                self.compiled_misses += 1
+        if seen is None:
+            return
+        if statement in seen:
+            self.reused += 1
+            seen.move_to_end(statement)
+            return
+        self.first_runs += 1
+        seen[statement] = None
+        if len(seen) > settings.DB_STATEMENT_CACHE_SIZE:
+            seen.popitem(last=False)
+
+    @staticmethod
+    def _ratio(hits: int, misses: int) -> Optional[float]:
+        total = hits + misses
+        return round(hits / total, 4) if total else None
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "compiled_cache": {
+                "hits": self.compiled_hits,
+                "misses": self.compiled_misses,
+                "hit_ratio": self._ratio(self.compiled_hits, self.compiled_misses),
+            },
+            "connection_statement_reuse": {
+                "reused": self.reused,
+                "first_runs": self.first_runs,
+                "reuse_ratio": self._ratio(self.reused, self.first_runs),
+            },
+        }
+
+
+statement_cache_stats = StatementCacheStats()
+last_warm_up: Dict[str, Any] = {}
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _count_statement_cache(conn, cursor, statement, parameters, context, executemany) -> None:
+    if context is None:
+        return
+    seen = None
+    if conn.dialect.driver == "asyncpg" and settings.DB_STATEMENT_CACHE_SIZE > 0:
+        # ``info`` lives as long as the DBAPI connection, like asyncpg's own cache.
+        seen = conn.connection.info.setdefault("statements_run", OrderedDict())
+    statement_cache_stats.record(context, seen, statement)
+
+
+async def _warm_connection(engine: AsyncEngine) -> int:
+    async with engine.connect() as conn:
+        async with AsyncSession(bind=conn) as session:
+            for build, arguments in HOT_QUERIES:
+                await session.execute(build(*arguments))
+    return len(HOT_QUERIES)
+
+
+def _connection_count(engine: AsyncEngine) -> int:
+    pool = engine.pool
+    if not isinstance(pool, QueuePool):
+        # StaticPool and friends hold a single connection.
+        return min(settings.DB_WARM_CONNECTIONS, 1)
+    return min(settings.DB_WARM_CONNECTIONS, pool.size())
+
+
+async def warm_up(engines: Dict[str, AsyncEngine]) -> Dict[str, Any]:
+    """Open and prime pool connections on every shard; failures are logged, never raised."""
+
+    started = time.perf_counter()
+    shards: Dict[str, Any] = {}
+    for shard_id, engine in engines.items():
+        count = _connection_count(engine)
+        # Checking the connections out together forces the pool to open ``count`` distinct ones.
+        results = await asyncio.gather(*(_warm_connection(engine) for _ in range(count)), return_exceptions=True)
+        failures = [result for result in results if isinstance(result, BaseException)]
+        for failure in failures[:1]:
+            logger.warning("Warm-up of shard '%s' failed: %r", shard_id, failure)
+        shards[shard_id] = {"connections": count - len(failures), "failed": len(failures)}
+
+    last_warm_up.clear()
+    last_warm_up.update(
+        shards=shards,
+        statements=len(HOT_QUERIES),
+        duration_ms=round((time.perf_counter() - started) * 1000, 1),
+    )
+    logger.info("Database warm-up finished in %.0f ms: %s", last_warm_up["duration_ms"], shards)
+    return dict(last_warm_up)
+
+
+def pool_stats(engines: Dict[str, AsyncEngine]) -> Dict[str, Any]:
+    stats: Dict[str, Any] = {}
+    for shard_id, engine in engines.items():
+        pool = engine.pool
+        if isinstance(pool, QueuePool):
+            stats[shard_id] = {
+                "size": pool.size(),
+                "checked_in": pool.checkedin(),
+                "checked_out": pool.checkedout(),
+                "overflow": pool.overflow(),
+            }
+        else:
+            stats[shard_id] = {"status": pool.status()}
+    return stats
@@ -1,30 +1,74 @@
+import asyncio
 import json
 import logging
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from sqlalchemy import select
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.api import routes_admin, routes_ai, routes_auth, routes_organizations, routes_settings, routes_topics, routes_users
+from app.api import (
+    routes_admin,
+    routes_ai,
+    routes_auth,
+    routes_exports,
+    routes_library,
+    routes_organizations,
+    routes_quizzes,
+    routes_settings,
+    routes_topics,
+    routes_users,
+)
 from app.core.config import get_settings
+from app.core.deadline import DeadlineExceeded
+from app.core.idempotency import idempotency_store, run_purge_loop
+from app.core.invalidation import notify_supported, run_listener
+from app.core.logs import configure_logging
+from app.core.revocation import revocation_registry, run_sync_loop
+from app.core.usage import usage_recorder
 from app.db.base import Base, import_models
-from app.db.session import AsyncSessionLocal, engine
+from app.db.errors import is_statement_timeout
+from app.db.readiness import readiness_probe
+from app.db.session import AsyncSessionLocal, listener_connect_params, shard_engines
+from app.db.sharding import run_refresh_loop, shard_map, sharding_enabled
+from app.db.warmup import warm_up
+from app.middleware.deadline import DeadlineMiddleware
+from app.middleware.idempotency import IdempotencyMiddleware
+from app.middleware.load_shedding import LoadSheddingMiddleware
+from app.middleware.profiling import ProfilingMiddleware
+from app.middleware.request_logging import RequestLoggingMiddleware
+from app.middleware.tracing import TracingMiddleware
 from app.models.allowed_email_domain import AllowedEmailDomain
+from app.utils.email_sender import OutboxSender
 
 settings = get_settings()
-logging.basicConfig(level=logging.INFO)
+configure_logging()
 logger = logging.getLogger(__name__)
 
 app = FastAPI(title=settings.APP_NAME, debug=settings.DEBUG)
+background_tasks: list[asyncio.Task] = []
 
+# Middleware added first runs innermost: request logging wraps everything so every response
+# carries a request ID and is timed end to end; tracing's root span sits just inside it. CORS
+# wraps load shedding, which wraps deadlines, so shed and timed-out responses still carry CORS
+# headers. Profiling sits inside the deadline's handler task so it sees the request's context.
+# Idempotency is innermost so a request waiting on its original stays within its own deadline.
+app.add_middleware(IdempotencyMiddleware)
+app.add_middleware(ProfilingMiddleware)
+app.add_middleware(DeadlineMiddleware)
+app.add_middleware(LoadSheddingMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.ALLOWED_ORIGINS,
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Request-ID", "X-Trace-Id"],
 )
+app.add_middleware(TracingMiddleware)
+app.add_middleware(RequestLoggingMiddleware)
 
 app.include_router(routes_auth.router)
 app.include_router(routes_users.router)
@@ -33,6 +77,21 @@ app.include_router(routes_topics.router)
 app.include_router(routes_ai.router)
 app.include_router(routes_settings.router)
 app.include_router(routes_admin.router)
+app.include_router(routes_library.router)
+app.include_router(routes_quizzes.router)
+app.include_router(routes_exports.router)
+
+
+@app.exception_handler(DeadlineExceeded)
+async def deadline_exceeded_handler(request: Request, exc: DeadlineExceeded) -> JSONResponse:
+    return JSONResponse({"detail": "Request deadline exceeded"}, status_code=status.HTTP_504_GATEWAY_TIMEOUT)
+
+
+@app.exception_handler(DBAPIError)
+async def database_error_handler(request: Request, exc: DBAPIError) -> JSONResponse:
+    if not is_statement_timeout(exc):
+        raise exc
+    return JSONResponse({"detail": "Request deadline exceeded"}, status_code=status.HTTP_504_GATEWAY_TIMEOUT)
 
 
 def _normalize_allowed_domains(raw_domains: object) -> list[str]:
@@ -53,8 +112,30 @@ def _normalize_allowed_domains(raw_domains: object) -> list[str]:
 async def on_startup() -> None:
     import_models()
 
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    for shard_engine in shard_engines.values():
+        async with shard_engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+    await warm_up(shard_engines)
+
+    async with AsyncSessionLocal() as session:
+        await revocation_registry.sync(session)
+        if sharding_enabled():
+            await shard_map.load(session)
+    if sharding_enabled():
+        background_tasks.append(
+            asyncio.create_task(run_refresh_loop(AsyncSessionLocal, settings.SHARD_MAP_REFRESH_SECONDS))
+        )
+    if notify_supported():
+        background_tasks.append(asyncio.create_task(run_listener(*listener_connect_params())))
+    background_tasks.append(asyncio.create_task(usage_recorder.run()))
+    background_tasks.append(
+        asyncio.create_task(run_purge_loop(idempotency_store, settings.IDEMPOTENCY_PURGE_SECONDS))
+    )
+    if settings.SMTP_HOST:
+        background_tasks.append(asyncio.create_task(OutboxSender(AsyncSessionLocal).run()))
+    background_tasks.append(
+        asyncio.create_task(run_sync_loop(AsyncSessionLocal, settings.REVOCATION_SYNC_SECONDS))
+    )
 
     default_domains = _normalize_allowed_domains(settings.DEFAULT_ALLOWED_DOMAINS)
     if not default_domains:
@@ -73,6 +154,22 @@ async def on_startup() -> None:
                 logger.exception("Failed to seed default allowed domains")
 
 
+@app.on_event("shutdown")
+async def on_shutdown() -> None:
+    for task in background_tasks:
+        task.cancel()
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+    background_tasks.clear()
+
+
 @app.get("/health")
 async def health() -> dict:
     return {"status": "ok", "app": settings.APP_NAME}
+
+
+@app.get("/ready")
+async def ready(response: Response) -> dict:
+    result = await readiness_probe.check()
+    if not result["ready"]:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return result
@@ -0,0 +1,73 @@
+import asyncio
+import contextlib
+
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core import deadline
+
+
+class DeadlineMiddleware:
+    """Runs each request under its deadline and cancels it when the client goes away.
+
+    The request body is pumped into a queue so ``http.disconnect`` is seen
+    while the handler is still working; cancelling the handler unwinds its
+    dependencies, which closes the database session.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        budget = deadline.request_budget(scope["path"], Headers(scope=scope))
+        queue: "asyncio.Queue[Message]" = asyncio.Queue()
+        response_started = False
+        response_complete = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal response_started, response_complete
+            if message["type"] == "http.response.start":
+                response_started = True
+            elif message["type"] == "http.response.body" and not message.get("more_body", False):
+                response_complete = True
+            await send(message)
+
+        token = deadline.start(budget)
+        try:
+            handler = asyncio.ensure_future(self.app(scope, queue.get, send_wrapper))
+        finally:
+            deadline.reset(token)
+
+        async def pump() -> None:
+            while True:
+                message = await receive()
+                await queue.put(message)
+                if message["type"] == "http.disconnect":
+                    if not response_complete:
+                        handler.cancel()
+                    return
+
+        pump_task = asyncio.ensure_future(pump())
+        try:
+            done, _ = await asyncio.wait({handler}, timeout=budget)
+            if not done:
+                handler.cancel()
+                with contextlib.suppress(asyncio.CancelledError):
+                    await handler
+                if not response_started:
+                    response = JSONResponse({"detail": "Request deadline exceeded"}, status_code=504)
+                    await response(scope, queue.get, send)
+                return
+            if handler.cancelled():
+                return
+            handler.result()
+        except asyncio.CancelledError:
+            handler.cancel()
+            raise
+        finally:
+            pump_task.cancel()
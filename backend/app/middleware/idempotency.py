@@ -0,0 +1,187 @@
+import asyncio
+import time
+import uuid
+from typing import List, Optional
+
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse, Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core import deadline
+from app.core.config import get_settings
+from app.core.idempotency import (
+    ACQUIRED,
+    COMPLETED,
+    MISMATCH,
+    IdempotencyStore,
+    idempotency_store,
+    request_fingerprint,
+)
+from app.core.revocation import revocation_registry
+from app.core.security import decode_token
+
+settings = get_settings()
+
+IDEMPOTENCY_HEADER = "idempotency-key"
+REPLAYED_HEADER = "idempotent-replayed"
+# Headers describing this particular response rather than its content.
+_UNSTORED_HEADERS = {b"date", b"server", b"server-timing", b"x-profile-id", b"set-cookie"}
+
+
+def _caller_id(headers: Headers) -> Optional[uuid.UUID]:
+    scheme, _, token = headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        payload = decode_token(token)
+        user_id = uuid.UUID(payload.sub)
+    except ValueError:
+        return None
+    if revocation_registry.is_family_revoked(payload.sid):
+        return None
+    return user_id
+
+
+# Answers that depend on the caller's credentials or on state that may change before the retry.
+_UNSTORED_STATUSES = {401, 403, 409, 412, 429}
+
+
+def _should_store(status_code: int) -> bool:
+    # Server errors, auth failures, conflicts and rate limits are worth retrying for real.
+    return status_code < 500 and status_code not in _UNSTORED_STATUSES
+
+
+class IdempotencyMiddleware:
+    """Makes ``POST`` requests carrying ``Idempotency-Key`` safe to retry.
+
+    Keys are scoped to the authenticated user. Requests without a valid bearer
+    token, and ``/auth/*``, pass through untouched; the route itself rejects
+    unauthenticated calls.
+    """
+
+    def __init__(self, app: ASGIApp, store: IdempotencyStore = idempotency_store) -> None:
+        self.app = app
+        self.store = store
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"].startswith("/auth/"):
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        key = headers.get(IDEMPOTENCY_HEADER)
+        user_id = _caller_id(headers) if key else None
+        if user_id is None:
+            await self.app(scope, receive, send)
+            return
+        if len(key) > 255:
+            response = JSONResponse({"detail": "Idempotency-Key must be at most 255 characters"}, status_code=400)
+            await response(scope, receive, send)
+            return
+
+        body = await self._read_body(receive)
+        if body is None:
+            return
+        fingerprint = request_fingerprint(scope["method"], scope["path"], scope.get("query_string", b""), body)
+        left = deadline.remaining()
+        if left is None:
+            lock_seconds, wait_seconds = settings.IDEMPOTENCY_LOCK_SECONDS, settings.IDEMPOTENCY_WAIT_SECONDS
+        else:
+            # The original cannot outlive its deadline, so neither needs the lock nor a waiter.
+            lock_seconds, wait_seconds = left + 5, min(settings.IDEMPOTENCY_WAIT_SECONDS, left)
+        wait_until = time.monotonic() + wait_seconds
+
+        attempt = 0
+        while True:
+            outcome, record = await self.store.begin(user_id, key, fingerprint, lock_seconds)
+            if outcome == ACQUIRED:
+                await self._run(scope, body, receive, send, user_id, key)
+                return
+            if outcome == MISMATCH:
+                response = JSONResponse(
+                    {"detail": "Idempotency-Key was already used for a different request"}, status_code=422
+                )
+                await response(scope, receive, send)
+                return
+            if outcome == COMPLETED:
+                response = Response(content=record.response_body or b"", status_code=record.response_status)
+                response.raw_headers = [
+                    (name.encode("latin-1"), value.encode("latin-1")) for name, value in record.response_headers or []
+                ] + [(REPLAYED_HEADER.encode("latin-1"), b"true")]
+                await response(scope, receive, send)
+                return
+            if time.monotonic() >= wait_until:
+                response = JSONResponse(
+                    {"detail": "A request with this Idempotency-Key is still in progress"},
+                    status_code=409,
+                    headers={"Retry-After": "1"},
+                )
+                await response(scope, receive, send)
+                return
+            await self.store.wait(user_id, key, attempt)
+            attempt += 1
+
+    @staticmethod
+    async def _read_body(receive: Receive) -> Optional[bytes]:
+        chunks: List[bytes] = []
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return None
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                return b"".join(chunks)
+
+    async def _run(
+        self, scope: Scope, body: bytes, receive: Receive, send: Send, user_id: uuid.UUID, key: str
+    ) -> None:
+        body_sent = False
+
+        async def replay_receive() -> Message:
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        status_code = 500
+        stored_headers: List[List[str]] = []
+        chunks: List[bytes] = []
+        size = 0
+        complete = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code, size, complete
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                stored_headers.extend(
+                    [name.decode("latin-1"), value.decode("latin-1")]
+                    for name, value in message.get("headers", [])
+                    if name.lower() not in _UNSTORED_HEADERS
+                )
+            elif message["type"] == "http.response.body":
+                chunk = message.get("body", b"")
+                size += len(chunk)
+                if size <= settings.IDEMPOTENCY_MAX_RESPONSE_BYTES:
+                    chunks.append(chunk)
+                complete = not message.get("more_body", False)
+            await send(message)
+
+        try:
+            await self.app(scope, replay_receive, send_wrapper)
+        except BaseException:
+            # Cancellation (deadline or disconnect) must still free the key for the next retry,
+            # so the release runs without the deadline that has just expired.
+            token = deadline.start(None)
+            try:
+                await asyncio.shield(self.store.release(user_id, key))
+            finally:
+                deadline.reset(token)
+            raise
+        token = deadline.start(None)
+        try:
+            if complete and _should_store(status_code) and size <= settings.IDEMPOTENCY_MAX_RESPONSE_BYTES:
+                await self.store.complete(user_id, key, status_code, stored_headers, b"".join(chunks))
+            else:
+                await self.store.release(user_id, key)
+        finally:
+            deadline.reset(token)
@@ -0,0 +1,40 @@
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.config import get_settings
+from app.core.load import LoadMonitor, load_monitor, request_priority
+
+settings = get_settings()
+
+
+class LoadSheddingMiddleware:
+    """Rejects requests with 503 and ``Retry-After`` while the worker is overloaded.
+
+    Lower-priority requests are shed at a fraction of the configured limits so
+    AI generation backs off before reads and auth are affected.
+    """
+
+    def __init__(self, app: ASGIApp, monitor: LoadMonitor = load_monitor) -> None:
+        self.app = app
+        self.monitor = monitor
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        priority = request_priority(scope["method"], scope["path"])
+        if priority is not None and self.monitor.should_shed(priority):
+            response = JSONResponse(
+                {"detail": "Server is busy, please retry"},
+                status_code=503,
+                headers={"Retry-After": str(settings.LOAD_SHED_RETRY_AFTER_SECONDS)},
+            )
+            await response(scope, receive, send)
+            return
+
+        self.monitor.in_flight += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.monitor.in_flight -= 1
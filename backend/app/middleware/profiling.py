@@ -0,0 +1,44 @@
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import get_settings
+from app.core.profiling import PROFILE_MODES, ProfileSession, RequestProfile, is_authorized, profile_store
+
+settings = get_settings()
+
+
+class ProfilingMiddleware:
+    """Profiles requests that ask for it with ``X-Profile``; all others only pay a header lookup."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not settings.PROFILING_ENABLED:
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        mode = headers.get("x-profile", "").lower()
+        if mode not in PROFILE_MODES or not is_authorized(scope["method"], scope["path"], headers):
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile(method=scope["method"], path=scope["path"], mode=mode)
+        session = ProfileSession(profile)
+        if not session.start():
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                profile.status_code = message["status"]
+                session.checkpoint()
+                response_headers = MutableHeaders(scope=message)
+                response_headers["X-Profile-Id"] = profile.id
+                response_headers.append("Server-Timing", profile.server_timing())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profile_store.add(session.finish())
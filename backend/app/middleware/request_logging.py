@@ -0,0 +1,86 @@
+import logging
+import random
+import re
+import time
+import uuid
+
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import get_settings
+from app.core.logs import request_id_var
+
+settings = get_settings()
+logger = logging.getLogger("app.access")
+
+REQUEST_ID_HEADER = "x-request-id"
+_VALID_REQUEST_ID = re.compile(r"^[A-Za-z0-9._:-]{1,128}$")
+
+
+def _route_path(scope: Scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or "<unmatched>"
+
+
+def _sample_rate(route_path: str) -> float:
+    return settings.LOG_ACCESS_SAMPLE_RATES.get(route_path, settings.LOG_ACCESS_SAMPLE_RATE)
+
+
+class RequestLoggingMiddleware:
+    """Assigns each request an ID and writes a sampled access log line when it finishes.
+
+    The ID comes from ``X-Request-ID`` when the client sends a well-formed one.
+    It is echoed in the response and attached to every log record written
+    while the request runs. Access lines are sampled at the route's rate from
+    ``LOG_ACCESS_SAMPLE_RATES`` (default ``LOG_ACCESS_SAMPLE_RATE``). Server
+    errors and requests slower than ``LOG_SLOW_REQUEST_MS`` are always logged.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        supplied = Headers(scope=scope).get(REQUEST_ID_HEADER, "")
+        request_id = supplied if _VALID_REQUEST_ID.match(supplied) else uuid.uuid4().hex
+        token = request_id_var.set(request_id)
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((REQUEST_ID_HEADER.encode("latin-1"), request_id.encode("latin-1")))
+                message["headers"] = headers
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            route_path = _route_path(scope)
+            rate = _sample_rate(route_path)
+            always = status_code >= 500 or elapsed_ms >= settings.LOG_SLOW_REQUEST_MS
+            if always or (rate > 0 and random.random() < rate):
+                logger.info(
+                    "%s %s %d %.1fms",
+                    scope["method"],
+                    scope["path"],
+                    status_code,
+                    elapsed_ms,
+                    extra={
+                        "method": scope["method"],
+                        "path": scope["path"],
+                        "route": route_path,
+                        "status": status_code,
+                        "duration_ms": round(elapsed_ms, 1),
+                        "client": scope["client"][0] if scope.get("client") else None,
+                        "sample_rate": 1.0 if always else rate,
+                    },
+                )
+            request_id_var.reset(token)
@@ -0,0 +1,53 @@
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.logs import request_id_var
+from app.core.tracing import activate, start_trace, trace_exporter, tracing_enabled
+
+TRACE_ID_HEADER = b"x-trace-id"
+
+
+class TracingMiddleware:
+    """Opens the root span of sampled requests and hands the finished trace to the exporter."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not tracing_enabled():
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        root = start_trace(
+            f"{scope['method']} {scope['path']}",
+            headers.get("traceparent"),
+            {"http.method": scope["method"], "http.target": scope["path"], "request_id": request_id_var.get() or ""},
+        )
+        if root is None:
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [
+                    (TRACE_ID_HEADER, root.trace.trace_id.encode("latin-1"))
+                ]
+            await send(message)
+
+        try:
+            with activate(root):
+                await self.app(scope, receive, send_wrapper)
+        finally:
+            route = getattr(scope.get("route"), "path", None)
+            if route:
+                root.name = f"{scope['method']} {route}"
+                root.set_attribute("http.route", route)
+            root.set_attribute("http.status_code", status_code)
+            if status_code >= 500 and root.error is None:
+                root.error = f"HTTP {status_code}"
+            root.finish()
+            trace_exporter.submit(root.trace)
@@ -0,0 +1,44 @@
+import uuid
+from datetime import datetime
+
+from sqlalchemy import Boolean, Column, Date, DateTime, Integer, String
+
+from app.db.base import Base
+from app.db.types import UUID
+
+
+class AIUsageEvent(Base):
+    __tablename__ = "ai_usage_events"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(UUID(as_uuid=True), index=True, nullable=False)
+    organization_id = Column(UUID(as_uuid=True), index=True, nullable=True)
+    endpoint = Column(String(50), nullable=False)
+    provider = Column(String(50), nullable=False)
+    model = Column(String(100), nullable=False)
+    input_chars = Column(Integer, nullable=False)
+    output_chars = Column(Integer, nullable=False)
+    latency_ms = Column(Integer, nullable=False)
+    cache_hit = Column(Boolean, default=False, nullable=False)
+
+    created_at = Column(DateTime, default=datetime.utcnow, index=True, nullable=False)
+
+
+class AIUsageDaily(Base):
+    """Daily rollup; ``id`` is derived from the grouping key so flushes can upsert."""
+
+    __tablename__ = "ai_usage_daily"
+
+    id = Column(UUID(as_uuid=True), primary_key=True)
+    day = Column(Date, index=True, nullable=False)
+    user_id = Column(UUID(as_uuid=True), index=True, nullable=False)
+    organization_id = Column(UUID(as_uuid=True), index=True, nullable=True)
+    endpoint = Column(String(50), nullable=False)
+    provider = Column(String(50), nullable=False)
+    model = Column(String(100), nullable=False)
+
+    calls = Column(Integer, default=0, nullable=False)
+    cache_hits = Column(Integer, default=0, nullable=False)
+    input_chars = Column(Integer, default=0, nullable=False)
+    output_chars = Column(Integer, default=0, nullable=False)
+    latency_ms_total = Column(Integer, default=0, nullable=False)
@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Float, Integer, String
+
+from app.db.base import Base
+
+
+class AuthThrottle(Base):
+    """Shared state for one throttle key when ``AUTH_THROTTLE_BACKEND`` is ``database``.
+
+    Times are Unix timestamps so every worker computes windows the same way.
+    """
+
+    __tablename__ = "auth_throttle"
+
+    key = Column(String(320), primary_key=True)
+    window_started_at = Column(Float, nullable=False)
+    current_count = Column(Integer, default=0, nullable=False)
+    previous_count = Column(Integer, default=0, nullable=False)
+    strikes = Column(Integer, default=0, nullable=False)
+    last_strike_at = Column(Float, default=0.0, nullable=False)
+    blocked_until = Column(Float, default=0.0, nullable=False)
+    updated_at = Column(Float, index=True, nullable=False)
@@ -0,0 +1,24 @@
+import uuid
+from datetime import datetime
+
+from sqlalchemy import JSON, Column, DateTime, Integer, String, Text
+
+from app.db.base import Base
+from app.db.types import UUID
+
+
+class EmailOutbox(Base):
+    __tablename__ = "email_outbox"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    recipients = Column(JSON, nullable=False)
+    subject = Column(String(255), nullable=False)
+    body = Column(Text, nullable=False)
+
+    status = Column(String(20), default="pending", index=True, nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    next_attempt_at = Column(DateTime, default=datetime.utcnow, index=True, nullable=False)
+    last_error = Column(Text, nullable=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    sent_at = Column(DateTime, nullable=True)
@@ -0,0 +1,30 @@
+import uuid
+from datetime import datetime
+
+from sqlalchemy import JSON, Column, DateTime, ForeignKey, Index, String
+from sqlalchemy.orm import relationship
+
+from app.db.base import Base
+from app.db.types import UUID
+
+
+class GeneratedContent(Base):
+    __tablename__ = "generated_content"
+    __table_args__ = (Index("ix_generated_content_org_created", "organization_id", "created_at"),)
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    organization_id = Column(UUID(as_uuid=True), ForeignKey("organizations.id"), nullable=True)
+    topic_id = Column(UUID(as_uuid=True), ForeignKey("topics.id", ondelete="SET NULL"), index=True, nullable=True)
+    created_by_user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
+
+    kind = Column(String(20), nullable=False)
+    model = Column(String(100), nullable=False)
+    content_hash = Column(String(64), unique=True, nullable=False)
+    title = Column(String(255), nullable=False)
+    input = Column(JSON, nullable=False)
+    content = Column(JSON, nullable=False)
+
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    organization = relationship("Organization")
+    topic = relationship("Topic")
@@ -0,0 +1,25 @@
+from datetime import datetime
+
+from sqlalchemy import JSON, Column, DateTime, Integer, LargeBinary, String
+
+from app.db.base import Base
+from app.db.types import UUID
+
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+
+    # Lives in the directory database, so user_id is not a foreign key.
+    user_id = Column(UUID(as_uuid=True), primary_key=True)
+    key = Column(String(255), primary_key=True)
+    fingerprint = Column(String(64), nullable=False)
+
+    # "pending" while the first request runs, then "completed" with the stored response.
+    status = Column(String(20), default="pending", nullable=False)
+    locked_until = Column(DateTime, nullable=False)
+    response_status = Column(Integer, nullable=True)
+    response_headers = Column(JSON, nullable=True)
+    response_body = Column(LargeBinary, nullable=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    expires_at = Column(DateTime, index=True, nullable=False)
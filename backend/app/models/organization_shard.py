@@ -0,0 +1,15 @@
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, String
+
+from app.db.base import Base
+from app.db.types import UUID
+
+
+class OrganizationShard(Base):
+    __tablename__ = "organization_shards"
+
+    organization_id = Column(UUID(as_uuid=True), primary_key=True)
+    shard_id = Column(String(64), nullable=False)
+
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
@@ -0,0 +1,26 @@
+import uuid
+from datetime import datetime
+
+from sqlalchemy import JSON, Column, DateTime, Float, ForeignKey, Integer, String, UniqueConstraint
+
+from app.db.base import Base
+from app.db.types import UUID
+
+
+class QuizSubmission(Base):
+    __tablename__ = "quiz_submissions"
+    __table_args__ = (UniqueConstraint("content_id", "student_id", name="uq_quiz_submissions_content_student"),)
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    content_id = Column(UUID(as_uuid=True), ForeignKey("generated_content.id", ondelete="CASCADE"), nullable=False)
+    organization_id = Column(UUID(as_uuid=True), ForeignKey("organizations.id"), nullable=True)
+    submitted_by_user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
+    # Roster identifier supplied by the teacher; students do not need accounts.
+    student_id = Column(String(255), nullable=False)
+
+    # Chosen option index per question, -1 for a blank or unrecognised answer.
+    choices = Column(JSON, nullable=False)
+    correct = Column(Integer, nullable=False)
+    score = Column(Float, nullable=False)
+
+    submitted_at = Column(DateTime, default=datetime.utcnow, nullable=False)
@@ -0,0 +1,21 @@
+import uuid
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime
+
+from app.db.base import Base
+from app.db.types import UUID
+
+
+class RefreshToken(Base):
+    __tablename__ = "refresh_tokens"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    family_id = Column(UUID(as_uuid=True), index=True, nullable=False, default=uuid.uuid4)
+    # Lives in the directory database with the shard map, so users may be on another shard.
+    user_id = Column(UUID(as_uuid=True), index=True, nullable=False)
+    replaced_by_id = Column(UUID(as_uuid=True), nullable=True)
+    expires_at = Column(DateTime, nullable=False)
+    revoked_at = Column(DateTime, index=True, nullable=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
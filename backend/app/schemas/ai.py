@@ -7,6 +7,7 @@ class LessonInput(BaseModel):
     topic: str
     grade: str
     objectives: List[str]
+    topic_id: Optional[str] = None
 
 
 class Lesson(BaseModel):
@@ -26,6 +27,7 @@ class QuizQuestion(BaseModel):
 class QuizInput(BaseModel):
     topic: str
     num_questions: int = 5
+    topic_id: Optional[str] = None
 
 
 class Quiz(BaseModel):
@@ -36,6 +38,7 @@ class Quiz(BaseModel):
 class WorksheetInput(BaseModel):
     topic: str
     grade: str
+    topic_id: Optional[str] = None
 
 
 class Worksheet(BaseModel):
@@ -52,6 +55,7 @@ class RubricCriterion(BaseModel):
 class RubricInput(BaseModel):
     assignment_type: str
     description: Optional[str] = None
+    topic_id: Optional[str] = None
 
 
 class Rubric(BaseModel):
@@ -61,8 +65,53 @@ class Rubric(BaseModel):
 
 class TextToolInput(BaseModel):
     mode: str
-    text: str
+    text: str = ""
+    texts: Optional[List[str]] = None
+    target_grade: Optional[float] = None
+
+
+class TextStats(BaseModel):
+    words: int
+    sentences: int
+    letters: int
+    syllables: int
+    unique_words: int
+    polysyllabic_words: int
+    avg_words_per_sentence: float
+    avg_syllables_per_word: float
+    avg_word_length: float
+    lexical_diversity: float
+
+
+class Readability(BaseModel):
+    flesch_reading_ease: float
+    flesch_kincaid_grade: float
+    automated_readability_index: float
+    smog_index: float
+
+
+class Keyword(BaseModel):
+    term: str
+    count: int
+    score: float
+
+
+class VocabularyProfile(BaseModel):
+    basic: float
+    intermediate: float
+    advanced: float
+    estimated_grade: float
+    advanced_words: List[str]
+    above_target_grade: Optional[bool] = None
+
+
+class TextAnalysis(BaseModel):
+    stats: Optional[TextStats] = None
+    readability: Optional[Readability] = None
+    keywords: Optional[List[Keyword]] = None
+    vocabulary: Optional[VocabularyProfile] = None
 
 
 class TextToolResult(BaseModel):
     output: str
+    analyses: Optional[List[TextAnalysis]] = None
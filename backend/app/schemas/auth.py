@@ -18,7 +18,10 @@ class TokenPayload(BaseModel):
     email: EmailStr
     role: str
     org: Optional[str] = None
+    home: Optional[str] = None
     exp: int
+    jti: Optional[str] = None
+    sid: Optional[str] = None
 
 
 class LoginRequest(BaseModel):
@@ -36,6 +39,10 @@ class RefreshRequest(BaseModel):
     refresh_token: str = Field(..., alias="refresh_token")
 
 
+class LogoutRequest(BaseModel):
+    refresh_token: str
+
+
 class AdminCreateUserRequest(BaseModel):
     email: EmailStr
     password: str
@@ -0,0 +1,25 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel
+
+
+class LibraryItemSummary(BaseModel):
+    id: str
+    kind: str
+    model: str
+    title: str
+    organization_id: Optional[str] = None
+    topic_id: Optional[str] = None
+    created_by_user_id: str
+    created_at: datetime
+
+
+class LibraryItem(LibraryItemSummary):
+    input: Dict[str, Any]
+    content: Dict[str, Any]
+
+
+class LibraryPage(BaseModel):
+    items: List[LibraryItemSummary]
+    next_cursor: Optional[str] = None
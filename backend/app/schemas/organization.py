@@ -1,7 +1,8 @@
+import uuid
 from datetime import datetime
-from typing import Optional
+from typing import Any, Optional
 
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, field_validator
 
 
 class OrganizationBase(BaseModel):
@@ -20,3 +21,8 @@ class OrganizationRead(OrganizationBase):
     id: str
     created_at: datetime
     updated_at: datetime
+
+    @field_validator("id", mode="before")
+    @classmethod
+    def _uuid_to_str(cls, value: Any) -> Any:
+        return str(value) if isinstance(value, uuid.UUID) else value
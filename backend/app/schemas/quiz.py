@@ -0,0 +1,47 @@
+from typing import List, Optional, Union
+
+from pydantic import BaseModel, Field, StrictInt
+
+
+class QuizAnswers(BaseModel):
+    student_id: str = Field(..., min_length=1, max_length=255)
+    # Option index or option text per question; null or a missing trailing answer is left blank.
+    answers: List[Optional[Union[StrictInt, str]]]
+
+
+class QuizSubmissionBatch(BaseModel):
+    submissions: List[QuizAnswers] = Field(..., min_length=1)
+
+
+class StudentResult(BaseModel):
+    student_id: str
+    correct: int
+    answered: int
+    score: float
+
+
+class OptionStats(BaseModel):
+    option: str
+    is_answer: bool
+    picks: int
+    share: float
+    mean_score: Optional[float] = None
+
+
+class QuestionStats(BaseModel):
+    question: str
+    difficulty: float
+    discrimination: Optional[float] = None
+    omitted: int
+    options: List[OptionStats]
+
+
+class QuizGradeReport(BaseModel):
+    content_id: str
+    students: int
+    questions: int
+    mean_score: float
+    median_score: float
+    reliability: Optional[float] = None
+    results: List[StudentResult]
+    question_stats: List[QuestionStats]
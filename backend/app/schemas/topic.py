@@ -1,7 +1,8 @@
+import uuid
 from datetime import datetime
-from typing import List, Optional
+from typing import Any, List, Optional
 
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, field_validator
 
 
 class TopicBase(BaseModel):
@@ -13,7 +14,7 @@ class TopicBase(BaseModel):
 
 
 class TopicCreate(TopicBase):
-    pass
+    allow_duplicate: bool = False
 
 
 class TopicRead(TopicBase):
@@ -22,6 +23,22 @@ class TopicRead(TopicBase):
     created_at: datetime
     updated_at: datetime
 
+    @field_validator("id", "created_by_user_id", "organization_id", mode="before")
+    @classmethod
+    def _uuid_to_str(cls, value: Any) -> Any:
+        return str(value) if isinstance(value, uuid.UUID) else value
+
 
 class TopicListResponse(BaseModel):
     topics: List[TopicRead]
+
+
+class SimilarTopic(BaseModel):
+    id: str
+    title: str
+    description: Optional[str] = None
+    score: float
+
+
+class SimilarTopicsResponse(BaseModel):
+    topics: List[SimilarTopic]
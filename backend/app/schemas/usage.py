@@ -0,0 +1,24 @@
+from datetime import date
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+
+class AIUsageRow(BaseModel):
+    day: date
+    endpoint: str
+    provider: str
+    model: str
+    user_id: Optional[str] = None
+    calls: int
+    cache_hits: int
+    input_chars: int
+    output_chars: int
+    avg_latency_ms: float
+
+
+class AIUsageReport(BaseModel):
+    organization_id: Optional[str] = None
+    start: date
+    end: date
+    rows: List[AIUsageRow]
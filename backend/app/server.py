@@ -0,0 +1,100 @@
+"""Production entry point.
+
+Usage::
+
+    python -m app.server
+
+Runs the app under gunicorn with one uvicorn worker per core (uvloop event
+loop, httptools parser). The app is imported once in the master before the
+workers fork; database connections are only opened inside each worker on
+startup. SIGTERM stops accepting connections and gives in-flight requests
+``SERVER_GRACEFUL_TIMEOUT`` seconds to finish before workers are killed.
+"""
+
+import importlib.util
+import multiprocessing
+import os
+from typing import Any, Dict
+
+from gunicorn.app.base import BaseApplication
+from uvicorn_worker import UvicornWorker
+
+from app.core.config import get_settings
+from app.core.logs import route_server_loggers
+
+settings = get_settings()
+
+
+def _available(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+class MegalaiWorker(UvicornWorker):
+    CONFIG_KWARGS = {
+        "loop": "uvloop" if _available("uvloop") else "asyncio",
+        "http": "httptools" if _available("httptools") else "h11",
+        "lifespan": "on",
+    }
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        # The base worker points uvicorn's loggers at gunicorn's handlers, which logging setup emptied.
+        route_server_loggers()
+
+
+def cpu_count() -> int:
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return multiprocessing.cpu_count()
+
+
+def worker_count() -> int:
+    """``SERVER_WORKERS`` when set, otherwise cores × ``SERVER_WORKERS_PER_CORE`` within bounds."""
+
+    if settings.SERVER_WORKERS > 0:
+        return settings.SERVER_WORKERS
+    workers = round(cpu_count() * settings.SERVER_WORKERS_PER_CORE)
+    return max(1, min(workers, settings.SERVER_MAX_WORKERS))
+
+
+def gunicorn_options() -> Dict[str, Any]:
+    port = int(os.environ.get("PORT", settings.SERVER_PORT))
+    return {
+        "bind": f"{settings.SERVER_HOST}:{port}",
+        "workers": worker_count(),
+        "worker_class": MegalaiWorker,
+        "preload_app": True,
+        "graceful_timeout": settings.SERVER_GRACEFUL_TIMEOUT,
+        "timeout": settings.SERVER_TIMEOUT,
+        "keepalive": settings.SERVER_KEEPALIVE,
+        "backlog": settings.SERVER_BACKLOG,
+        "max_requests": settings.SERVER_MAX_REQUESTS,
+        "max_requests_jitter": settings.SERVER_MAX_REQUESTS_JITTER,
+        "forwarded_allow_ips": settings.SERVER_FORWARDED_ALLOW_IPS,
+        "accesslog": "-" if settings.SERVER_ACCESS_LOG else None,
+        "errorlog": "-",
+    }
+
+
+class MegalaiServer(BaseApplication):
+    def __init__(self, options: Dict[str, Any]) -> None:
+        self.options = options
+        super().__init__()
+
+    def load_config(self) -> None:
+        for key, value in self.options.items():
+            if value is not None and key in self.cfg.settings:
+                self.cfg.set(key, value)
+
+    def load(self) -> Any:
+        from app.main import app
+
+        return app
+
+
+def main() -> None:
+    MegalaiServer(gunicorn_options()).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,158 @@
+import asyncio
 import logging
-from typing import List
+import uuid
+from datetime import datetime, timedelta
+from email.message import EmailMessage
+from typing import Any, Dict, List, Optional, Tuple
 
+import aiosmtplib
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import get_settings
+from app.models.email_outbox import EmailOutbox
+
+settings = get_settings()
 logger = logging.getLogger(__name__)
 
+MAX_RETRY_DELAY = timedelta(hours=6)
+
+
+def send_email(db: AsyncSession, to: List[str], subject: str, body: str) -> EmailOutbox:
+    """Queue an email in the outbox; it is delivered after ``db`` commits."""
+
+    message = EmailOutbox(recipients=list(to), subject=subject, body=body)
+    db.add(message)
+    logger.debug("Queued email to %s with subject '%s'", to, subject)
+    return message
+
+
+async def outbox_depth(db: AsyncSession) -> Dict[str, int]:
+    result = await db.execute(select(EmailOutbox.status, func.count(EmailOutbox.id)).group_by(EmailOutbox.status))
+    depth = {"pending": 0, "sent": 0, "failed": 0}
+    depth.update({status: count for status, count in result})
+    return depth
+
+
+def _retry_delay(attempts: int) -> timedelta:
+    delay = timedelta(seconds=settings.EMAIL_RETRY_BASE_SECONDS * 2 ** max(attempts - 1, 0))
+    return min(delay, MAX_RETRY_DELAY)
+
+
+class OutboxSender:
+    """Drains the outbox in batches over a single reused SMTP connection.
+
+    A batch is claimed in a short transaction that pushes each row's
+    ``next_attempt_at`` out by ``EMAIL_LEASE_SECONDS``. Messages are sent
+    after that commit and each result is recorded on its own, so no row lock
+    or pooled connection is held during SMTP round-trips. If the worker dies
+    mid-batch, only the unrecorded messages become due again once the lease
+    runs out.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker,
+        batch_size: int = settings.EMAIL_BATCH_SIZE,
+        poll_seconds: float = settings.EMAIL_POLL_SECONDS,
+        max_attempts: int = settings.EMAIL_MAX_ATTEMPTS,
+        lease_seconds: float = settings.EMAIL_LEASE_SECONDS,
+    ) -> None:
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.poll_seconds = poll_seconds
+        self.max_attempts = max_attempts
+        self.lease_seconds = lease_seconds
+        self._smtp: Optional[aiosmtplib.SMTP] = None
+
+    async def _connection(self) -> aiosmtplib.SMTP:
+        if self._smtp is None or not self._smtp.is_connected:
+            self._smtp = aiosmtplib.SMTP(
+                hostname=settings.SMTP_HOST,
+                port=settings.SMTP_PORT,
+                username=settings.SMTP_USERNAME,
+                password=settings.SMTP_PASSWORD,
+                use_tls=settings.SMTP_USE_TLS,
+                start_tls=settings.SMTP_START_TLS or None,
+            )
+            await self._smtp.connect()
+        return self._smtp
+
+    async def close(self) -> None:
+        if self._smtp is not None and self._smtp.is_connected:
+            try:
+                await self._smtp.quit()
+            except aiosmtplib.SMTPException:
+                self._smtp.close()
+        self._smtp = None
+
+    def _build_message(self, entry: EmailOutbox) -> EmailMessage:
+        message = EmailMessage()
+        message["From"] = settings.EMAIL_FROM
+        message["To"] = ", ".join(entry.recipients)
+        message["Subject"] = entry.subject
+        message.set_content(entry.body)
+        return message
+
+    def _failure(self, entry_id: uuid.UUID, attempts: int, exc: Exception, now: datetime) -> Dict[str, Any]:
+        values: Dict[str, Any] = {"attempts": attempts, "last_error": str(exc)[:1000]}
+        if attempts >= self.max_attempts:
+            values["status"] = "failed"
+            logger.error("Giving up on email %s after %d attempts: %s", entry_id, attempts, exc)
+        else:
+            values["next_attempt_at"] = now + _retry_delay(attempts)
+        return values
+
+    async def _claim(self, now: datetime) -> List[Tuple[uuid.UUID, int, EmailMessage]]:
+        async with self.session_factory() as session:
+            result = await session.execute(
+                select(EmailOutbox)
+                .where(EmailOutbox.status == "pending", EmailOutbox.next_attempt_at <= now)
+                .order_by(EmailOutbox.next_attempt_at)
+                .limit(self.batch_size)
+                .with_for_update(skip_locked=True)
+            )
+            batch = result.scalars().all()
+            claimed = [(entry.id, entry.attempts, self._build_message(entry)) for entry in batch]
+            for entry in batch:
+                entry.next_attempt_at = now + timedelta(seconds=self.lease_seconds)
+            await session.commit()
+        return claimed
+
+    async def _record(self, entry_id: uuid.UUID, values: Dict[str, Any]) -> None:
+        async with self.session_factory() as session:
+            await session.execute(update(EmailOutbox).where(EmailOutbox.id == entry_id).values(**values))
+            await session.commit()
+
+    async def drain_once(self) -> int:
+        """Send one batch of due messages and return how many were claimed."""
+
+        now = datetime.utcnow()
+        claimed = await self._claim(now)
+        for entry_id, attempts, message in claimed:
+            try:
+                smtp = await self._connection()
+                await smtp.send_message(message)
+            except (aiosmtplib.SMTPException, OSError) as exc:
+                if isinstance(exc, (aiosmtplib.SMTPServerDisconnected, aiosmtplib.SMTPConnectError, OSError)):
+                    await self.close()
+                values = self._failure(entry_id, attempts + 1, exc, datetime.utcnow())
+            else:
+                values = {"status": "sent", "sent_at": datetime.utcnow(), "attempts": attempts + 1}
+            await self._record(entry_id, values)
+        return len(claimed)
 
-def send_email(to: List[str], subject: str, body: str) -> None:
-    logger.info("Sending email to %s with subject '%s'", to, subject)
-    logger.debug("Email body: %s", body)
+    async def run(self) -> None:
+        try:
+            while True:
+                try:
+                    claimed = await self.drain_once()
+                except asyncio.CancelledError:
+                    raise
+                except Exception:
+                    logger.exception("Email outbox delivery failed")
+                    claimed = 0
+                if claimed < self.batch_size:
+                    await asyncio.sleep(self.poll_seconds)
+        finally:
+            await self.close()
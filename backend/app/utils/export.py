@@ -0,0 +1,69 @@
+import csv
+import io
+import json
+import zlib
+from datetime import date, datetime
+from typing import Any, AsyncIterator, Iterable, List, Sequence
+
+from sqlalchemy import Select
+
+from app.core.config import get_settings
+from app.db.session import AsyncSessionLocal
+
+settings = get_settings()
+
+
+def _cell(value: Any) -> Any:
+    # None stays None: JSONL writes null and the csv writer writes an empty field.
+    if value is None:
+        return None
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+
+async def stream_partitions(stmt: Select, bind_arguments: dict) -> AsyncIterator[Sequence[Any]]:
+    """Yield result partitions from a server-side cursor on a session owned by the stream.
+
+    The connection is checked out when the first partition is requested and returned
+    as soon as the last one has been read.
+    """
+
+    async with AsyncSessionLocal() as session:
+        result = await session.stream(
+            stmt.execution_options(yield_per=settings.EXPORT_BATCH_SIZE), bind_arguments=bind_arguments
+        )
+        async for partition in result.partitions():
+            yield partition
+
+
+async def encode_csv(columns: List[str], partitions: AsyncIterator[Sequence[Any]]) -> AsyncIterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    async for partition in partitions:
+        writer.writerows([_cell(value) for value in row] for row in partition)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+async def encode_jsonl(columns: List[str], partitions: AsyncIterator[Sequence[Any]]) -> AsyncIterator[bytes]:
+    async for partition in partitions:
+        lines: Iterable[str] = (
+            json.dumps({column: _cell(value) for column, value in zip(columns, row)}) + "\n" for row in partition
+        )
+        yield "".join(lines).encode("utf-8")
+
+
+async def gzip_stream(chunks: AsyncIterator[bytes], level: int = 6) -> AsyncIterator[bytes]:
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    async for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
@@ -0,0 +1,46 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from typing import Any, Optional
+
+from fastapi import Request, Response, status
+
+
+def make_etag(*parts: Any) -> str:
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+    return f'W/"{digest[:32]}"'
+
+
+def http_date(value: Optional[datetime]) -> Optional[str]:
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def _strip_weak(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    current = _strip_weak(etag)
+    return any(_strip_weak(candidate) == current for candidate in header.split(","))
+
+
+def cache_headers(etag: str, last_modified: Optional[datetime]) -> dict:
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    modified = http_date(last_modified)
+    if modified:
+        headers["Last-Modified"] = modified
+    return headers
+
+
+def not_modified(etag: str, last_modified: Optional[datetime]) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=cache_headers(etag, last_modified))
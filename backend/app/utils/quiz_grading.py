@@ -0,0 +1,134 @@
+"""Vectorized grading for stored quizzes.
+
+A class's answers are encoded once into a students × questions matrix of
+chosen option indexes, with -1 for a blank or unrecognised answer. Scores,
+per-question difficulty and discrimination, and the pick counts of every
+option then come from whole-matrix comparisons and a single ``bincount``, so
+grading 500 students on 50 questions takes about a millisecond. Building the
+matrix from the submitted JSON is a per-answer Python loop and costs more,
+around ten milliseconds at that size.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Union
+
+import numpy as np
+
+from app.schemas.ai import QuizQuestion
+
+Answer = Union[int, str, None]
+OMITTED = -1
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.split()).casefold()
+
+
+@dataclass
+class AnswerKey:
+    correct: np.ndarray  # (questions,) index of the right option
+    option_counts: np.ndarray  # (questions,) options offered
+    lookups: List[Dict[str, int]]  # normalized option text -> index, per question
+
+    @property
+    def questions(self) -> int:
+        return len(self.correct)
+
+    @classmethod
+    def from_questions(cls, questions: Sequence[QuizQuestion]) -> "AnswerKey":
+        """Raises ``ValueError`` when a question's answer is not one of its options."""
+
+        correct, lookups = [], []
+        for number, question in enumerate(questions, start=1):
+            lookup: Dict[str, int] = {}
+            for index, option in enumerate(question.options):
+                lookup.setdefault(_normalize(option), index)
+            answer = lookup.get(_normalize(question.answer))
+            if answer is None:
+                raise ValueError(f"Question {number} has no option matching its answer")
+            correct.append(answer)
+            lookups.append(lookup)
+        return cls(
+            correct=np.array(correct, dtype=np.int16),
+            option_counts=np.array([len(question.options) for question in questions], dtype=np.int16),
+            lookups=lookups,
+        )
+
+    def encode(self, answers: Sequence[Sequence[Answer]]) -> np.ndarray:
+        """Students × questions matrix of option indexes for ``answers``.
+
+        An answer is an option index or the option's text. Missing trailing
+        answers, blanks, booleans, out-of-range indexes and text that matches
+        no option are ``OMITTED``. Raises ``ValueError`` when a student answers more
+        questions than the quiz has.
+        """
+
+        matrix = np.full((len(answers), self.questions), OMITTED, dtype=np.int16)
+        option_counts = self.option_counts.tolist()
+        for row, student_answers in enumerate(answers):
+            if len(student_answers) > self.questions:
+                raise ValueError(f"Submission {row + 1} has more answers than the quiz has questions")
+            for column, answer in enumerate(student_answers):
+                if isinstance(answer, str):
+                    matrix[row, column] = self.lookups[column].get(_normalize(answer), OMITTED)
+                # Checked before assigning: an unbounded int would overflow the int16 matrix.
+                # ``bool`` is an ``int`` subclass, but ``true`` is not option 1.
+                elif isinstance(answer, int) and not isinstance(answer, bool) and 0 <= answer < option_counts[column]:
+                    matrix[row, column] = answer
+        return matrix
+
+
+@dataclass
+class GradeReport:
+    correct: np.ndarray  # (students,) questions answered correctly
+    answered: np.ndarray  # (students,) questions not left blank
+    scores: np.ndarray  # (students,) share of questions correct
+    difficulty: np.ndarray  # (questions,) share of students answering correctly
+    discrimination: np.ndarray  # (questions,) item-rest correlation, NaN when undefined
+    omitted: np.ndarray  # (questions,) students leaving the question blank
+    option_picks: np.ndarray  # (questions, max options) students choosing each option
+    option_mean_scores: np.ndarray  # (questions, max options) mean score of those students, NaN when unpicked
+    reliability: Optional[float]  # KR-20 over the whole quiz
+
+
+def grade(key: AnswerKey, matrix: np.ndarray) -> GradeReport:
+    students, questions = matrix.shape
+    is_correct = matrix == key.correct
+    correct = is_correct.sum(axis=1)
+    scores = correct / questions if questions else np.zeros(students)
+    difficulty = is_correct.mean(axis=0) if students else np.zeros(questions)
+
+    # Point-biserial correlation of each item with the score on the remaining items.
+    items = is_correct.astype(np.float64)
+    rest = correct[:, None] - items
+    with np.errstate(divide="ignore", invalid="ignore"):
+        covariance = (items * rest).mean(axis=0) - difficulty * rest.mean(axis=0)
+        discrimination = covariance / (items.std(axis=0) * rest.std(axis=0))
+
+    # One bincount over (question, choice + 1) counts every option and blanks; weighting by score gives the sums.
+    width = int(key.option_counts.max(initial=0)) + 1
+    cells = (np.arange(questions) * width + matrix + 1).ravel()
+    shape = (questions, width)
+    picks = np.bincount(cells, minlength=questions * width).reshape(shape)
+    score_sums = np.bincount(
+        cells, weights=np.broadcast_to(scores[:, None], matrix.shape).ravel(), minlength=questions * width
+    ).reshape(shape)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean_scores = score_sums / picks
+
+    reliability = None
+    variance = correct.var()
+    if questions > 1 and variance > 0:
+        reliability = float(questions / (questions - 1) * (1 - (difficulty * (1 - difficulty)).sum() / variance))
+
+    return GradeReport(
+        correct=correct,
+        answered=(matrix != OMITTED).sum(axis=1),
+        scores=scores,
+        difficulty=difficulty,
+        discrimination=discrimination,
+        omitted=picks[:, 0],
+        option_picks=picks[:, 1:],
+        option_mean_scores=mean_scores[:, 1:],
+        reliability=reliability,
+    )
@@ -0,0 +1,245 @@
+"""Local text analysis for ``/ai/text-tool``.
+
+A batch of documents is tokenized once into flat arrays (document index,
+vocabulary id, length, syllables per token). Every metric is then a numpy
+reduction over those arrays, so a batch costs roughly the same per token
+as a single document.
+"""
+
+import math
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+ANALYSIS_MODES = ("readability", "stats", "keywords", "vocabulary", "analyze")
+
+_WORD = re.compile(r"[^\W\d_]+(?:['’][^\W\d_]+)*")
+_SENTENCE_END = re.compile(r"[.!?]+(?=\s|$)")
+_VOWEL_GROUP = re.compile(r"[aeiouy]+")
+
+STOPWORDS = frozenset(
+    """
+    a about above after again against all am an and any are as at be because been before being below between both
+    but by can could did do does doing down during each few for from further had has have having he her here hers
+    herself him himself his how i if in into is it its itself just let me more most my myself no nor not now of off
+    on once only or other our ours ourselves out over own same she should so some such than that the their theirs
+    them themselves then there these they this those through to too under until up us very was we were what when
+    where which while who whom why will with would you your yours yourself yourselves also may might must shall
+    one two many much every get got make made use used
+    """.split()
+)
+
+
+@lru_cache(maxsize=50_000)
+def count_syllables(word: str) -> int:
+    word = word.lower().replace("’", "'").split("'")[0]
+    groups = len(_VOWEL_GROUP.findall(word))
+    if word.endswith("e") and not word.endswith(("le", "ee", "ye")) and groups > 1:
+        groups -= 1
+    return max(groups, 1)
+
+
+@dataclass
+class _Batch:
+    """Token-level arrays for a batch of documents."""
+
+    size: int
+    sentences: np.ndarray
+    doc: np.ndarray
+    term: np.ndarray
+    length: np.ndarray
+    syllables: np.ndarray
+    vocabulary: List[str]
+
+
+def _tokenize(texts: Sequence[str]) -> _Batch:
+    vocabulary: Dict[str, int] = {}
+    doc_ids: List[int] = []
+    term_ids: List[int] = []
+    sentences = np.empty(len(texts), dtype=np.int64)
+    for index, text in enumerate(texts):
+        words = _WORD.findall(text.lower())
+        term_ids.extend(vocabulary.setdefault(word, len(vocabulary)) for word in words)
+        doc_ids.extend([index] * len(words))
+        # A trailing fragment without punctuation still counts as a sentence.
+        ends = len(_SENTENCE_END.findall(text))
+        tail = _SENTENCE_END.split(text)[-1]
+        sentences[index] = ends + (1 if _WORD.search(tail) else 0)
+
+    terms = list(vocabulary)
+    term_length = np.fromiter((len(term) for term in terms), dtype=np.int64, count=len(terms))
+    term_syllables = np.fromiter((count_syllables(term) for term in terms), dtype=np.int64, count=len(terms))
+    term = np.asarray(term_ids, dtype=np.int64)
+    return _Batch(
+        size=len(texts),
+        sentences=sentences,
+        doc=np.asarray(doc_ids, dtype=np.int64),
+        term=term,
+        length=term_length[term],
+        syllables=term_syllables[term],
+        vocabulary=terms,
+    )
+
+
+def _per_doc(batch: _Batch, weights: Optional[np.ndarray] = None) -> np.ndarray:
+    return np.bincount(batch.doc, weights=weights, minlength=batch.size)
+
+
+def _safe_div(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    return np.divide(numerator, denominator, out=np.zeros(len(numerator)), where=denominator > 0)
+
+
+def _stats(batch: _Batch) -> List[dict]:
+    words = _per_doc(batch)
+    sentences = np.maximum(batch.sentences, (words > 0).astype(np.int64))
+    letters = _per_doc(batch, batch.length)
+    syllables = _per_doc(batch, batch.syllables)
+    pairs = np.unique(batch.doc * max(len(batch.vocabulary), 1) + batch.term)
+    unique = np.bincount(pairs // max(len(batch.vocabulary), 1), minlength=batch.size)
+    columns = {
+        "words": words,
+        "sentences": sentences,
+        "letters": letters,
+        "syllables": syllables,
+        "unique_words": unique,
+        "polysyllabic_words": _per_doc(batch, (batch.syllables >= 3).astype(np.float64)),
+        "avg_words_per_sentence": _safe_div(words, sentences),
+        "avg_syllables_per_word": _safe_div(syllables, words),
+        "avg_word_length": _safe_div(letters, words),
+        "lexical_diversity": _safe_div(unique, words),
+    }
+    return _rows(columns, batch.size)
+
+
+def _readability(stats: List[dict]) -> List[dict]:
+    words = np.array([row["words"] for row in stats], dtype=np.float64)
+    sentences = np.array([row["sentences"] for row in stats], dtype=np.float64)
+    words_per_sentence = np.array([row["avg_words_per_sentence"] for row in stats])
+    syllables_per_word = np.array([row["avg_syllables_per_word"] for row in stats])
+    letters_per_word = np.array([row["avg_word_length"] for row in stats])
+    polysyllabic = np.array([row["polysyllabic_words"] for row in stats], dtype=np.float64)
+    has_text = words > 0
+    columns = {
+        "flesch_reading_ease": 206.835 - 1.015 * words_per_sentence - 84.6 * syllables_per_word,
+        "flesch_kincaid_grade": 0.39 * words_per_sentence + 11.8 * syllables_per_word - 15.59,
+        "automated_readability_index": 4.71 * letters_per_word + 0.5 * words_per_sentence - 21.43,
+        "smog_index": 1.043 * np.sqrt(_safe_div(polysyllabic * 30, sentences)) + 3.1291,
+    }
+    return _rows({name: np.where(has_text, values, 0.0) for name, values in columns.items()}, len(stats))
+
+
+def _keywords(batch: _Batch, limit: int) -> List[List[dict]]:
+    """Top terms per document by tf-idf over the batch (plain term frequency for a single document)."""
+
+    vocabulary_size = max(len(batch.vocabulary), 1)
+    stop = np.fromiter((term in STOPWORDS or len(term) < 3 for term in batch.vocabulary), dtype=bool)
+    keep = ~stop[batch.term] if len(batch.term) else np.zeros(0, dtype=bool)
+    pairs, counts = np.unique(batch.doc[keep] * vocabulary_size + batch.term[keep], return_counts=True)
+    docs, terms = pairs // vocabulary_size, pairs % vocabulary_size
+    document_frequency = np.bincount(terms, minlength=vocabulary_size)
+    idf = np.log((1 + batch.size) / (1 + document_frequency)) + 1
+    totals = _per_doc(batch)
+    scores = counts / np.maximum(totals[docs], 1) * idf[terms]
+
+    order = np.lexsort((-scores, docs))
+    keywords: List[List[dict]] = [[] for _ in range(batch.size)]
+    for position in order:
+        bucket = keywords[docs[position]]
+        if len(bucket) < limit:
+            bucket.append(
+                {
+                    "term": batch.vocabulary[terms[position]],
+                    "count": int(counts[position]),
+                    "score": round(float(scores[position]), 4),
+                }
+            )
+    return keywords
+
+
+def _vocabulary(batch: _Batch, readability: List[dict], target_grade: Optional[float], limit: int) -> List[dict]:
+    """Share of basic (stopword or one syllable), intermediate (two) and advanced (3+ syllables) words."""
+
+    stop = np.fromiter((term in STOPWORDS for term in batch.vocabulary), dtype=bool)
+    level = np.where(stop[batch.term] | (batch.syllables <= 1), 0, np.where(batch.syllables == 2, 1, 2))
+    words = _per_doc(batch)
+    shares = {
+        name: _safe_div(_per_doc(batch, (level == value).astype(np.float64)), words)
+        for value, name in enumerate(("basic", "intermediate", "advanced"))
+    }
+    advanced = _keywords_of_level(batch, level == 2, limit)
+    rows = _rows(shares, batch.size)
+    for index, row in enumerate(rows):
+        grade = readability[index]["flesch_kincaid_grade"]
+        row["estimated_grade"] = grade
+        row["advanced_words"] = advanced[index]
+        row["above_target_grade"] = None if target_grade is None else grade > target_grade
+    return rows
+
+
+def _keywords_of_level(batch: _Batch, mask: np.ndarray, limit: int) -> List[List[str]]:
+    vocabulary_size = max(len(batch.vocabulary), 1)
+    pairs, counts = np.unique(batch.doc[mask] * vocabulary_size + batch.term[mask], return_counts=True)
+    order = np.lexsort((-counts, pairs // vocabulary_size))
+    words: List[List[str]] = [[] for _ in range(batch.size)]
+    for position in order:
+        bucket = words[pairs[position] // vocabulary_size]
+        if len(bucket) < limit:
+            bucket.append(batch.vocabulary[pairs[position] % vocabulary_size])
+    return words
+
+
+def _rows(columns: Dict[str, np.ndarray], size: int) -> List[dict]:
+    converted = {
+        name: values.astype(np.int64).tolist() if np.issubdtype(values.dtype, np.integer) else np.round(values, 2).tolist()
+        for name, values in columns.items()
+    }
+    return [{name: values[index] for name, values in converted.items()} for index in range(size)]
+
+
+def analyze_texts(
+    texts: Sequence[str], mode: str, target_grade: Optional[float] = None, keyword_limit: int = 10
+) -> List[dict]:
+    """Analyze every document in ``texts`` for ``mode`` (one of ``ANALYSIS_MODES``)."""
+
+    if mode not in ANALYSIS_MODES:
+        raise ValueError(f"Unsupported analysis mode '{mode}'")
+    batch = _tokenize(texts)
+    results: List[dict] = [{} for _ in texts]
+    stats = _stats(batch)
+    readability = _readability(stats) if mode in ("readability", "vocabulary", "analyze") else None
+
+    if mode in ("stats", "analyze"):
+        for result, row in zip(results, stats):
+            result["stats"] = row
+    if mode in ("readability", "analyze"):
+        for result, row in zip(results, readability):
+            result["readability"] = row
+    if mode in ("keywords", "analyze"):
+        for result, row in zip(results, _keywords(batch, keyword_limit)):
+            result["keywords"] = row
+    if mode in ("vocabulary", "analyze"):
+        for result, row in zip(results, _vocabulary(batch, readability, target_grade, keyword_limit)):
+            result["vocabulary"] = row
+    return results
+
+
+def summarize(result: dict) -> str:
+    parts = []
+    if "stats" in result:
+        stats = result["stats"]
+        parts.append(f"{stats['words']} words in {stats['sentences']} sentences")
+    if "readability" in result:
+        readability = result["readability"]
+        parts.append(
+            f"Flesch reading ease {readability['flesch_reading_ease']:.1f}, "
+            f"grade {readability['flesch_kincaid_grade']:.1f}"
+        )
+    if "keywords" in result:
+        parts.append("keywords: " + ", ".join(keyword["term"] for keyword in result["keywords"]))
+    if "vocabulary" in result:
+        vocabulary = result["vocabulary"]
+        parts.append(f"{math.floor(vocabulary['advanced'] * 100)}% advanced vocabulary")
+    return "; ".join(parts)
@@ -0,0 +1,34 @@
+import asyncio
+import os
+
+# Settings are read at import time, so point the app at a throwaway database before anything imports it.
+os.environ["DATABASE_URL"] = "sqlite+aiosqlite:///:memory:"
+os.environ["SHARD_DATABASE_URLS"] = "{}"
+
+import pytest  # noqa: E402
+
+from app.db.base import Base, import_models  # noqa: E402
+from app.db.session import AsyncSessionLocal, engine  # noqa: E402
+
+
+@pytest.fixture
+def run_db():
+    """Runs ``test(session)`` against a fresh in-memory database and returns its result."""
+
+    def run(test):
+        async def main():
+            import_models()
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+            try:
+                async with AsyncSessionLocal() as session:
+                    return await test(session)
+            finally:
+                async with engine.begin() as conn:
+                    await conn.run_sync(Base.metadata.drop_all)
+                await engine.dispose()
+
+        return asyncio.run(main())
+
+    return run
+
@@ -0,0 +1,54 @@
+import asyncio
+import time
+
+import pytest
+
+from app.core.ai_providers import ProviderError, ProviderRouter, StubProvider
+from app.core.config import get_settings
+
+settings = get_settings()
+
+
+@pytest.fixture(autouse=True)
+def _fast_hedging(monkeypatch):
+    monkeypatch.setattr(settings, "AI_HEDGING_ENABLED", True)
+    monkeypatch.setattr(settings, "AI_HEDGE_DEFAULT_DELAY_MS", 20.0)
+    monkeypatch.setattr(settings, "AI_HEDGE_BUDGET_RATIO", 1.0)
+
+
+def _generate(router: ProviderRouter, candidates):
+    async def run():
+        started = time.perf_counter()
+        result = await router.generate(candidates, str.upper, "quiz", "model")
+        elapsed = time.perf_counter() - started
+        # Let cancelled attempts unwind and record their samples.
+        await asyncio.sleep(0.01)
+        return result, elapsed
+
+    return asyncio.run(run())
+
+
+def test_hedge_cuts_a_slow_primary_and_records_it_as_censored():
+    router = ProviderRouter({"slow": StubProvider("slow", latency_ms=500), "fast": StubProvider("fast", latency_ms=5)})
+    (name, output), elapsed = _generate(router, ["slow", "fast"])
+    assert (name, output) == ("fast", "QUIZ")
+    assert elapsed < 0.25
+    assert router.hedges == 1
+    slow = router.stats["slow"]
+    assert slow.cancelled == 1
+    assert slow.latency.total == 1
+    assert slow.latency.percentile(50) >= settings.AI_HEDGE_DEFAULT_DELAY_MS
+
+
+def test_failing_primary_fails_over():
+    router = ProviderRouter({"broken": StubProvider("broken", failure_rate=1.0), "ok": StubProvider("ok")})
+    (name, _), _ = _generate(router, ["broken", "ok"])
+    assert name == "ok"
+    assert router.failovers == 1
+    assert router.stats["broken"].errors == 1
+
+
+def test_all_providers_failing_raises():
+    router = ProviderRouter({"a": StubProvider("a", failure_rate=1.0), "b": StubProvider("b", failure_rate=1.0)})
+    with pytest.raises(ProviderError):
+        _generate(router, ["a", "b"])
@@ -0,0 +1,88 @@
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import func, insert, select
+
+from app.api.routes_library import read_library_item
+from app.core.content_library import content_hash, find_content, store_content, visible_to
+from app.models.generated_content import GeneratedContent
+from app.models.organization import Organization
+from app.models.user import User
+from app.schemas.ai import Lesson, LessonInput
+
+LESSON_INPUT = LessonInput(topic="Photosynthesis", grade="7", objectives=["Explain light reactions"])
+
+
+def _lesson(title: str) -> Lesson:
+    return Lesson(title=title, overview="o", objectives=["x"], activities=["a"], assessment="q")
+
+
+async def _user(session, email: str, organization_id=None) -> User:
+    result = await session.execute(
+        insert(User)
+        .values(email=email, name=email, password_hash="x", organization_id=organization_id)
+        .returning(User)
+    )
+    return result.scalar_one()
+
+
+async def _generate(session, user: User, title: str) -> Lesson:
+    """What ``/ai/lesson`` does: serve from the library, or store a fresh lesson."""
+
+    digest = content_hash("lesson", "demo-model", user, LESSON_INPUT)
+    cached = await find_content(session, user, digest, Lesson)
+    if cached is not None:
+        return cached
+    lesson = _lesson(title)
+    await store_content(session, user, "lesson", "demo-model", digest, LESSON_INPUT, lesson)
+    return lesson
+
+
+async def _library_size(session, user: User) -> int:
+    return await session.scalar(select(func.count()).select_from(GeneratedContent).where(visible_to(user)))
+
+
+def test_users_without_an_organization_do_not_share_content(run_db):
+    async def test(session):
+        alice = await _user(session, "alice@example.com")
+        bob = await _user(session, "bob@example.com")
+        await session.commit()
+        first = await _generate(session, alice, "Alice's lesson")
+        second = await _generate(session, bob, "Bob's lesson")
+        return first, second, await _library_size(session, alice), await _library_size(session, bob)
+
+    first, second, alice_items, bob_items = run_db(test)
+    assert first.title == "Alice's lesson"
+    assert second.title == "Bob's lesson"
+    assert (alice_items, bob_items) == (1, 1)
+
+
+def test_organization_members_share_one_library_item(run_db):
+    async def test(session):
+        result = await session.execute(
+            insert(Organization).values(name="School", slug="school").returning(Organization)
+        )
+        org = result.scalar_one()
+        teacher = await _user(session, "teacher@school.test", org.id)
+        colleague = await _user(session, "colleague@school.test", org.id)
+        outsider = await _user(session, "outsider@example.com")
+        await session.commit()
+        first = await _generate(session, teacher, "Teacher's lesson")
+        second = await _generate(session, colleague, "Colleague's lesson")
+        total = await session.scalar(select(func.count()).select_from(GeneratedContent))
+        return first, second, total, await _library_size(session, outsider)
+
+    first, second, total, outsider_items = run_db(test)
+    assert second == first
+    assert total == 1
+    assert outsider_items == 0
+
+
+def test_malformed_library_item_id_is_not_found(run_db):
+    async def test(session):
+        user = await _user(session, "alice@example.com")
+        await session.commit()
+        with pytest.raises(HTTPException) as raised:
+            await read_library_item("not-a-uuid", current_user=user, db=session)
+        return raised.value.status_code
+
+    assert run_db(test) == 404
@@ -0,0 +1,29 @@
+import uuid
+
+import pytest
+from sqlalchemy import Column, MetaData, Table, insert, select
+from sqlalchemy.dialects import sqlite
+
+from app.db.session import engine
+from app.db.types import UUID
+
+VALUE = uuid.UUID("12345678-1234-5678-1234-567812345678")
+
+
+def test_as_uuid_false_returns_strings(run_db):
+    table = Table("uuid_probe", MetaData(), Column("native", UUID()), Column("text", UUID(as_uuid=False)))
+
+    async def test(session):
+        async with engine.begin() as conn:
+            await conn.run_sync(table.metadata.create_all)
+            await conn.execute(insert(table).values(native=str(VALUE), text=VALUE))
+            return (await conn.execute(select(table))).one()
+
+    native, text = run_db(test)
+    assert native == VALUE
+    assert text == str(VALUE)
+
+
+def test_malformed_value_names_the_problem():
+    with pytest.raises(ValueError, match="validate ids"):
+        UUID().process_bind_param("not-a-uuid", sqlite.dialect())
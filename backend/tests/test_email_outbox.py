@@ -0,0 +1,51 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import select
+
+from app.db.session import AsyncSessionLocal
+from app.models.email_outbox import EmailOutbox
+from app.utils.email_sender import OutboxSender, send_email
+
+
+class _SMTP:
+    """Delivers messages until ``crash_after``, then fails the way a dying worker would."""
+
+    def __init__(self, crash_after: int) -> None:
+        self.crash_after = crash_after
+        self.delivered = []
+
+    async def send_message(self, message):
+        if len(self.delivered) == self.crash_after:
+            raise RuntimeError("worker died")
+        self.delivered.append(message["Subject"])
+
+
+class _Sender(OutboxSender):
+    def __init__(self, smtp: _SMTP) -> None:
+        super().__init__(AsyncSessionLocal, batch_size=10, lease_seconds=300)
+        self.smtp = smtp
+
+    async def _connection(self):
+        return self.smtp
+
+
+def test_crash_mid_batch_keeps_delivered_messages_sent(run_db):
+    smtp = _SMTP(crash_after=2)
+
+    async def test(session):
+        for index in range(3):
+            send_email(session, [f"user{index}@example.com"], f"message {index}", "hello")
+        await session.commit()
+        with pytest.raises(RuntimeError):
+            await _Sender(smtp).drain_once()
+        result = await session.execute(select(EmailOutbox.subject, EmailOutbox.status, EmailOutbox.next_attempt_at))
+        return {subject: (status, next_attempt_at) for subject, status, next_attempt_at in result}
+
+    rows = run_db(test)
+    assert smtp.delivered == ["message 0", "message 1"]
+    assert rows["message 0"][0] == rows["message 1"][0] == "sent"
+    status, next_attempt_at = rows["message 2"]
+    # Still leased to the dead sender, so no other sender picks it up until the lease runs out.
+    assert status == "pending"
+    assert next_attempt_at > datetime.utcnow()
@@ -0,0 +1,91 @@
+import asyncio
+import uuid
+from typing import Dict, Tuple
+
+from app.core import deadline
+from app.core.idempotency import ACQUIRED, IdempotencyStore
+from app.core.security import create_access_token
+from app.db.session import AsyncSessionLocal
+from app.middleware.deadline import DeadlineMiddleware
+from app.middleware.idempotency import IdempotencyMiddleware
+
+
+class _Store:
+    """Acquires every key; like the PostgreSQL ``after_begin`` hook, writes fail once the deadline has passed."""
+
+    def __init__(self) -> None:
+        self.calls = []
+
+    async def begin(self, user_id, key, fingerprint, lock_seconds):
+        return ACQUIRED, None
+
+    async def complete(self, user_id, key, status_code, headers, body):
+        deadline.timeout()
+        self.calls.append(("complete", status_code))
+
+    async def release(self, user_id, key):
+        deadline.timeout()
+        self.calls.append(("release", None))
+
+
+async def _slow_app(scope, receive, send):
+    await asyncio.sleep(5)
+
+
+async def _post(app, token: str, timeout: str = "") -> Tuple[int, Dict[bytes, bytes]]:
+    headers = [(b"authorization", f"Bearer {token}".encode()), (b"idempotency-key", b"k1")]
+    if timeout:
+        headers.append((b"x-request-timeout", timeout.encode()))
+    scope = {"type": "http", "method": "POST", "path": "/topics", "query_string": b"", "headers": headers}
+    messages = [{"type": "http.request", "body": b"{}", "more_body": False}]
+    sent = []
+
+    async def receive():
+        if messages:
+            return messages.pop()
+        await asyncio.Event().wait()
+
+    async def send(message):
+        sent.append(message)
+
+    await app(scope, receive, send)
+    start = next(message for message in sent if message["type"] == "http.response.start")
+    return start["status"], dict(start.get("headers", []))
+
+
+def _token() -> str:
+    return create_access_token({"sub": str(uuid.uuid4()), "email": "a@example.com", "role": "student"})
+
+
+def _call(app, timeout: str) -> int:
+    status_code, _ = asyncio.run(_post(app, _token(), timeout))
+    return status_code
+
+
+def test_timed_out_request_releases_its_key_and_returns_504():
+    store = _Store()
+    app = DeadlineMiddleware(IdempotencyMiddleware(_slow_app, store=store))
+    assert _call(app, "0.05") == 504
+    assert store.calls == [("release", None)]
+
+
+def test_retry_after_an_auth_failure_runs_again(run_db):
+    statuses = iter([401, 201])
+
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": next(statuses), "headers": []})
+        await send({"type": "http.response.body", "body": b"{}"})
+
+    middleware = IdempotencyMiddleware(app, store=IdempotencyStore(AsyncSessionLocal))
+    token = _token()
+
+    async def test(session):
+        first, _ = await _post(middleware, token)
+        retried, headers = await _post(middleware, token)
+        replayed, replay_headers = await _post(middleware, token)
+        return first, retried, headers, replayed, replay_headers
+
+    first, retried, headers, replayed, replay_headers = run_db(test)
+    assert (first, retried, replayed) == (401, 201, 201)
+    assert b"idempotent-replayed" not in headers
+    assert replay_headers[b"idempotent-replayed"] == b"true"
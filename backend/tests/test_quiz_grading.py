@@ -0,0 +1,85 @@
+import math
+
+import numpy as np
+import pytest
+from pydantic import ValidationError
+
+from app.schemas.ai import QuizQuestion
+from app.schemas.quiz import QuizAnswers
+from app.utils.quiz_grading import OMITTED, AnswerKey, grade
+
+
+def _key(answers=("B", "A", "C")) -> AnswerKey:
+    questions = [
+        QuizQuestion(question=f"Q{index}", options=["A", "B", "C"], answer=answer)
+        for index, answer in enumerate(answers)
+    ]
+    return AnswerKey.from_questions(questions)
+
+
+def test_encode_maps_text_and_indexes_and_omits_the_rest():
+    key = _key()
+    matrix = key.encode([["b", 0, None], [" c ", 2], ["nope", -1, 3], [40000, -40000, 2]])
+    assert matrix.tolist() == [
+        [1, 0, OMITTED],
+        [2, 2, OMITTED],
+        [OMITTED, OMITTED, OMITTED],
+        [OMITTED, OMITTED, 2],
+    ]
+
+
+def test_encode_rejects_more_answers_than_questions():
+    with pytest.raises(ValueError):
+        _key().encode([[0, 0, 0, 0]])
+
+
+def test_answer_key_requires_the_answer_among_the_options():
+    with pytest.raises(ValueError):
+        AnswerKey.from_questions([QuizQuestion(question="Q", options=["A", "B"], answer="C")])
+
+
+def test_grade_scores_difficulty_and_option_picks():
+    key = _key()
+    matrix = np.array([[1, 0, 2], [1, 0, 0], [1, 1, OMITTED], [0, 1, OMITTED]], dtype=np.int16)
+    report = grade(key, matrix)
+
+    assert report.correct.tolist() == [3, 2, 1, 0]
+    assert report.answered.tolist() == [3, 3, 2, 2]
+    assert np.allclose(report.scores, [1, 2 / 3, 1 / 3, 0])
+    assert np.allclose(report.difficulty, [0.75, 0.5, 0.25])
+    assert report.omitted.tolist() == [0, 0, 2]
+    assert report.option_picks.tolist() == [[1, 3, 0], [2, 2, 0], [1, 0, 1]]
+    # Students picking question 1's answer averaged (1 + 2/3 + 1/3) / 3; nobody picked "C".
+    assert math.isclose(report.option_mean_scores[0, 1], 2 / 3)
+    assert math.isnan(report.option_mean_scores[0, 2])
+
+
+def test_grade_discrimination_and_reliability():
+    key = _key()
+    matrix = np.array([[1, 0, 2], [1, 0, 0], [1, 1, OMITTED], [0, 1, OMITTED]], dtype=np.int16)
+    report = grade(key, matrix)
+
+    items = (matrix == key.correct).astype(float)
+    totals = items.sum(axis=1)
+    for question in range(key.questions):
+        rest = totals - items[:, question]
+        expected = np.corrcoef(items[:, question], rest)[0, 1]
+        assert math.isclose(report.discrimination[question], expected)
+
+    k = key.questions
+    kr20 = k / (k - 1) * (1 - (items.mean(axis=0) * (1 - items.mean(axis=0))).sum() / totals.var())
+    assert math.isclose(report.reliability, kr20)
+
+
+def test_grade_leaves_undefined_statistics_empty():
+    key = _key()
+    report = grade(key, np.array([[1, 0, 2], [1, 0, 2]], dtype=np.int16))
+
+    assert np.isnan(report.discrimination).all()
+    assert report.reliability is None
+
+
+def test_booleans_are_not_option_indexes():
+    assert _key().encode([[True, False, 1]]).tolist() == [[OMITTED, OMITTED, 1]]
+    with pytest.raises(ValidationError):
+        QuizAnswers(student_id="s1", answers=[True])
@@ -0,0 +1,67 @@
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import insert
+from starlette.requests import Request
+
+from app.api.routes_auth import login, logout, refresh_token
+from app.core.security import hash_password
+from app.models.user import User
+from app.schemas.auth import LoginRequest, LogoutRequest, RefreshRequest
+
+
+def _request() -> Request:
+    return Request({"type": "http", "method": "POST", "path": "/auth/login", "headers": [], "client": ("10.0.0.1", 1)})
+
+
+async def _login(session, email: str = "teacher@example.com"):
+    await session.execute(insert(User).values(email=email, name="T", password_hash=hash_password("secret")))
+    await session.commit()
+    return await login(LoginRequest(email=email, password="secret"), _request(), db=session)
+
+
+async def _refresh_status(session, token: str) -> int:
+    try:
+        await refresh_token(RefreshRequest(refresh_token=token), db=session)
+    except HTTPException as exc:
+        return exc.status_code
+    return 200
+
+
+def test_refresh_rotates_the_token(run_db):
+    async def test(session):
+        first = await _login(session)
+        second = await refresh_token(RefreshRequest(refresh_token=first.refresh_token), db=session)
+        third = await refresh_token(RefreshRequest(refresh_token=second.refresh_token), db=session)
+        return first, second, third
+
+    first, second, third = run_db(test)
+    assert len({first.refresh_token, second.refresh_token, third.refresh_token}) == 3
+    assert third.user.email == "teacher@example.com"
+
+
+def test_reusing_a_rotated_token_revokes_the_whole_family(run_db):
+    async def test(session):
+        first = await _login(session)
+        second = await refresh_token(RefreshRequest(refresh_token=first.refresh_token), db=session)
+        reused = await _refresh_status(session, first.refresh_token)
+        return reused, await _refresh_status(session, second.refresh_token)
+
+    assert run_db(test) == (401, 401)
+
+
+def test_logout_revokes_the_session(run_db):
+    async def test(session):
+        tokens = await _login(session)
+        await logout(LogoutRequest(refresh_token=tokens.refresh_token), db=session)
+        return await _refresh_status(session, tokens.refresh_token)
+
+    assert run_db(test) == 401
+
+
+def test_malformed_refresh_token_is_rejected(run_db):
+    async def test(session):
+        with pytest.raises(HTTPException) as raised:
+            await refresh_token(RefreshRequest(refresh_token="not-a-token"), db=session)
+        return raised.value.status_code
+
+    assert run_db(test) == 401
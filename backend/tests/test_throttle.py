@@ -0,0 +1,30 @@
+import asyncio
+
+from app.core.config import get_settings
+from app.core.throttle import LoginThrottle, MemoryThrottleBackend
+
+settings = get_settings()
+
+
+def test_successful_logins_do_not_count_against_the_ip():
+    throttle = LoginThrottle(MemoryThrottleBackend())
+
+    async def run():
+        for index in range(settings.AUTH_IP_LIMIT * 2):
+            assert await throttle.check("10.0.0.1", f"student{index}@school.test") is None
+            await throttle.record_success(f"student{index}@school.test")
+
+    asyncio.run(run())
+
+
+def test_failed_logins_block_the_ip():
+    throttle = LoginThrottle(MemoryThrottleBackend())
+
+    async def run():
+        for index in range(settings.AUTH_IP_LIMIT + 1):
+            await throttle.record_failure("10.0.0.1", f"guess{index}@school.test")
+        return await throttle.check("10.0.0.1", "someone@school.test")
+
+    reason, retry_after = asyncio.run(run())
+    assert reason == "ip"
+    assert retry_after > 0
@@ -0,0 +1,78 @@
+import uuid
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import insert
+
+from app.api.routes_topics import create_topic
+from app.core.topic_index import TopicIndex
+from app.models.organization import Organization
+from app.models.user import User
+from app.schemas.topic import TopicCreate
+
+
+def test_org_less_events_drop_only_the_org_less_index(run_db):
+    index = TopicIndex()
+
+    async def test(session):
+        result = await session.execute(insert(Organization).values(name="S", slug="s").returning(Organization.id))
+        org_id = result.scalar_one()
+        org_less = await index.for_org(session, None)
+        org_index = await index.for_org(session, org_id)
+        # publish() sends str(None) for topics without an organization.
+        index.drop("None")
+        return org_less, org_index, await index.for_org(session, None), await index.for_org(session, org_id)
+
+    org_less, org_index, org_less_after, org_index_after = run_db(test)
+    assert org_less_after is not org_less
+    assert org_index_after is org_index
+
+
+def test_malformed_organization_id_is_rejected_before_querying(run_db):
+    professor = User(id=uuid.uuid4(), email="p@school.test", role="professor")
+
+    async def test(session):
+        with pytest.raises(HTTPException) as raised:
+            payload = TopicCreate(title="Fractions", organization_id="bad")
+            await create_topic(payload, current_user=professor, db=session)
+        return raised.value.status_code
+
+    assert run_db(test) == 400
+
+
+async def _org_professor(session, slug: str) -> User:
+    result = await session.execute(insert(Organization).values(name=slug, slug=slug).returning(Organization.id))
+    org_id = result.scalar_one()
+    result = await session.execute(
+        insert(User)
+        .values(email=f"p@{slug}.example.com", name="P", password_hash="-", role="professor", organization_id=org_id)
+        .returning(User)
+    )
+    await session.commit()
+    return result.scalar_one()
+
+
+async def _create_status(session, professor: User, title: str, allow_duplicate: bool = False):
+    payload = TopicCreate(title=title, description="Common denominators", allow_duplicate=allow_duplicate)
+    try:
+        topic = await create_topic(payload, current_user=professor, db=session)
+    except HTTPException as exc:
+        return exc.status_code, exc.detail
+    return 200, topic
+
+
+def test_near_duplicate_topics_are_rejected_within_an_organization(run_db):
+    async def test(session):
+        professor = await _org_professor(session, "north")
+        other = await _org_professor(session, "south")
+        _, original = await _create_status(session, professor, "Adding fractions with unlike denominators")
+        duplicate = await _create_status(session, professor, "Adding Fractions with unlike denominators!")
+        unrelated = await _create_status(session, professor, "Photosynthesis in desert plants")
+        forced = await _create_status(session, professor, "Adding fractions with unlike denominators", True)
+        elsewhere = await _create_status(session, other, "Adding fractions with unlike denominators")
+        return original, duplicate, unrelated, forced, elsewhere
+
+    original, (status_code, detail), unrelated, forced, elsewhere = run_db(test)
+    assert status_code == 409
+    assert [match["id"] for match in detail["similar"]] == [original.id]
+    assert (unrelated[0], forced[0], elsewhere[0]) == (200, 200, 200)
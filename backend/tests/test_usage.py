@@ -0,0 +1,43 @@
+import asyncio
+import uuid
+
+from app.core import deadline
+from app.core.usage import UsageEvent, UsageRecorder
+
+
+class _Recorder(UsageRecorder):
+    def __init__(self) -> None:
+        super().__init__(session_factory=None, max_batch=2, flush_seconds=60)
+        self.deadlines = []
+
+    async def _write(self, events):
+        self.deadlines.append(deadline.remaining())
+
+
+def _event() -> UsageEvent:
+    return UsageEvent(
+        user_id=uuid.uuid4(),
+        organization_id=None,
+        endpoint="/ai/text-tool",
+        provider="local",
+        model="m",
+        input_chars=10,
+        output_chars=20,
+        latency_ms=5,
+    )
+
+
+def test_flush_started_by_a_request_does_not_inherit_its_deadline():
+    recorder = _Recorder()
+
+    async def request():
+        token = deadline.start(0.5)
+        try:
+            recorder.record(_event())
+            recorder.record(_event())
+        finally:
+            deadline.reset(token)
+        await recorder._pending_flush
+
+    asyncio.run(request())
+    assert recorder.deadlines == [None]